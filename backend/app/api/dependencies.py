@@ -1,12 +1,140 @@
+import os
+import httpx
+from fastapi import Depends, Request
 from core.config import settings
+from core.embedding import create_embedding_retriever
+from core.metrics import registry
+from core.singleflight import SingleFlight
+from core.token_counter import get_token_counter
+from services.llm.base import LLMClient
 from services.llm.ollama import OllamaClient as OllamaLLM
 from services.llm.claude import ClaudeClient as ClaudeLLM
 from services.chat_service import ChatService
+from services.document_service import DocumentService
+from services.health import HealthChecker
+from services.extraction_cache import open_extraction_cache
+from services.corpus_index import DirectoryIndex, create_corpus_index
+from services.ingest_jobs import IngestJobManager
+from services.page_cache import PageCache
+from services.response_cache import create_response_cache
 
-def get_llm():
+doc_service = DocumentService(
+    extraction_cache=open_extraction_cache(),
+    max_workers=settings.EXTRACTION_WORKERS or os.cpu_count() or 1,
+    ignore_patterns=settings.SCAN_IGNORE_PATTERNS,
+    max_depth=settings.SCAN_MAX_DEPTH
+)
+embedding_retriever = create_embedding_retriever(
+    settings.OLLAMA_HOST,
+    settings.EMBEDDING_MODEL,
+    settings.EMBEDDING_BATCH_SIZE,
+    index_path=settings.VECTOR_INDEX_PATH,
+    top_k=settings.CONTEXT_MAX_CANDIDATES,
+    nprobe=settings.VECTOR_INDEX_NPROBE,
+    ivf_threshold=settings.VECTOR_INDEX_IVF_THRESHOLD,
+)
+# Token-Zähler des aktiven Modells; Chunks werden beim Indexieren gezählt
+token_counter = get_token_counter(
+    settings.LOCAL_MODEL if settings.USE_LOCAL_LLM else ClaudeLLM.MODEL,
+    settings.TOKEN_COUNTER,
+)
+corpus_index = create_corpus_index(
+    doc_service, embedding=embedding_retriever, token_counter=token_counter
+)
+# Uploads teilen sich BM25 und Embeddings mit dem Korpus
+upload_index = DirectoryIndex(
+    settings.UPLOAD_DIR,
+    doc_service,
+    apply_version_filtering=False,
+    bm25=corpus_index.bm25,
+    embedding=embedding_retriever,
+    token_counter=token_counter,
+)
+# PDF-Seiten, die Chat-Anfragen und Upload-Jobs gemeinsam nutzen
+page_cache = PageCache(settings.PAGE_CACHE_MAX_BYTES)
+ingest_jobs = IngestJobManager(
+    upload_index, max_jobs=settings.UPLOAD_MAX_JOBS, page_cache=page_cache
+)
+
+response_cache = create_response_cache()
+
+# Gleichzeitige identische Arbeit nur einmal ausführen
+scan_flight = SingleFlight("scan")
+context_flight = SingleFlight("context")
+llm_flight = SingleFlight("llm")
+
+health_checker = HealthChecker(
+    corpus_index,
+    response_cache,
+    ttl=settings.HEALTH_CACHE_TTL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+)
+
+def _cache_stats():
+    caches = {
+        "response": response_cache,
+        "extraction": doc_service.extraction_cache,
+        "pdf_pages": page_cache,
+    }
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+# Vorhandene Zähler werden erst beim Scrape gelesen
+registry.callback(
+    "mcp_cache_requests_total", "Cache lookups by result", "counter",
+    lambda: [
+        ({"cache": name, "result": result}, stats[result + "s"])
+        for name, stats in _cache_stats().items() for result in ("hit", "miss")
+    ],
+)
+registry.callback(
+    "mcp_cache_hit_ratio", "Share of cache lookups that were hits since start", "gauge",
+    lambda: [({"cache": name}, stats["hit_rate"]) for name, stats in _cache_stats().items()],
+)
+registry.callback(
+    "mcp_coalesced_calls_total", "Calls to coalesced operations by outcome", "counter",
+    lambda: [
+        ({"operation": f.name, "outcome": outcome}, f.stats()[key])
+        for f in (scan_flight, context_flight, llm_flight)
+        for outcome, key in (("executed", "executions"), ("shared", "deduplicated"))
+    ],
+)
+registry.callback(
+    "mcp_indexed_documents", "Documents held by the corpus index", "gauge",
+    lambda: [({"directory": index.directory.name}, len(index)) for index in corpus_index.indexes()],
+)
+
+def create_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client shared by all outgoing HTTP calls for the app lifetime."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    )
+
+def create_llm(http_client: httpx.AsyncClient) -> LLMClient:
     if settings.USE_LOCAL_LLM:
-        return OllamaLLM(settings.OLLAMA_HOST, settings.LOCAL_MODEL)
+        return OllamaLLM(
+            settings.OLLAMA_HOST,
+            settings.LOCAL_MODEL,
+            client=http_client,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+        )
     return ClaudeLLM(settings.ANTHROPIC_API_KEY)
 
-def get_chat_service():
-    return ChatService(get_llm())
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
+
+def get_llm(request: Request) -> LLMClient:
+    return request.app.state.llm
+
+def get_chat_service(llm: LLMClient = Depends(get_llm)):
+    return ChatService(llm, cache=response_cache, flight=llm_flight)
+
+def get_health_checker():
+    return health_checker
+
+def get_corpus_index():
+    return corpus_index
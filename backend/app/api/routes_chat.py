@@ -1,103 +1,245 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
-from api.dependencies import get_chat_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.dependencies import get_chat_service, doc_service, corpus_index, ingest_jobs, scan_flight, context_flight
 from core.models import ChatRequest, ChatResponse
 from core.config import settings
-from services.document_service import DocumentService
+from core import tracing
+from core.metrics import CONTEXT_BUILD_SECONDS
 from services.context_builder.production_builder import ProductionMCPContextBuilder
+from services.context_builder.retriever import HybridRetriever
+from core.bm25 import BM25Retriever
+from pathlib import Path
+import asyncio
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-doc_service = DocumentService()
+def build_context(req: ChatRequest) -> ProductionMCPContextBuilder:
+    """Collect uploads and indexed corpus documents into a context builder."""
+    with tracing.span("context.collect", CONTEXT_BUILD_SECONDS.labels("collect")):
+        return _build_context(req)
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest, service = Depends(get_chat_service),):
-    logger.info(f"Chat request: message='{req.message[:50]}...', documents={len(req.documents)}, include_project={req.include_project}, include_reference={req.include_reference}")
-    
-    builder = ProductionMCPContextBuilder(query=req.message)
+def _build_context(req: ChatRequest) -> ProductionMCPContextBuilder:
+    builder = ProductionMCPContextBuilder(
+        query=req.message,
+        max_tokens=settings.CONTEXT_MAX_TOKENS,
+        retriever=HybridRetriever(
+            BM25Retriever(corpus_index.bm25, top_k=settings.CONTEXT_MAX_CANDIDATES),
+            embedding=corpus_index.embedding
+        ),
+        global_selection=settings.CONTEXT_GLOBAL_SELECTION,
+        max_candidates=settings.CONTEXT_MAX_CANDIDATES,
+        token_counter=corpus_index.token_counter,
+        prefix_tokens=settings.CONTEXT_PREFIX_TOKENS
+    )
+
+    def add_uploads():
+        for doc in req.documents:
+            builder.add_document(
+                title=doc.name,
+                content=doc.content,
+                source="upload"
+            )
+        for document_id in req.document_ids:
+            d = ingest_jobs.document(document_id)
+            if d is None:
+                # PDF noch in Verarbeitung: nur so viele Seiten lesen wie nötig
+                pages = ingest_jobs.pages(document_id)
+                if pages is None:
+                    logger.warning(f"Unknown or unfinished upload {document_id}")
+                    continue
+                job = ingest_jobs.get(document_id)
+                read = builder.add_pages(
+                    title=job.filename,
+                    source="upload",
+                    pages=pages,
+                    patience=settings.CONTEXT_PAGE_PATIENCE
+                )
+                logger.info(f"Read {read} pages of pending upload {job.filename}")
+                continue
+            builder.add_document(
+                title=d.path.name,
+                source="upload",
+                chunks=d.chunk_view(),
+                chunk_tokens=d.chunk_tokens,
+                chunk_keys=d.keys
+            )
 
-    for doc in req.documents:
-        builder.add_document(
-            title=doc.name,
-            content=doc.content,
-            source="upload"
-        )
+    # Mit Präfix-Caching kommen die stabilen Korpus-Dokumente zuerst,
+    # damit ihre Zitat-IDs unabhängig von den Uploads gleich bleiben
+    if not settings.CONTEXT_PREFIX_TOKENS:
+        add_uploads()
 
     if req.include_project:
-        data = doc_service.scan_directory(settings.PROJECT_DIR, apply_version_filtering=True)
-        logger.info(f"Added {len(data['files'])} project files")
-        for f in data["files"]:
+        documents = corpus_index.get(settings.PROJECT_DIR).documents(max_files=settings.MAX_FILES_PER_DIRECTORY)
+        logger.info(f"Added {len(documents)} project files")
+        for d in documents:
             builder.add_document(
-                title=f["path"],
-                content=f["content"],
-                source=str(settings.PROJECT_DIR / f["path"])
+                title=d.relative_path,
+                source=str(d.path),
+                chunks=d.chunk_view(),
+                chunk_tokens=d.chunk_tokens,
+                chunk_keys=d.keys,
+                stable=True
             )
 
     if req.include_reference:
-        data = doc_service.scan_directory(settings.REFERENCE_DIR, apply_version_filtering=True)
-        logger.info(f"Added {len(data['files'])} reference files")
-        for f in data["files"]:
+        documents = corpus_index.get(settings.REFERENCE_DIR).documents(max_files=settings.MAX_FILES_PER_DIRECTORY)
+        logger.info(f"Added {len(documents)} reference files")
+        for d in documents:
             builder.add_document(
-                title=f["path"],
-                content=f["content"],
-                source=str(settings.REFERENCE_DIR / f["path"])
+                title=d.relative_path,
+                source=str(d.path),
+                chunks=d.chunk_view(),
+                chunk_tokens=d.chunk_tokens,
+                chunk_keys=d.keys,
+                stable=True
             )
 
+    if settings.CONTEXT_PREFIX_TOKENS:
+        add_uploads()
+
+    return builder
+
+async def coalesced_context(req: ChatRequest) -> ProductionMCPContextBuilder:
+    """Build the context once for concurrent identical requests on the same corpus state."""
+    key = (corpus_index.generation, hashlib.sha256(req.model_dump_json().encode("utf-8")).hexdigest())
+    return await context_flight.do(key, lambda: asyncio.to_thread(build_context, req))
+
+async def coalesced_listing(directory, limit=100, cursor=None):
+    return await scan_flight.do(
+        ("listing", str(directory), limit, cursor),
+        lambda: asyncio.to_thread(corpus_index.get(directory).listing, limit, cursor)
+    )
+
+DIRECTORIES = {"project": lambda: settings.PROJECT_DIR, "reference": lambda: settings.REFERENCE_DIR}
+
+def not_modified(request: Request, etag: str) -> bool:
+    return etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]
+
+async def directory_listing(request: Request, directory, limit: int, cursor: str | None):
+    """Metadata page of a directory; 304 if the client's ETag still matches."""
+    index = corpus_index.get(directory)
+    fingerprint = await asyncio.to_thread(index.fingerprint)
+    etag = 'W/"' + hashlib.sha1(f"{fingerprint}:{limit}:{cursor}".encode("utf-8")).hexdigest() + '"'
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        result = await coalesced_listing(directory, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(
+        {"path": str(directory), **result},
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest, service = Depends(get_chat_service),):
+    logger.info(f"Chat request: message='{req.message[:50]}...', documents={len(req.documents) + len(req.document_ids)}, include_project={req.include_project}, include_reference={req.include_reference}")
+    
+    # Index-Zugriff und Chunk-Scoring blockieren sonst den Event-Loop
+    builder = await coalesced_context(req)
+
     try:
         result = await service.chat(req.message, builder)
         logger.info(f"Chat response: model={result.get('model')}, usage={result.get('usage')}")
+        trace = tracing.current_trace()
+        if trace is not None and trace.debug:
+            result = {**result, "trace": trace.report()}
         return result
     except ValueError as e:
         logger.error(f"Validation error: {e}")
-        return {"response": f"Validation Error: {str(e)}", "model": "error", "usage": {"input_tokens": 0, "output_tokens": 0}}
+        return {"response": f"Validation Error: {str(e)}", "model": "error", "llm_type": "error", "usage": {"input_tokens": 0, "output_tokens": 0}}
     except Exception as e:
         logger.error(f"Unexpected error in chat: {e}", exc_info=True)
-        return {"response": f"Internal Error: {str(e)}", "model": "error", "usage": {"input_tokens": 0, "output_tokens": 0}}
+        return {"response": f"Internal Error: {str(e)}", "model": "error", "llm_type": "error", "usage": {"input_tokens": 0, "output_tokens": 0}}
 
-@router.get("/directories/project")
-async def get_project_directory():
-    """Get project directory contents with version filtering."""
-    result = doc_service.scan_directory(
-        settings.PROJECT_DIR,
-        apply_version_filtering=True  # Enable V/X filtering
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest, service = Depends(get_chat_service),):
+    """Chat with the answer streamed as Server-Sent Events."""
+    logger.info(f"Chat stream request: message='{req.message[:50]}...', documents={len(req.documents) + len(req.document_ids)}")
+
+    builder = await coalesced_context(req)
+
+    async def events():
+        try:
+            async for event in service.stream(req.message, builder):
+                if event["type"] == "done":
+                    trace = tracing.current_trace()
+                    if trace is not None and trace.debug:
+                        event["trace"] = trace.report()
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Unexpected error in chat stream: {e}", exc_info=True)
+            error = {"type": "error", "message": f"Internal Error: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    return {
-        "path": str(settings.PROJECT_DIR),
-        "files": result["files"],
-        "total_size": result["total_size"],
-        "file_count": result["file_count"]
-    }
+
+@router.get("/directories/project")
+async def get_project_directory(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+):
+    """Metadata of the project directory (after version filtering), paginated via ``next_cursor``."""
+    return await directory_listing(request, settings.PROJECT_DIR, limit, cursor)
 
 @router.get("/directories/reference")
-async def get_reference_directory():
-    """Get reference directory contents with version filtering."""
-    result = doc_service.scan_directory(
-        settings.REFERENCE_DIR,
-        apply_version_filtering=True  # Enable V/X filtering
+async def get_reference_directory(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+):
+    """Metadata of the reference directory (after version filtering), paginated via ``next_cursor``."""
+    return await directory_listing(request, settings.REFERENCE_DIR, limit, cursor)
+
+@router.get("/directories/{name}/files/{path:path}")
+async def get_directory_file(request: Request, name: str, path: str):
+    """Extracted text and metadata of one indexed file."""
+    if name not in DIRECTORIES:
+        raise HTTPException(status_code=404, detail="Unknown directory")
+    rel = Path(path)
+    if rel.is_absolute() or ".." in rel.parts:
+        raise HTTPException(status_code=400, detail="Invalid path")
+    document = await asyncio.to_thread(corpus_index.get(DIRECTORIES[name]()).get, str(rel))
+    if document is None:
+        raise HTTPException(status_code=404, detail="File not indexed")
+    etag = f'"{document.size:x}-{document.mtime_ns:x}"'
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(
+        {**document.metadata(), "content": document.content},
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
     )
-    return {
-        "path": str(settings.REFERENCE_DIR),
-        "files": result["files"],
-        "total_size": result["total_size"],
-        "file_count": result["file_count"]
-    }
+
+@router.get("/directories/{name}/versions/{document:path}")
+async def get_document_versions(name: str, document: str):
+    """Latest released/draft version and full version history of a document."""
+    if name not in DIRECTORIES:
+        raise HTTPException(status_code=404, detail="Unknown directory")
+    versions = await asyncio.to_thread(corpus_index.get(DIRECTORIES[name]()).versions, document)
+    if versions is None:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    return versions
 
 @router.post("/directories/refresh")
 async def refresh_directories():
-    """Manually refresh directory cache."""
-    project = doc_service.scan_directory(
-        settings.PROJECT_DIR,
-        apply_version_filtering=True
-    )
-    reference = doc_service.scan_directory(
-        settings.REFERENCE_DIR,
-        apply_version_filtering=True
-    )
+    """Reconcile the corpus index with the filesystem."""
+    changes = await scan_flight.do("refresh", lambda: asyncio.to_thread(corpus_index.refresh))
+    project = await coalesced_listing(settings.PROJECT_DIR)
+    reference = await coalesced_listing(settings.REFERENCE_DIR)
     
     return {
+        "changes": changes,
         "project": {
             "file_count": project["file_count"],
             "total_size": project["total_size"]
@@ -107,3 +249,11 @@ async def refresh_directories():
             "total_size": reference["total_size"]
         }
     }
+
+@router.get("/directories/cache")
+async def get_extraction_cache_stats():
+    """Get hit/miss counters of the extracted-text cache."""
+    if doc_service.extraction_cache is None:
+        return {"enabled": False}
+    stats = await asyncio.to_thread(doc_service.extraction_cache.stats)
+    return {"enabled": True, **stats}
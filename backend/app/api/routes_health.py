@@ -1,13 +1,28 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Response
+import httpx
 from core.config import settings
+from core.metrics import registry
+from api.dependencies import scan_flight, context_flight, llm_flight, get_health_checker, get_http_client
+from services.health import HealthChecker
 
 router = APIRouter()
 
 @router.get("/health")
-def health():
-    return {
-        "status": "healthy",
-        "ollama_available": True,  # Assuming Ollama is available
-        "claude_available": bool(settings.ANTHROPIC_API_KEY),
-        "default_llm": "local" if settings.USE_LOCAL_LLM else "cloud"
-    }
+async def health(
+    checker: HealthChecker = Depends(get_health_checker),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """Probe Ollama, Claude, embeddings and the corpus index; cached for HEALTH_CACHE_TTL."""
+    return await checker.check(client)
+
+@router.get("/health/coalescing")
+def coalescing():
+    """How much concurrent identical work was shared instead of repeated."""
+    return {f.name: f.stats() for f in (scan_flight, context_flight, llm_flight)}
+
+@router.get("/metrics")
+def metrics():
+    """Latencies, token counts and cache statistics in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(registry.render(), media_type=registry.CONTENT_TYPE)
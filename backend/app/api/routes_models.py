@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from api.dependencies import get_http_client
 from core.config import settings
 import httpx
 import logging
@@ -17,19 +18,21 @@ def models():
     }
 
 @router.post("/ollama/pull")
-async def pull_model(model_name: str = settings.LOCAL_MODEL):
+async def pull_model(
+    model_name: str = settings.LOCAL_MODEL,
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
     """Pull a model from Ollama registry"""
     try:
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
-                f"{settings.OLLAMA_HOST}/api/pull",
-                json={"name": model_name}
-            )
+        response = await client.post(
+            f"{settings.OLLAMA_HOST}/api/pull",
+            json={"name": model_name}
+        )
 
-            if response.status_code == 200:
-                return {"status": "success", "message": f"Model {model_name} pulled successfully"}
-            else:
-                raise HTTPException(status_code=response.status_code, detail=f"Failed to pull model: {response.text}")
+        if response.status_code == 200:
+            return {"status": "success", "message": f"Model {model_name} pulled successfully"}
+        else:
+            raise HTTPException(status_code=response.status_code, detail=f"Failed to pull model: {response.text}")
 
     except Exception as e:
         logger.error(f"Error pulling model {model_name}: {e}")
@@ -1,54 +1,83 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, File, Request, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
+from api.dependencies import doc_service, ingest_jobs
 from core.config import settings
-from services.file_extractor import FileExtractor
+import aiofiles
+import aiofiles.os
+import contextlib
 import logging
-import os
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-extractor = FileExtractor()
+# .doc wird beim Scannen gelistet, lässt sich aber nicht extrahieren
+UPLOAD_EXTENSIONS = doc_service.SUPPORTED_EXTENSIONS - {'.doc'}
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Upload and process a document"""
+def check_filename(filename: str):
+    suffix = Path(filename or "").suffix.lower()
+    if suffix == '.doc':
+        raise HTTPException(status_code=400, detail="DOC format not supported, use DOCX")
+    if suffix not in UPLOAD_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds upload limit of {settings.UPLOAD_MAX_BYTES} bytes"
+    )
+
+async def save_upload(file: UploadFile, path: Path) -> int:
+    """Stream an upload to disk in blocks, never holding the whole file in memory."""
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    size = 0
     try:
-        content = await file.read()
-        filename = file.filename.lower()
-
-        # Extract text based on file type
-        if filename.endswith('.pdf'):
-            text = extractor.extract_from_pdf(content)
-        elif filename.endswith('.docx'):
-            text = extractor.extract_from_docx(content)
-        elif filename.endswith('.doc'):
-            raise HTTPException(status_code=400, detail="DOC format not supported, use DOCX")
-        elif filename.endswith('.xlsx') or filename.endswith('.xls'):
-            text = extractor.extract_from_xlsx(content)
-        elif filename.endswith('.pptx'):
-            text = extractor.extract_from_pptx(content)
-        elif filename.endswith('.txt'):
-            text = content.decode('utf-8')
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format")
-
-        # Save file to upload directory
-        file_path = settings.UPLOAD_DIR / file.filename
-        settings.UPLOAD_DIR.mkdir(exist_ok=True)
-
-        with open(file_path, 'wb') as f:
-            f.write(content)
-
-        return {
-            "filename": file.filename,
-            "content": text,
-            "size": len(content),
-            "status": "processed"
-        }
+        async with aiofiles.open(path, 'wb') as out:
+            while block := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(block)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise too_large()
+                await out.write(block)
+    except BaseException:
+        # Aufräumen darf den eigentlichen Fehler nicht verdecken
+        with contextlib.suppress(OSError):
+            await aiofiles.os.remove(path)
+        with contextlib.suppress(OSError):
+            await aiofiles.os.rmdir(path.parent)
+        raise
+    return size
+
+@router.post("/upload", status_code=202)
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    """
+    Store an upload and start extracting and indexing it in the background.
+
+    Returns a job id; poll ``/upload/jobs/{job_id}`` for progress and the
+    document id to reference the upload in chat requests.
+    """
+    check_filename(file.filename)
+    # Offensichtlich zu große Anfragen ablehnen, bevor etwas geschrieben wird
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.UPLOAD_MAX_BYTES + 64 * 1024:
+        raise too_large()
 
+    document_id, path = ingest_jobs.new_path(file.filename)
+    try:
+        size = await save_upload(file, path)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing upload: {e}")
-        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error storing upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Error storing file: {str(e)}")
+
+    job = ingest_jobs.submit(document_id, path, size)
+    return JSONResponse(status_code=202, content=job.as_dict())
+
+@router.get("/upload/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Status of an ingest job, with the document handle once it is done."""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown upload job")
+    return job.as_dict()
@@ -0,0 +1,207 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from collections.abc import Set
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from core.retrieval import Retriever, RetrievalResult, content_hash
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    Postings, document lengths and document frequencies are maintained on
+    add/remove, so a query only touches the postings of its own terms.
+    Documents are identified by arbitrary hashable keys; adding a key that is
+    already indexed only increases its reference count, so identical chunks
+    shared by several files are indexed once.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # term -> {key: term frequency}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._refs: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._lengths
+
+    @property
+    def avg_length(self) -> float:
+        return self._total_length / len(self._lengths) if self._lengths else 0.0
+
+    def add(self, key: Hashable, text: str):
+        with self._lock:
+            if key in self._refs:
+                self._refs[key] += 1
+                return
+            self._refs[key] = 1
+            terms = tokenize(text)
+            for term, tf in Counter(terms).items():
+                self._postings.setdefault(term, {})[key] = tf
+            self._lengths[key] = len(terms)
+            self._total_length += len(terms)
+
+    def remove(self, key: Hashable, text: Optional[str] = None):
+        """
+        Release a document; it is dropped once no reference is left.
+
+        Passing the document text limits the work to its own terms;
+        without it all postings are checked.
+        """
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return
+            del self._refs[key]
+            terms = set(tokenize(text)) if text is not None else list(self._postings)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(key)
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        n = len(self._lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str, keys: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, float]:
+        """
+        Score all documents containing at least one query term.
+
+        Args:
+            query: Query text
+            keys: Optional subset of documents to consider
+
+        Returns:
+            Mapping of document key to BM25 score
+        """
+        allowed = keys if keys is None or isinstance(keys, Set) else set(keys)
+        scores: Dict[Hashable, float] = {}
+        with self._lock:
+            avg = self.avg_length or 1.0
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                if allowed is None:
+                    matches = postings.items()
+                elif len(allowed) < len(postings):
+                    # Kleine Teilmenge (z.B. Chunks eines Dokuments): direkt nachschlagen
+                    matches = ((key, postings[key]) for key in allowed if key in postings)
+                else:
+                    matches = ((key, tf) for key, tf in postings.items() if key in allowed)
+                for key, tf in matches:
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        keys: Optional[Iterable[Hashable]] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """Return the k best (key, score) pairs, best first."""
+        scores = self.scores(query, keys)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def score_text(self, query: str, text: str) -> float:
+        """Score a text that is not part of the index against the index statistics."""
+        tf = Counter(tokenize(text))
+        length = sum(tf.values())
+        avg = self.avg_length or max(length, 1)
+        score = 0.0
+        with self._lock:
+            for term in set(tokenize(query)):
+                if term not in tf:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / avg)
+                score += self.idf(term) * tf[term] * (self.k1 + 1) / (tf[term] + norm)
+        return score
+
+
+class BM25Retriever(Retriever):
+    """
+    BM25 retriever on a shared inverted index.
+
+    Chunks are indexed under their ``content_hash``, so the index does not
+    hold a second copy of every chunk. Indexed documents pass the keys
+    computed at ingest; texts are then only touched for the returned
+    results, and a query costs the postings of its terms rather than a pass
+    over the candidates' text. Unknown texts (e.g. uploads) are hashed and
+    scored against the index statistics without being added.
+
+    Args:
+        index: Shared index, typically filled at ingest time
+        top_k: Maximum number of matching results; None returns all matches
+        include_unmatched: Append documents without any query term (score 0)
+            in input order, like the linear LexicalRetriever did
+    """
+
+    def __init__(
+        self,
+        index: Optional[BM25Index] = None,
+        top_k: Optional[int] = None,
+        include_unmatched: bool = False,
+    ):
+        self.index = index if index is not None else BM25Index()
+        self.top_k = top_k
+        self.include_unmatched = include_unmatched
+
+    def retrieve(
+        self,
+        query: str,
+        documents: Sequence[str],
+        keys: Optional[Sequence[str]] = None,
+    ) -> List[RetrievalResult]:
+        if keys is None:
+            keys = [content_hash(d) for d in documents]
+        # Schlüssel -> erste Position; gleiche Chunks werden einmal bewertet
+        positions: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            positions.setdefault(key, i)
+
+        scores = self.index.scores(query, positions.keys()) if positions else {}
+        for key, i in positions.items():
+            if key not in self.index:
+                score = self.index.score_text(query, documents[i])
+                if score > 0:
+                    scores[key] = score
+
+        if self.top_k is None:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        else:
+            ranked = heapq.nlargest(self.top_k, scores.items(), key=lambda item: item[1])
+
+        results = [RetrievalResult(documents[positions[key]], score, "bm25", key) for key, score in ranked]
+
+        if self.include_unmatched:
+            results.extend(
+                RetrievalResult(documents[i], 0.0, "bm25", key)
+                for key, i in positions.items() if key not in scores
+            )
+        return results
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -10,17 +10,78 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None
     USE_LOCAL_LLM: bool = True
     LOCAL_MODEL: str = "llama3.2"
+    OLLAMA_KEEP_ALIVE: str = "30m"  # Modell (und KV-Cache) zwischen Anfragen geladen halten
     LLM_TIMEOUT: int = 600  # in seconds
     
+    # HTTP Connection Pool (Ollama, Modellverwaltung)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # in seconds
+    HTTP_CONNECT_TIMEOUT: float = 5.0  # in seconds
+    
     # Directory Configuration
     UPLOAD_DIR: Path = Path("/data/uploads")
     PROJECT_DIR: Path = Path("/data/project")
     REFERENCE_DIR: Path = Path("/data/reference")
     
+    # Uploads
+    UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Blockgröße beim Streamen auf Platte
+    UPLOAD_MAX_JOBS: int = 1000  # abgeschlossene Jobs, die abfragbar bleiben
+    PAGE_CACHE_MAX_BYTES: int = 128 * 1024 * 1024  # extrahierte PDF-Seiten im Speicher
+    
     # Processing Configuration
-    MAX_FILES_PER_DIRECTORY: int = 100
+    MAX_FILES_PER_DIRECTORY: int = 100  # Dateien pro Verzeichnis im Chat-Kontext
+    SCAN_IGNORE_PATTERNS: Optional[List[str]] = None  # .gitignore-Syntax; leer = .git/, node_modules/ usw.
+    SCAN_MAX_DEPTH: Optional[int] = None  # Verzeichnisebenen unterhalb der Wurzel
     ENABLE_VERSION_FILTERING: bool = True
     
+    # Extraction Cache
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_DIR: Path = Path("/data/cache")
+    EXTRACTION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    EXTRACTION_WORKERS: int = 0  # 0 = one per CPU core, 1 = serial
+    
+    # Context Building
+    CONTEXT_MAX_TOKENS: int = 8_000
+    CONTEXT_GLOBAL_SELECTION: bool = True
+    CONTEXT_MAX_CANDIDATES: int = 256
+    CONTEXT_PAGE_PATIENCE: int = 20  # Seiten ohne bessere Chunks, bevor ein PDF nicht weiter gelesen wird
+    CONTEXT_PREFIX_TOKENS: int = 0  # > 0: Projekt/Referenz als cachebarer Präfix
+    TOKEN_COUNTER: Optional[str] = None  # "heuristic" | "tiktoken:<encoding>"; leer = passend zum Modell
+    
+    # Embeddings (z.B. "nomic-embed-text"; leer = nur lexikalische Suche)
+    EMBEDDING_MODEL: Optional[str] = None
+    EMBEDDING_BATCH_SIZE: int = 32
+    VECTOR_INDEX_PATH: Optional[Path] = None  # z.B. /data/cache/vectors.npz
+    VECTOR_INDEX_IVF_THRESHOLD: int = 50_000  # ab hier approximative Suche (IVF)
+    VECTOR_INDEX_NPROBE: int = 8
+    
+    # Response Cache
+    RESPONSE_CACHE_BACKEND: str = "memory"  # memory | sqlite | off
+    RESPONSE_CACHE_DIR: Path = Path("/data/cache")
+    RESPONSE_CACHE_TTL: float = 3600.0  # in seconds
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Monitoring
+    METRICS_ENABLED: bool = True  # /metrics im Prometheus-Textformat
+    HEALTH_CACHE_TTL: float = 15.0  # in seconds; so oft werden die Backends höchstens geprüft
+    HEALTH_PROBE_TIMEOUT: float = 2.0  # in seconds
+    # Opt-in für Betreiber: Trace per X-Debug-Trace: 1|profile bzw. ?debug=trace|profile;
+    # legt Timings und Profiler-Frames offen, daher nicht für öffentliche Deployments
+    TRACE_DEBUG_ENABLED: bool = False
+    TRACE_PROFILE_INTERVAL: float = 0.005  # in seconds, Abtastintervall des Profilers
+    SLOW_REQUEST_SECONDS: float = 10.0  # Anfragen ab dieser Dauer mit Trace protokollieren; 0 = aus
+    SLOW_REQUEST_LOG: Optional[Path] = Path("/data/logs/slow_requests.log")  # leer = Anwendungslog
+    SLOW_REQUEST_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_REQUEST_LOG_BACKUPS: int = 5
+    
+    # Corpus Index
+    CORPUS_WATCH_MODE: str = "auto"  # auto | native | polling | off
+    CORPUS_POLL_INTERVAL: float = 10.0  # in seconds
+    CORPUS_STORE_ENABLED: bool = True  # mmap-Snapshot für schnellen Start und mehrere Worker
+    CORPUS_STORE_DIR: Path = Path("/data/cache/corpus")
+    
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,245 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import httpx
+import numpy as np
+
+from core.retrieval import Retriever, RetrievalResult, content_hash
+from core.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+EmbedFunction = Callable[[List[str]], List[List[float]]]
+
+
+class OllamaEmbedder:
+    """Embeds texts in one request per batch via Ollama's /api/embed."""
+
+    def __init__(self, host: str, model: str, timeout: float = 60.0):
+        self.model = model
+        self.client = httpx.Client(base_url=host, timeout=timeout)
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        r = self.client.post("/api/embed", json={"model": self.model, "input": texts})
+        r.raise_for_status()
+        return r.json()["embeddings"]
+
+    def close(self):
+        self.client.close()
+
+
+class EmbeddingRetriever(Retriever):
+    """
+    Dense retriever over chunk embeddings.
+
+    Chunk embeddings are cached by content hash and computed in batches, so
+    only new or changed chunks hit the embedding function. At query time
+    only the query itself is embedded, once: the builder scores every
+    document of a request with the same query, so query vectors are kept
+    in a small LRU cache. Vectors live in a ``VectorIndex`` (one float32
+    matrix); the score is the cosine similarity.
+
+    Below the IVF threshold the candidates of each call (the chunks of one
+    document) are scored exactly with one vectorized gather. With ``top_k``
+    set and an IVF-trained index, the whole index is searched once per
+    query and index version for the ``4 * top_k`` nearest chunks; each call
+    then only picks its own candidates from these hits. Candidates outside
+    the global hits get no embedding score, the same trade-off as the
+    global candidate limit of the context builder. At most ``top_k``
+    results are returned per call.
+
+    Indexed documents hold references on their chunk vectors (``retain``/
+    ``release``), like the BM25 index: chunks shared between files stay
+    as long as one file uses them. A vector whose last reference is
+    released is only deleted by ``prune``, so a changed file can release
+    its old chunks and keep the unchanged ones without re-embedding.
+
+    Args:
+        embed: Function mapping a batch of texts to vectors (Ollama or any
+            local model)
+        batch_size: Maximum number of texts per embed call
+        index: Existing vector index, e.g. loaded from disk
+        top_k: Result limit per call; enables approximate search once the
+            index is IVF-trained
+        query_cache_size: Number of query vectors kept
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        batch_size: int = 32,
+        index: Optional[VectorIndex] = None,
+        top_k: Optional[int] = None,
+        query_cache_size: int = 64,
+        **index_options,
+    ):
+        self.embed = embed
+        self.batch_size = batch_size
+        self.index = index
+        self.top_k = top_k
+        self._index_options = index_options
+        self._lock = threading.Lock()
+        self.embedded = 0
+        self.query_cache_size = query_cache_size
+        self._queries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # query -> (Index-Version, globale Treffer)
+        self._hits: "OrderedDict[str, Tuple[int, Dict[str, float]]]" = OrderedDict()
+        # content hash -> Anzahl indexierter Dokumente mit diesem Chunk
+        self._refs: Dict[str, int] = {}
+        # freigegebene Schlüssel, die prune löscht, sofern niemand sie wieder braucht
+        self._released: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.index) if self.index is not None else 0
+
+    def embed_documents(self, texts: Sequence[str], keys: Optional[List[str]] = None) -> List[str]:
+        """Embed texts missing from the index and return their content hashes."""
+        if keys is None:
+            keys = [content_hash(t) for t in texts]
+
+        with self._lock:
+            missing = {}
+            # Nur fehlende Texte anfassen: texts kann eine lazy Chunk-Ansicht sein
+            for i, key in enumerate(keys):
+                # Wieder gebraucht: nicht mehr löschen
+                self._released.discard(key)
+                if key not in missing and (self.index is None or key not in self.index):
+                    missing[key] = texts[i]
+
+        items = list(missing.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            vectors = np.asarray(self.embed([text for _, text in batch]), dtype=np.float32)
+            with self._lock:
+                if self.index is None:
+                    self.index = VectorIndex(vectors.shape[1], **self._index_options)
+                self.index.add([key for key, _ in batch], vectors)
+                self.embedded += len(batch)
+
+        return keys
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Vector of a query, embedded on first use and then served from the LRU cache."""
+        with self._lock:
+            vector = self._queries.get(query)
+            if vector is not None:
+                self._queries.move_to_end(query)
+                return vector
+        vector = np.asarray(self.embed([query])[0], dtype=np.float32)
+        with self._lock:
+            self._queries[query] = vector
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+    def retain(self, keys: List[str]):
+        """Add one reference per key, e.g. for the chunks of an indexed file."""
+        with self._lock:
+            for key in keys:
+                self._refs[key] = self._refs.get(key, 0) + 1
+                self._released.discard(key)
+
+    def release(self, keys: List[str]):
+        """Drop one reference per key; unreferenced vectors are deleted by ``prune``."""
+        with self._lock:
+            for key in keys:
+                count = self._refs.get(key)
+                if count is None:
+                    continue
+                if count > 1:
+                    self._refs[key] = count - 1
+                else:
+                    del self._refs[key]
+                    self._released.add(key)
+
+    def prune(self) -> int:
+        """Delete the vectors released since the last call and not used again; returns their number."""
+        with self._lock:
+            keys = [key for key in self._released if key not in self._refs]
+            self._released.clear()
+            if self.index is not None and keys:
+                self.index.delete(keys)
+            return len(keys)
+
+    def retrieve(self, query: str, documents: Sequence[str], keys: Optional[List[str]] = None) -> List[RetrievalResult]:
+        if not documents:
+            return []
+        query_vector = self.embed_query(query)
+        keys = self.embed_documents(documents, keys)
+
+        if self.top_k and self.index.is_trained:
+            hits = self._global_hits(query, query_vector)
+            found = [(i, hits[key]) for i, key in enumerate(keys) if key in hits]
+            found.sort(key=lambda item: item[1], reverse=True)
+            return [
+                RetrievalResult(documents[i], score, "embedding", keys[i])
+                for i, score in found[:self.top_k]
+            ]
+
+        scores = self.index.scores(query_vector, keys)
+        if self.top_k and len(keys) > self.top_k:
+            top = np.argpartition(-scores, self.top_k - 1)[:self.top_k]
+        else:
+            top = np.arange(len(keys))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            RetrievalResult(documents[i], float(scores[i]), "embedding", keys[i])
+            for i in top.tolist()
+        ]
+
+    def _global_hits(self, query: str, query_vector: np.ndarray) -> Dict[str, float]:
+        """Nearest chunks of the whole index, searched once per query and index version."""
+        version = self.index.version
+        with self._lock:
+            cached = self._hits.get(query)
+            if cached is not None and cached[0] == version:
+                self._hits.move_to_end(query)
+                return cached[1]
+        # Großzügig anfragen: die Treffer verteilen sich auf alle Dokumente der Anfrage
+        hits = dict(self.index.search(query_vector, k=4 * self.top_k))
+        with self._lock:
+            self._hits[query] = (version, hits)
+            while len(self._hits) > self.query_cache_size:
+                self._hits.popitem(last=False)
+        return hits
+
+    def save(self, path: Path):
+        with self._lock:
+            if self.index is not None:
+                self.index.save(path)
+
+    def load(self, path: Path) -> bool:
+        """Load a saved vector index; returns False if there is none."""
+        path = Path(path)
+        if not path.exists():
+            return False
+        index = VectorIndex.load(path, **self._index_options)
+        with self._lock:
+            self.index = index
+        logger.info(f"Loaded {len(index)} chunk vectors from {path}")
+        return True
+
+
+def create_embedding_retriever(
+    host: str,
+    model: Optional[str],
+    batch_size: int,
+    index_path: Optional[Path] = None,
+    top_k: Optional[int] = None,
+    **index_options,
+) -> Optional[EmbeddingRetriever]:
+    """Embedding retriever on Ollama, or None if no embedding model is configured."""
+    if not model:
+        return None
+    retriever = EmbeddingRetriever(
+        OllamaEmbedder(host, model), batch_size=batch_size, top_k=top_k, **index_options
+    )
+    if index_path is not None:
+        try:
+            retriever.load(index_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable vector index {index_path}: {e}")
+    return retriever
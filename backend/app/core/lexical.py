@@ -1,7 +1,7 @@
 from core.retrieval import Retriever, RetrievalResult
 
 class LexicalRetriever(Retriever):
-    def retrieve(self, query: str, documents: list[str]):
+    def retrieve(self, query: str, documents: list[str], keys=None):
         q = set(query.lower().split())
         results = []
 
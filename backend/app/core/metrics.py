@@ -0,0 +1,324 @@
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Sekunden; von schnellen Index-Zugriffen bis zu langen LLM-Antworten
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric(ABC):
+    """Base class of everything the registry renders."""
+
+    TYPE = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """(sample name, labels, value) triples at scrape time."""
+        ...
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class LabeledMetric(Metric):
+    """Metric holding one child per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help)
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.label_names)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    def _default(self):
+        return self.labels() if not self.label_names else None
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class Counter(LabeledMetric):
+    TYPE = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            yield self.name, dict(zip(self.label_names, values)), child.value
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    @contextmanager
+    def track(self):
+        """Count the duration of a block as one in-progress unit."""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(LabeledMetric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Histogram(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            labels = dict(zip(self.label_names, values))
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """Metric whose samples are read at scrape time, e.g. from existing stats()."""
+
+    def __init__(self, name: str, help: str, type: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        super().__init__(name, help)
+        self.TYPE = type
+        self._collect = collect
+
+    def samples(self):
+        for labels, value in self._collect():
+            yield self.name, labels, value
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format (0.0.4)."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, type: str, collect) -> CallbackMetric:
+        """Register (or replace) a metric read from ``collect`` at scrape time."""
+        metric = CallbackMetric(name, help, type, collect)
+        self._metrics[name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # Eine fehlerhafte Quelle darf den Scrape nicht verhindern
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+# Pipeline-Stufen
+SCAN_SECONDS = registry.histogram(
+    "mcp_directory_scan_seconds", "Time to walk and reconcile a document directory", ["directory"]
+)
+EXTRACTION_SECONDS = registry.histogram(
+    "mcp_extraction_seconds", "Time to extract the text of one file", ["file_type"]
+)
+CHUNKING_SECONDS = registry.histogram(
+    "mcp_chunking_seconds", "Time to chunk one document", ["stage"]
+)
+RETRIEVAL_SECONDS = registry.histogram(
+    "mcp_retrieval_seconds", "Time to score the chunks of one document against the query"
+)
+CONTEXT_BUILD_SECONDS = registry.histogram(
+    "mcp_context_build_seconds", "Time to build the context of a chat request", ["stage"]
+)
+
+# LLM
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = registry.histogram(
+    "mcp_llm_time_to_first_token_seconds", "Time until the first streamed token", ["llm_type"]
+)
+LLM_SECONDS = registry.histogram(
+    "mcp_llm_seconds", "Total time of an LLM call", ["llm_type", "mode"]
+)
+LLM_TOKENS = registry.counter(
+    "mcp_llm_tokens_total", "Tokens reported by the LLM", ["llm_type", "direction"]
+)
+
+# HTTP
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "mcp_http_requests_in_flight", "Requests currently being served"
+)
+REQUEST_SECONDS = registry.histogram(
+    "mcp_http_request_seconds", "Time to serve a request until the response is complete", ["method", "route", "status"]
+)
+
+
+def file_type(filename: str) -> str:
+    """Label value for a file: its lower-case suffix without the dot."""
+    dot = filename.rfind(".")
+    return filename[dot + 1:].lower() if dot > 0 else "none"
+
+
+def observe_llm(llm_type: Optional[str], mode: str, seconds: float, usage: Optional[Dict]):
+    """Record duration and token usage of one LLM call."""
+    llm_type = llm_type or "unknown"
+    LLM_SECONDS.labels(llm_type, mode).observe(seconds)
+    for direction in ("input", "output"):
+        LLM_TOKENS.labels(llm_type, direction).inc((usage or {}).get(f"{direction}_tokens") or 0)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting in-flight requests and timing them until the body is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Routen-Template statt Pfad, damit Datei-Pfade keine Label-Explosion erzeugen
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(scope["method"], path, status[0]).observe(time.perf_counter() - start)
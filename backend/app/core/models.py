@@ -8,6 +8,7 @@ class Document(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     documents: List[Document] = []
+    document_ids: List[str] = []  # Uploads aus /upload
     use_local: Optional[bool] = None
     include_project: bool = True
     include_reference: bool = True
@@ -15,9 +16,14 @@ class ChatRequest(BaseModel):
 class Usage(BaseModel):
     input_tokens: int
     output_tokens: int
+    # Prompt-Caching (nur Claude meldet diese Werte)
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
 
 class ChatResponse(BaseModel):
     response: str
     model: str
     llm_type: str
     usage: Usage
+    cached: bool = False
+    trace: Optional[Dict[str, Any]] = None  # nur mit X-Debug-Trace bzw. ?debug=trace|profile
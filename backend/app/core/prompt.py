@@ -0,0 +1,21 @@
+class SystemPrompt(str):
+    """
+    System prompt with a stable, cacheable prefix.
+
+    Behaves like the full prompt string, so clients without prompt caching
+    use it unchanged. The first ``prefix_length`` characters are identical
+    across requests as long as the underlying documents do not change.
+    """
+
+    def __new__(cls, prefix: str, suffix: str = ""):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix_length = len(prefix)
+        return prompt
+
+    @property
+    def prefix(self) -> str:
+        return str.__str__(self)[:self.prefix_length]
+
+    @property
+    def suffix(self) -> str:
+        return str.__str__(self)[self.prefix_length:]
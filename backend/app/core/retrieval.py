@@ -1,13 +1,34 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Sequence
+
+def content_hash(text: str) -> str:
+    """Stable key of a chunk text, shared by the lexical and vector indexes."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
 class RetrievalResult:
-    def __init__(self, text: str, score: float, source: str):
+    def __init__(self, text: str, score: float, source: str, key: Optional[str] = None):
         self.text = text
         self.score = score
         self.source = source
+        # content_hash des Textes, falls der Retriever ihn kennt
+        self.key = key
 
 class Retriever(ABC):
     @abstractmethod
-    def retrieve(self, query: str, documents: List[str]) -> List[RetrievalResult]:
+    def retrieve(
+        self,
+        query: str,
+        documents: Sequence[str],
+        keys: Optional[Sequence[str]] = None,
+    ) -> List[RetrievalResult]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: Query text
+            documents: Candidate texts
+            keys: ``content_hash`` of each document if already known (e.g.
+                computed at ingest); retrievers that need it hash otherwise
+        """
         ...
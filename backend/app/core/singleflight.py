@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and share its result (or exception).
+    The task is shielded, so a disconnecting caller does not cancel the
+    work for the others. Results are shared objects and must not be
+    mutated by callers.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+            self.executions += 1
+        else:
+            logger.debug(f"{self.name}: joined in-flight call")
+        return await asyncio.shield(task)
+
+    @property
+    def deduplicated(self) -> int:
+        return self.calls - self.executions
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._inflight),
+        }
@@ -1,19 +1,29 @@
-import math
+from core.token_counter import HeuristicCounter, TokenCounter
 
 class TokenBudget:
     """
-    Grobe, aber stabile Token-Schätzung (LLM-agnostisch)
+    Token-Budget für den Kontext.
+
+    Texte werden mit dem Token-Zähler des Modells gezählt. Für vorab
+    gezählte Chunks gibt es ``can_add_tokens``/``add_tokens``, die nur noch
+    mit ganzen Zahlen rechnen.
     """
-    def __init__(self, max_tokens: int):
+    def __init__(self, max_tokens: int, counter: TokenCounter | None = None):
         self.max_tokens = max_tokens
+        self.counter = counter or HeuristicCounter()
         self.used = 0
 
     def estimate(self, text: str) -> int:
-        # ~4 chars pro Token (bewährt, konservativ)
-        return math.ceil(len(text) / 4)
+        return self.counter.count(text)
 
     def can_add(self, text: str) -> bool:
-        return self.used + self.estimate(text) <= self.max_tokens
+        return self.can_add_tokens(self.estimate(text))
 
     def add(self, text: str):
-        self.used += self.estimate(text)
+        self.add_tokens(self.estimate(text))
+
+    def can_add_tokens(self, tokens: int) -> bool:
+        return self.used + tokens <= self.max_tokens
+
+    def add_tokens(self, tokens: int):
+        self.used += tokens
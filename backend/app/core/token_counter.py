@@ -0,0 +1,141 @@
+import logging
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Wörter, Zahlen und einzelne Satz-/Sonderzeichen
+_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+
+
+class TokenCounter(ABC):
+    """Counts tokens of a text for one model family."""
+
+    name = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        ...
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self.count(t) for t in texts]
+
+
+class HeuristicCounter(TokenCounter):
+    """
+    Fast, dependency-free estimate close to BPE tokenizers.
+
+    Unlike a flat chars/4 ratio it charges every punctuation character as
+    one token (source code) and splits long words into pieces of
+    ``chars_per_token`` characters (German compounds). Digits are counted
+    in groups of three, as most BPE vocabularies do.
+    """
+
+    name = "heuristic"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        tokens = 0
+        for piece in _PIECES.findall(text):
+            if piece.isdigit():
+                tokens += math.ceil(len(piece) / 3)
+            elif piece.isalpha():
+                tokens += math.ceil(len(piece) / self.chars_per_token)
+            else:
+                tokens += 1
+        return tokens
+
+
+class TiktokenCounter(TokenCounter):
+    """
+    Exact counts with a tiktoken encoding.
+
+    tiktoken is listed in requirements.txt. It downloads an encoding on
+    first use unless it is already in ``TIKTOKEN_CACHE_DIR`` (the Docker
+    image prefetches them); without either, ``get_token_counter`` falls
+    back to the heuristic.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+
+        self.name = f"tiktoken:{encoding}"
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode_ordinary(text))
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in self._encoding.encode_ordinary_batch(texts)]
+
+
+# Modell-Präfix -> Fabrik; spätere Einträge haben Vorrang
+_REGISTRY: List[tuple] = []
+_CACHE: Dict[str, TokenCounter] = {}
+_LOCK = threading.Lock()
+
+
+def register_token_counter(prefix: str, factory: Callable[[], TokenCounter]):
+    """Register a counter factory for all models whose name starts with ``prefix``."""
+    with _LOCK:
+        _REGISTRY.insert(0, (prefix.lower(), factory))
+        _CACHE.clear()
+
+
+def get_token_counter(model: Optional[str] = None, spec: Optional[str] = None) -> TokenCounter:
+    """
+    Return the (shared) token counter for a model.
+
+    Args:
+        model: Model name, matched against the registered prefixes
+        spec: Explicit counter, "heuristic" or "tiktoken:<encoding>";
+            overrides the model lookup
+
+    Returns:
+        Token counter; the heuristic one if the preferred counter is not
+        available
+    """
+    key = f"{spec or ''}|{model or ''}"
+    with _LOCK:
+        counter = _CACHE.get(key)
+        if counter is not None:
+            return counter
+
+        factory = _factory_for_spec(spec) if spec else _factory_for_model(model or "")
+        try:
+            counter = factory()
+        except Exception as e:
+            logger.warning(f"Token counter for {spec or model} unavailable ({e}), using heuristic")
+            counter = HeuristicCounter()
+
+        _CACHE[key] = counter
+        return counter
+
+
+def _factory_for_spec(spec: str) -> Callable[[], TokenCounter]:
+    kind, _, arg = spec.partition(":")
+    if kind == "tiktoken":
+        return lambda: TiktokenCounter(arg or "cl100k_base")
+    if kind == "heuristic":
+        return lambda: HeuristicCounter(float(arg) if arg else 4.0)
+    raise ValueError(f"Unknown token counter: {spec}")
+
+
+def _factory_for_model(model: str) -> Callable[[], TokenCounter]:
+    model = model.lower()
+    for prefix, factory in _REGISTRY:
+        if model.startswith(prefix):
+            return factory
+    return HeuristicCounter
+
+
+# Claude-Tokenizer ist nicht lokal verfügbar; cl100k liegt deutlich näher als chars/4
+register_token_counter("claude", lambda: TiktokenCounter("cl100k_base"))
+register_token_counter("gpt-4", lambda: TiktokenCounter("cl100k_base"))
+register_token_counter("gpt-4o", lambda: TiktokenCounter("o200k_base"))
+register_token_counter("llama3", lambda: TiktokenCounter("cl100k_base"))
@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = b"x-debug-trace"
+TRACE_QUERY = "debug"
+# Werte, mit denen Header bzw. Query-Parameter die Ausgabe aktivieren
+TRACE_MODES = {"1": "trace", "true": "trace", "trace": "trace", "profile": "profile"}
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of all other threads.
+
+    A background thread reads ``sys._current_frames()`` every ``interval``
+    seconds, so the request itself runs unmodified and the overhead does not
+    depend on how many functions it calls. The event loop thread and the
+    worker threads of ``asyncio.to_thread`` are sampled alike; threads that
+    are idle (waiting on a lock, queue or selector) are skipped. Concurrent
+    requests show up in the samples as well, so profiles are most useful on
+    an otherwise quiet instance.
+    """
+
+    # Blattfunktionen, in denen ein Thread nur wartet
+    IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+    IDLE_FUNCTIONS = {"_worker", "select", "poll", "wait", "sleep"}
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: _Counter = _Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._duration = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="trace-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._duration = time.perf_counter() - self._started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if code.co_filename.endswith(self.IDLE_FILES) or code.co_name in self.IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def result(self, top: int = 30) -> Dict:
+        """
+        Summary of the samples.
+
+        ``stacks`` uses the folded format (root first, ``;``-separated) read
+        by flame graph tools; ``functions`` lists the functions with the
+        most samples on top of the stack (self) and anywhere in it (total).
+        """
+        own: _Counter = _Counter()
+        total: _Counter = _Counter()
+        for stack, n in self._stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += n
+            for f in set(frames):
+                total[f] += n
+        return {
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(self._duration * 1000, 1),
+            "samples": self.samples,
+            "functions": [
+                {"function": f, "self": own[f], "total": n} for f, n in total.most_common(top)
+            ],
+            "stacks": [{"stack": s, "samples": n} for s, n in self._stacks.most_common(top)],
+        }
+
+
+class Trace:
+    """
+    Timings and counts collected while serving one request.
+
+    Stages are aggregated by name (number of calls and total seconds), so a
+    stage that runs once per document shows up as one entry. Updates may
+    come from worker threads.
+    """
+
+    def __init__(self, method: str, path: str, mode: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        # None = nur intern (Slow-Request-Log), "trace" bzw. "profile" = an den Client
+        self.mode = mode
+        self.started_at = time.time()
+        self.status: Optional[int] = None
+        self.duration: Optional[float] = None
+        self.stages: Dict[str, List[float]] = {}
+        self.counts: Dict[str, float] = {}
+        self.attributes: Dict[str, object] = {}
+        self.profiler: Optional[SamplingProfiler] = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @property
+    def debug(self) -> bool:
+        return self.mode is not None
+
+    def add_stage(self, name: str, seconds: float):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def annotate(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def start_profiler(self, interval: float):
+        self.profiler = SamplingProfiler(interval)
+        self.profiler.start()
+
+    def finish(self, status: Optional[int] = None):
+        if self.profiler is not None:
+            self.profiler.stop()
+        if status is not None:
+            self.status = status
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self._start
+
+    def report(self) -> Dict:
+        """The trace as a JSON-serializable dict; stops a running profiler."""
+        if self.profiler is not None:
+            self.profiler.stop()
+        with self._lock:
+            result = {
+                "id": self.id,
+                "method": self.method,
+                "path": self.path,
+                "started_at": self.started_at,
+                "duration_ms": round(self.elapsed() * 1000, 1),
+                "stages": {
+                    name: {"calls": calls, "ms": round(seconds * 1000, 1)}
+                    for name, (calls, seconds) in self.stages.items()
+                },
+                "counts": dict(self.counts),
+                "attributes": dict(self.attributes),
+            }
+        if self.status is not None:
+            result["status"] = self.status
+        if self.profiler is not None:
+            result["profile"] = self.profiler.result()
+        return result
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the request being served, None outside of requests."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, histogram=None):
+    """
+    Time a block as stage ``name`` of the current trace.
+
+    Args:
+        name: Stage name in the trace
+        histogram: Optional histogram (child) that receives the same duration
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, histogram)
+
+
+def record(name: str, seconds: float, histogram=None):
+    """Add an already measured duration to the current trace (and histogram)."""
+    if histogram is not None:
+        histogram.observe(seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.add_stage(name, seconds)
+
+
+def count(name: str, n: float = 1):
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def annotate(**attributes):
+    trace = _current.get()
+    if trace is not None:
+        trace.annotate(**attributes)
+
+
+def requested_mode(scope) -> Optional[str]:
+    """Debug mode asked for by ``X-Debug-Trace`` or ``?debug=``, None if none."""
+    for key, value in scope.get("headers", ()):
+        if key == TRACE_HEADER:
+            return TRACE_MODES.get(value.decode("latin-1").strip().lower())
+    query = scope.get("query_string", b"")
+    if query and TRACE_QUERY.encode() in query:
+        values = parse_qs(query.decode("latin-1")).get(TRACE_QUERY)
+        if values:
+            return TRACE_MODES.get(values[-1].strip().lower())
+    return None
+
+
+def create_slow_request_logger(path: Path, max_bytes: int, backups: int) -> Optional[logging.Logger]:
+    """Logger writing one JSON line per slow request into a rotating file."""
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"Slow request log {path} unavailable, using the application log: {e}")
+        return None
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_logger = logging.getLogger(f"{__name__}.slow_requests")
+    slow_logger.handlers = [handler]
+    slow_logger.setLevel(logging.INFO)
+    slow_logger.propagate = False
+    return slow_logger
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware attaching a ``Trace`` to every HTTP request.
+
+    With ``debug_enabled``, routes return the trace to the client when
+    debug output was requested (``X-Debug-Trace: 1|profile`` or
+    ``?debug=trace|profile``); with ``profile`` a sampling profiler runs
+    for the duration of the request. Debug output exposes timings and
+    profiler frames, so it is off unless the operator enables it.
+    Requests taking at least ``slow_threshold`` seconds are written with
+    their full trace to the slow request log, whether debug output was
+    requested or not.
+    """
+
+    def __init__(
+        self,
+        app,
+        debug_enabled: bool = False,
+        profile_interval: float = 0.005,
+        slow_threshold: float = 0.0,
+        slow_log: Optional[Path] = None,
+        slow_log_max_bytes: int = 10 * 1024 * 1024,
+        slow_log_backups: int = 5,
+    ):
+        self.app = app
+        self.debug_enabled = debug_enabled
+        self.profile_interval = profile_interval
+        self.slow_threshold = slow_threshold
+        self.slow_log = slow_log
+        self.slow_log_max_bytes = slow_log_max_bytes
+        self.slow_log_backups = slow_log_backups
+        self._slow_logger: Optional[logging.Logger] = None
+        self._slow_logger_ready = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = requested_mode(scope) if self.debug_enabled else None
+        trace = Trace(scope["method"], scope["path"], mode)
+        if mode == "profile":
+            trace.start_profiler(self.profile_interval)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if trace.debug:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.id.encode())]
+            await send(message)
+
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            trace.finish(status[0])
+            if self.slow_threshold and trace.duration >= self.slow_threshold:
+                self._log_slow(trace)
+
+    def _log_slow(self, trace: Trace):
+        if not self._slow_logger_ready:
+            # Erst beim ersten langsamen Request anlegen, damit der Import nichts auf die Platte schreibt
+            self._slow_logger_ready = True
+            if self.slow_log:
+                self._slow_logger = create_slow_request_logger(
+                    self.slow_log, self.slow_log_max_bytes, self.slow_log_backups
+                )
+        line = json.dumps(trace.report(), default=str)
+        if self._slow_logger is not None:
+            self._slow_logger.info(line)
+        else:
+            logger.warning(f"Slow request: {line}")
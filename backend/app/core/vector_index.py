@@ -0,0 +1,264 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """
+    Vector index on a contiguous float32 matrix.
+
+    Vectors are stored L2-normalized, so the inner product is the cosine
+    similarity. Small indexes are searched exactly with one matrix-vector
+    product and ``argpartition``. Above ``ivf_threshold`` vectors an IVF
+    index (spherical k-means coarse quantizer) is trained and only the
+    ``nprobe`` closest lists are scanned.
+
+    Deletes are tombstones; the matrix is compacted once a quarter of the
+    rows are dead. ``save``/``load`` use a single ``.npz`` file and require
+    string keys.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nprobe: int = 8,
+        ivf_threshold: int = 50_000,
+        nlist: Optional[int] = None,
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ivf_threshold = ivf_threshold
+        self.nlist = nlist
+
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._keys: List[Optional[Hashable]] = []
+        self._rows: Dict[Hashable, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._dead = 0
+        # Zählt Änderungen, damit Suchergebnisse gecacht werden können
+        self.version = 0
+
+        # IVF
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, keys: Sequence[Hashable], vectors) -> None:
+        """Add or replace vectors."""
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            self.delete(k for k in keys if k in self._rows)
+            self._reserve(self._size + len(keys))
+            start = self._size
+            end = start + len(keys)
+            self._matrix[start:end] = vectors
+            self._alive[start:end] = True
+            for offset, key in enumerate(keys):
+                self._keys.append(key)
+                self._rows[key] = start + offset
+            self._size = end
+            self.version += 1
+
+            if self.is_trained:
+                self._assign_rows(np.arange(start, end))
+                if len(self._rows) > 2 * self._trained_size:
+                    self.train()
+            elif len(self._rows) >= self.ivf_threshold:
+                self.train()
+
+    def delete(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in list(keys):
+                row = self._rows.pop(key, None)
+                if row is None:
+                    continue
+                self._alive[row] = False
+                self._keys[row] = None
+                self._dead += 1
+                self.version += 1
+            if self._dead and self._dead * 4 > self._size:
+                self._compact()
+
+    def get(self, keys: Sequence[Hashable]) -> np.ndarray:
+        with self._lock:
+            return self._matrix[[self._rows[k] for k in keys]]
+
+    def scores(self, query, keys: Sequence[Hashable]) -> np.ndarray:
+        """Cosine similarity of the query to the given keys (vectorized gather)."""
+        q = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            rows = np.fromiter((self._rows[k] for k in keys), dtype=np.int64, count=len(keys))
+            return self._matrix[rows] @ q
+
+    def search(self, query, k: int = 10, exact: Optional[bool] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Return the k most similar (key, score) pairs, best first.
+
+        Args:
+            query: Query vector
+            k: Number of results
+            exact: Force exact (True) or IVF (False) search; default is IVF
+                whenever the index is trained
+        """
+        q = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            use_ivf = self.is_trained if exact is None else not exact and self.is_trained
+            if use_ivf:
+                rows = self._probe_rows(q)
+            else:
+                rows = np.flatnonzero(self._alive[:self._size])
+            if rows.size == 0:
+                return []
+
+            scores = self._matrix[rows] @ q
+            k = min(k, rows.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._keys[rows[i]], float(scores[i])) for i in top]
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Train the IVF coarse quantizer on the current vectors."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if rows.size == 0:
+                return
+            nlist = self.nlist or max(1, int(np.sqrt(rows.size)))
+            nlist = min(nlist, rows.size)
+
+            rng = np.random.default_rng(seed)
+            sample = rows if rows.size <= nlist * 64 else rng.choice(rows, nlist * 64, replace=False)
+            data = self._matrix[sample]
+            centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(data @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = data[labels == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = self._normalize(centroids)
+
+            self._centroids = centroids
+            self._assign = np.full(len(self._matrix), -1, dtype=np.int32)
+            self._lists = [[] for _ in range(nlist)]
+            self._list_arrays = {}
+            self._assign_rows(rows)
+            self._trained_size = rows.size
+            self.version += 1
+            logger.info(f"Trained IVF index: {rows.size} vectors, {nlist} lists")
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            keys = np.array([self._keys[r] for r in rows], dtype=str)
+            arrays = {"vectors": self._matrix[rows], "keys": keys}
+            if self.is_trained:
+                arrays["centroids"] = self._centroids
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npz")
+            np.savez(tmp, **arrays)
+            tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "VectorIndex":
+        with np.load(Path(path), allow_pickle=False) as data:
+            vectors = data["vectors"]
+            index = cls(vectors.shape[1], **kwargs)
+            index._add_raw(list(data["keys"]), vectors)
+            if "centroids" in data:
+                index._centroids = data["centroids"]
+                index._assign = np.full(len(index._matrix), -1, dtype=np.int32)
+                index._lists = [[] for _ in range(len(index._centroids))]
+                index._assign_rows(np.arange(index._size))
+                index._trained_size = index._size
+        return index
+
+    def _add_raw(self, keys: List[Hashable], vectors: np.ndarray):
+        # Füllt ein leeres Index-Objekt; die Vektoren sind bereits normalisiert
+        self._reserve(len(keys))
+        self._matrix[:len(keys)] = vectors
+        self._alive[:len(keys)] = True
+        self._keys = [str(k) for k in keys]
+        self._rows = {k: i for i, k in enumerate(self._keys)}
+        self._size = len(keys)
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._matrix):
+            return
+        new_capacity = max(capacity, 2 * len(self._matrix), 1024)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._matrix, self._alive = matrix, alive
+        if self.is_trained:
+            assign = np.full(new_capacity, -1, dtype=np.int32)
+            assign[:self._size] = self._assign[:self._size]
+            self._assign = assign
+
+    def _compact(self):
+        rows = np.flatnonzero(self._alive[:self._size])
+        keys = [self._keys[r] for r in rows]
+        vectors = self._matrix[rows].copy()
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._dead = 0
+        if keys:
+            self._add_raw(keys, vectors)
+        else:
+            self._keys, self._rows = [], {}
+        if self.is_trained:
+            self._assign = np.full(len(self._matrix), -1, dtype=np.int32)
+            self._lists = [[] for _ in range(len(self._centroids))]
+            self._list_arrays = {}
+            self._assign_rows(np.arange(self._size))
+
+    def _assign_rows(self, rows: np.ndarray):
+        if rows.size == 0:
+            return
+        labels = np.argmax(self._matrix[rows] @ self._centroids.T, axis=1)
+        self._assign[rows] = labels
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self._lists[label].append(row)
+            self._list_arrays.pop(label, None)
+
+    def _probe_rows(self, q: np.ndarray) -> np.ndarray:
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ q), nprobe - 1)[:nprobe]
+        parts = []
+        for label in probes.tolist():
+            arr = self._list_arrays.get(label)
+            if arr is None:
+                arr = np.asarray(self._lists[label], dtype=np.int64)
+                self._list_arrays[label] = arr
+            parts.append(arr)
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        # Gelöschte Zeilen bleiben in den Listen bis zur nächsten Kompaktierung
+        return rows[self._alive[rows]]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
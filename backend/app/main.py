@@ -1,12 +1,56 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from api.routes_chat import router as chat_router
 from api.routes_health import router as health_router
 from api.routes_models import router as models_router
 from api.routes_upload import router as upload_router
+from api.dependencies import corpus_index, doc_service, embedding_retriever, ingest_jobs, create_http_client, create_llm
 from core.config import settings
+from core.metrics import MetricsMiddleware
+from core.tracing import TraceMiddleware
 
-app = FastAPI(title="LLM MCP Sandbox API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Korpus einmalig indexieren, danach hält der Watcher ihn aktuell
+    await asyncio.to_thread(
+        corpus_index.start,
+        watch_mode=settings.CORPUS_WATCH_MODE,
+        poll_interval=settings.CORPUS_POLL_INTERVAL,
+    )
+    # Ein HTTP-Pool und ein LLM-Client für die gesamte Laufzeit
+    app.state.http_client = create_http_client()
+    app.state.llm = create_llm(app.state.http_client)
+    yield
+    await ingest_jobs.close()
+    await app.state.llm.aclose()
+    await app.state.http_client.aclose()
+    corpus_index.stop()
+    doc_service.close()
+    # Chunk-Vektoren sichern, damit der nächste Start nicht neu embedden muss
+    if embedding_retriever is not None and settings.VECTOR_INDEX_PATH:
+        await asyncio.to_thread(embedding_retriever.save, settings.VECTOR_INDEX_PATH)
+
+app = FastAPI(title="LLM MCP Sandbox API", lifespan=lifespan)
+
+# Listings und Dateiinhalte komprimiert ausliefern (SSE wird nicht komprimiert)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Laufende Anfragen und Antwortzeiten pro Route für /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Stufen-Timings pro Anfrage: auf Wunsch in der Antwort, bei langsamen Anfragen im Slow-Request-Log
+app.add_middleware(
+    TraceMiddleware,
+    debug_enabled=settings.TRACE_DEBUG_ENABLED,
+    profile_interval=settings.TRACE_PROFILE_INTERVAL,
+    slow_threshold=settings.SLOW_REQUEST_SECONDS,
+    slow_log=settings.SLOW_REQUEST_LOG,
+    slow_log_max_bytes=settings.SLOW_REQUEST_LOG_MAX_BYTES,
+    slow_log_backups=settings.SLOW_REQUEST_LOG_BACKUPS,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,16 +1,156 @@
+import asyncio
+import logging
+import time
+from core import tracing
+from core.metrics import CONTEXT_BUILD_SECONDS, LLM_TIME_TO_FIRST_TOKEN_SECONDS, observe_llm
+from core.singleflight import SingleFlight
 from services.llm.base import LLMClient as LLM
 from services.context_builder.production_builder import ProductionMCPContextBuilder
 from services.answer_validator import CitationValidator
+from services.response_cache import ResponseCache, response_cache_key
+
+logger = logging.getLogger(__name__)
 
 class ChatService:
 
-    def __init__(self, llm: LLM):
+    def __init__(
+        self,
+        llm: LLM,
+        cache: ResponseCache | None = None,
+        flight: SingleFlight | None = None,
+    ):
         self.llm = llm
+        self.cache = cache
+        # Gleiche Frage mit gleichem Kontext bei gleichzeitigen Anfragen nur einmal ans LLM
+        self.flight = flight
         self.validator = CitationValidator()
 
+    def _cache_key(self, message: str, context: str) -> str:
+        model = getattr(self.llm, "model", type(self.llm).__name__)
+        return response_cache_key(message, context, model)
+
+    async def _cache_get(self, key: str):
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _cache_set(self, key: str, response: dict):
+        try:
+            await asyncio.to_thread(self.cache.set, key, response)
+        except Exception as e:
+            logger.warning(f"Could not cache response: {e}")
+
+    @staticmethod
+    def _build_prompt(context_builder: ProductionMCPContextBuilder):
+        with tracing.span("context.select", CONTEXT_BUILD_SECONDS.labels("select")):
+            prompt = context_builder.build_prompt()
+        trace = tracing.current_trace()
+        if trace is not None:
+            trace.count("chunks_selected", context_builder.selected_chunks)
+            trace.count("context_tokens", context_builder.budget.used)
+        return prompt
+
+    @staticmethod
+    def _trace_usage(response: dict):
+        cached = bool(response.get("cached"))
+        tracing.annotate(model=response.get("model"), cached=cached)
+        if cached:
+            return
+        usage = response.get("usage") or {}
+        tracing.count("llm_input_tokens", usage.get("input_tokens") or 0)
+        tracing.count("llm_output_tokens", usage.get("output_tokens") or 0)
+
     async def chat(self, message: str, context_builder: ProductionMCPContextBuilder):
-        response = await self.llm.chat(message, context_builder.build())
+        # Kontextauswahl ist CPU-Arbeit und läuft deshalb nicht auf dem Event-Loop
+        context = await asyncio.to_thread(self._build_prompt, context_builder)
+
+        key = self._cache_key(message, context)
+        if self.cache is not None:
+            cached = await self._cache_get(key)
+            if cached is not None:
+                logger.info(f"Response cache hit: model={cached.get('model')}")
+                cached = {**cached, "cached": True}
+                self._trace_usage(cached)
+                return cached
+
+        with tracing.span("llm"):
+            if self.flight is None:
+                response = await self._generate(key, message, context)
+            else:
+                response = await self.flight.do(key, lambda: self._generate(key, message, context))
+        self._trace_usage(response)
+        return response
+
+    async def _generate(self, key: str, message: str, context: str):
+        start = time.perf_counter()
+        response = await self.llm.chat(message, context)
+        observe_llm(response.get("llm_type"), "chat", time.perf_counter() - start, response.get("usage"))
         # valid_ids = {c.id for c in context_builder.citations.all()}
         # self.validator.validate(response["response"], valid_ids)
+        if self.cache is not None:
+            await self._cache_set(key, response)
         return response
-        
\ No newline at end of file
+
+    async def stream(self, message: str, context_builder: ProductionMCPContextBuilder):
+        """
+        Stream the answer; the final "done" event additionally carries the
+        citations and the time to first token.
+        """
+        context = await asyncio.to_thread(self._build_prompt, context_builder)
+
+        key = cached = None
+        if self.cache is not None:
+            key = self._cache_key(message, context)
+            cached = await self._cache_get(key)
+
+        start = time.perf_counter()
+        first_token = None
+        tokens = []
+        # Gecachte Antworten kommen als ein Token-Event
+        events = self._cached_events(cached) if cached else self.llm.stream(message, context)
+        async for event in events:
+            if event["type"] == "token":
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                tokens.append(event["text"])
+            if event["type"] == "done":
+                if key is not None and not cached:
+                    await self._cache_set(key, {
+                        "response": "".join(tokens),
+                        "model": event.get("model"),
+                        "llm_type": event.get("llm_type"),
+                        "usage": event.get("usage"),
+                    })
+                total = time.perf_counter() - start
+                if not cached:
+                    if first_token is not None:
+                        tracing.record(
+                            "llm.first_token",
+                            first_token,
+                            LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(event.get("llm_type") or "unknown"),
+                        )
+                    observe_llm(event.get("llm_type"), "stream", total, event.get("usage"))
+                    tracing.record("llm", total)
+                self._trace_usage(event)
+                event["citations"] = [
+                    {"id": c.id, "title": c.title, "source": c.source}
+                    for c in context_builder.used_citations()
+                ]
+                event["timing"] = {
+                    "time_to_first_token": first_token,
+                    "total": total,
+                }
+                logger.info(
+                    f"Stream finished: model={event.get('model')}, "
+                    f"ttft={first_token or 0.0:.3f}s, total={total:.3f}s"
+                )
+            yield event
+
+    @staticmethod
+    async def _cached_events(cached: dict):
+        yield {"type": "token", "text": cached["response"]}
+        yield {
+            "type": "done",
+            "model": cached.get("model"),
+            "llm_type": cached.get("llm_type"),
+            "usage": cached.get("usage"),
+            "cached": True,
+        }
@@ -1,4 +1,6 @@
-from typing import List
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, NamedTuple
 
 class TextChunker:
     def __init__(self, chunk_size: int = 1_500, overlap: int = 200):
@@ -15,3 +17,117 @@ class TextChunker:
             start = end - self.overlap
 
         return chunks
+
+
+class Span(NamedTuple):
+    """Chunk as character offsets into a document's text."""
+    doc_id: str
+    start: int
+    end: int
+
+
+_PARAGRAPH = re.compile(r"\n[ \t]*\n")
+_HEADING = re.compile(r"^#{1,6}[ \t]", re.MULTILINE)
+_SECTION_MARKER = re.compile(r"^=== (?:Sheet|Slide|Page)\b.*===[ \t]*$", re.MULTILINE)
+_DEFINITION = re.compile(
+    r"^(?:@\w|(?:async[ \t]+)?def[ \t]|class[ \t]|function[ \t]|export[ \t]|"
+    r"(?:public|private|protected|static|internal)[ \t]|func[ \t]|fn[ \t]|pub[ \t]|"
+    r"impl[ \t<]|struct[ \t]|interface[ \t]|enum[ \t]|template[ \t<]|namespace[ \t])",
+    re.MULTILINE,
+)
+
+CODE_EXTENSIONS = ('.py', '.js', '.java', '.cpp', '.c', '.h', '.cs', '.go', '.rs')
+MARKDOWN_EXTENSIONS = ('.md',)
+
+
+class StructuredChunker:
+    """
+    Chunker along the structure of a document.
+
+    Markdown headings and sheet/slide/page markers always start a new chunk.
+    Within a section, paragraphs (or top-level code definitions for source
+    files) are packed greedily up to ``max_chars``; only units that are
+    larger on their own are split, preferably at blank lines, then line
+    breaks, then whitespace. Chunks do not overlap.
+
+    ``spans`` returns offsets into the text instead of copies; ``split``
+    materializes them for callers that need strings.
+    """
+
+    def __init__(self, max_chars: int = 1_500, min_chars: int = 200):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+
+    @staticmethod
+    def kind_for(filename: str) -> str:
+        filename = filename.lower()
+        if filename.endswith(CODE_EXTENSIONS):
+            return "code"
+        if filename.endswith(MARKDOWN_EXTENSIONS):
+            return "markdown"
+        return "text"
+
+    def split(self, text: str, kind: str = "text") -> List[str]:
+        return [text[s.start:s.end] for s in self.spans(text, kind=kind)]
+
+    def spans(self, text: str, doc_id: str = "", kind: str = "text") -> List[Span]:
+        hard = [m.start() for m in _SECTION_MARKER.finditer(text)]
+        if kind == "markdown":
+            hard += [m.start() for m in _HEADING.finditer(text)]
+
+        if kind == "code":
+            soft = [m.start() for m in _DEFINITION.finditer(text) if not self._after_decorator(text, m.start())]
+        else:
+            soft = [m.end() for m in _PARAGRAPH.finditer(text)]
+
+        cuts = sorted(set([0, len(text)] + hard))
+        soft.sort()
+        result: List[Span] = []
+        for start, end in zip(cuts, cuts[1:]):
+            inner = soft[bisect_right(soft, start):bisect_left(soft, end)]
+            self._pack(text, doc_id, start, end, inner, result)
+        return result
+
+    def _pack(self, text: str, doc_id: str, start: int, end: int, soft: List[int], out: List[Span]):
+        chunk_start = prev = start
+        for cut in soft + [end]:
+            if cut - chunk_start <= self.max_chars:
+                prev = cut
+                continue
+            if prev > chunk_start:
+                self._emit(text, doc_id, chunk_start, prev, out)
+                chunk_start = prev
+            if cut - chunk_start > self.max_chars:
+                # Einheit allein zu groß: an Absatz-, Zeilen- oder Wortgrenzen teilen
+                chunk_start = self._split_long(text, doc_id, chunk_start, cut, out)
+            prev = cut
+        if end > chunk_start:
+            self._emit(text, doc_id, chunk_start, end, out)
+
+    def _split_long(self, text: str, doc_id: str, start: int, end: int, out: List[Span]) -> int:
+        while end - start > self.max_chars:
+            lower, limit = start + self.min_chars, start + self.max_chars
+            for sep in ("\n\n", "\n", " "):
+                cut = text.rfind(sep, lower, limit)
+                if cut != -1:
+                    cut += len(sep)
+                    break
+            else:
+                cut = limit
+            self._emit(text, doc_id, start, cut, out)
+            start = cut
+        return start
+
+    @staticmethod
+    def _emit(text: str, doc_id: str, start: int, end: int, out: List[Span]):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            out.append(Span(doc_id, start, end))
+
+    @staticmethod
+    def _after_decorator(text: str, pos: int) -> bool:
+        prev_line_start = text.rfind("\n", 0, max(pos - 1, 0)) + 1
+        return pos > 0 and text.startswith("@", prev_line_start)
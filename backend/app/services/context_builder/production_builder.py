@@ -1,46 +1,320 @@
-from services.context_builder.chunker import TextChunker
+import heapq
+import threading
+from collections.abc import Iterable, Sequence
+from services.context_builder.chunker import StructuredChunker
 from core.token_budget import TokenBudget
+from core.token_counter import TokenCounter
 from core.citations import CitationRegistry
-from core.lexical import LexicalRetriever
+from core.prompt import SystemPrompt
+from core.bm25 import BM25Retriever
+from core.retrieval import RetrievalResult, content_hash
+from core import tracing
+from core.metrics import CHUNKING_SECONDS, RETRIEVAL_SECONDS
 from services.context_builder.retriever import HybridRetriever
 
 class ProductionMCPContextBuilder:
+    """
+    Baut den Kontext aus den relevantesten Chunks innerhalb eines Token-Budgets.
 
-    def __init__(self, query: str, max_tokens: int = 8_000):
+    Standardmäßig füllt jedes Dokument das Budget in Eingangsreihenfolge.
+    Mit ``global_selection`` werden die Kandidaten aller Dokumente in einem
+    begrenzten Heap (``max_candidates``) gesammelt und erst in ``build``
+    dokumentübergreifend nach Score ausgewählt.
+
+    Token-Zahlen der Chunks werden beim Indexieren berechnet und über
+    ``chunk_tokens`` übergeben; das Budget rechnet dann nur noch mit ganzen
+    Zahlen. Fehlen sie (Uploads), zählt der Builder einmal pro Chunk.
+    Indexierte Dokumente übergeben ``chunks`` als lazy Sequenz (z.B.
+    ``IndexedDocument.chunk_view``) statt ``content``; gelesen werden dann
+    nur die Chunks, die Retriever und Budget tatsächlich anfassen.
+
+    Mit ``prefix_tokens`` werden als ``stable`` markierte Dokumente (Projekt
+    und Referenz) in Eingangs- und Dokumentreihenfolge zu einem
+    anfrageunabhängigen Präfix zusammengefasst. ``build_prompt`` liefert
+    Präfix und anfrageabhängigen Teil getrennt, damit der Anbieter den
+    Präfix cachen kann. Stabile Dokumente müssen dafür vor allen anderen
+    hinzugefügt werden, sonst verschieben sich die Zitat-IDs.
+
+    Bekommt ein Dokument weniger Treffer, als Budget bzw. Kandidaten-Heap
+    aufnehmen könnten, füllt ``fill_unmatched`` mit den übrigen Chunks in
+    Dokumentreihenfolge (Score 0) auf. Das geschieht lazy: Es werden nur so
+    viele Chunks angefasst, wie noch Platz haben.
+
+    Lange Dokumente ohne Index (z.B. frisch hochgeladene PDFs) nimmt
+    ``add_pages`` seitenweise aus einem Generator entgegen und hört auf zu
+    lesen, sobald genug relevante Chunks für das Budget vorliegen.
+    """
+
+    HEADER = (
+        "=== MCP KONTEXT (PRODUCTION) ===\n"
+        "REGELN:\n"
+        "- Jede Aussage MUSS [C#] zitieren\n"
+        "- Keine externe Annahmen\n"
+        "- Wenn Information fehlt: 'Nicht im Kontext enthalten'\n"
+    )
+
+    def __init__(
+        self,
+        query: str,
+        max_tokens: int = 8_000,
+        retriever: HybridRetriever | None = None,
+        global_selection: bool = False,
+        max_candidates: int = 256,
+        token_counter: TokenCounter | None = None,
+        prefix_tokens: int = 0,
+        fill_unmatched: bool = True,
+    ):
         self.query = query
-        self.chunker = TextChunker()
-        self.budget = TokenBudget(max_tokens)
+        self.chunker = StructuredChunker()
+        self.budget = TokenBudget(max_tokens, token_counter)
+        self.counter = self.budget.counter
         self.citations = CitationRegistry()
-        self.retriever = HybridRetriever(LexicalRetriever())
+        self.retriever = retriever or HybridRetriever(BM25Retriever())
         self.blocks: list[str] = []
+        self.global_selection = global_selection
+        self.max_candidates = max_candidates
+        # Min-Heap: (score, -seq, citation_id, block, tokens); bei gleichem Score fliegt der spätere raus
+        self._candidates: list[tuple[float, int, str, str, int]] = []
+        self._seq = 0
+        self._used_citations: set[str] = set()
+        self._selected = False
+        # Gemeinsam genutzte Builder (Request-Coalescing) werden nur einmal ausgewählt
+        self._select_lock = threading.Lock()
+        self.prefix_tokens = min(prefix_tokens, max_tokens)
+        self._prefix_blocks: list[str] = []
+        self._prefix_citations: set[str] = set()
+        self._prefix_used = 0
+        self._prefix_full = False
+        self.fill_unmatched = fill_unmatched
+
+    def add_document(
+        self,
+        *,
+        title: str,
+        source: str,
+        content: str | None = None,
+        chunks: Sequence[str] | None = None,
+        chunk_tokens: list[int] | None = None,
+        chunk_keys: list[str] | None = None,
+        stable: bool = False,
+    ):
+        citation_id = self.citations.register(source, title)
+        tracing.count("documents")
+        if chunks is None:
+            with tracing.span("chunk", CHUNKING_SECONDS.labels("request")):
+                chunks = self.chunker.split(content, kind=StructuredChunker.kind_for(title))
+        if chunk_tokens is None:
+            chunk_tokens = self.counter.count_many(chunks)
+        if chunk_keys is None:
+            chunk_keys = [content_hash(c) for c in chunks]
+        tokens = dict(zip(chunk_keys, chunk_tokens))
+        # Blockkopf einmal pro Dokument zählen
+        overhead = self.counter.count(self._block(title, citation_id, ""))
 
-    def add_document(self, *, title: str, content: str, source: str):
+        if stable and self.prefix_tokens:
+            taken = self._fill_prefix(title, citation_id, chunks, chunk_tokens, overhead)
+            if taken == len(chunks):
+                return
+            chunks, chunk_keys = chunks[taken:], chunk_keys[taken:]
+
+        with tracing.span("retrieve", RETRIEVAL_SECONDS.labels()):
+            ranked = self.retriever.retrieve(self.query, chunks, chunk_keys)
+        tracing.count("chunks_scored", len(ranked))
+        if self.fill_unmatched:
+            ranked = self._with_unmatched(ranked, chunks, chunk_keys)
+        self._add_ranked(title, citation_id, ranked, tokens, overhead)
+
+    @staticmethod
+    def _with_unmatched(ranked, chunks, keys):
+        """Ranked results followed by the remaining chunks in document order (score 0), lazily."""
+        yield from ranked
+        seen = {r.key or content_hash(r.text) for r in ranked}
+        for i, key in enumerate(keys):
+            if key not in seen:
+                seen.add(key)
+                yield RetrievalResult(chunks[i], 0.0, "unmatched", key)
+
+    def add_pages(
+        self,
+        *,
+        title: str,
+        source: str,
+        pages: Iterable[str],
+        patience: int = 20,
+    ) -> int:
+        """
+        Add a long document page by page, reading only as far as needed.
+
+        Pages are chunked and scored as they are pulled from ``pages``. Once
+        the best chunks seen so far (positive score) would fill the remaining
+        budget and ``patience`` further pages brought no chunk that beats
+        them, the rest of the document is not read at all.
+
+        Args:
+            title: Document title
+            source: Document source for the citation
+            pages: Page texts, typically a lazy extractor
+            patience: Pages without improvement before reading stops
+
+        Returns:
+            Number of pages read
+        """
         citation_id = self.citations.register(source, title)
-        chunks = self.chunker.split(content)
+        overhead = self.counter.count(self._block(title, citation_id, ""))
+        kind = StructuredChunker.kind_for(title)
+        remaining = self.budget.max_tokens - self.budget.used
+
+        ranked = []
+        keys: list[str] = []
+        page_chunks: list[str] = []
+        tokens: dict[str, int] = {}
+        # Min-Heap (score, cost) der Chunks, die das Budget aktuell füllen würden
+        best: list[tuple[float, int]] = []
+        best_tokens = 0
+        stale = 0
+        read = 0
+        for page in pages:
+            read += 1
+            with tracing.span("chunk", CHUNKING_SECONDS.labels("request")):
+                chunks = self.chunker.split(page, kind=kind)
+            chunk_keys = [content_hash(c) for c in chunks]
+            tokens.update(zip(chunk_keys, self.counter.count_many(chunks)))
+            page_chunks.extend(chunks)
+            keys.extend(chunk_keys)
+            improved = False
+            with tracing.span("retrieve", RETRIEVAL_SECONDS.labels()):
+                page_ranked = self.retriever.retrieve(self.query, chunks, chunk_keys) if chunks else []
+            tracing.count("chunks_scored", len(page_ranked))
+            for r in page_ranked:
+                ranked.append(r)
+                if r.score <= 0:
+                    continue
+                if best and best_tokens >= remaining and r.score <= best[0][0]:
+                    continue
+                cost = overhead + tokens[self._key(r)]
+                heapq.heappush(best, (r.score, cost))
+                best_tokens += cost
+                # Schwächste Chunks verwerfen, solange der Rest das Budget noch füllt
+                while len(best) > 1 and best_tokens - best[0][1] >= remaining:
+                    best_tokens -= heapq.heappop(best)[1]
+                improved = True
+            stale = 0 if improved else stale + 1
+            if best_tokens >= remaining and stale >= patience:
+                break
 
-        ranked = self.retriever.retrieve(self.query, chunks)
+        ranked.sort(key=lambda r: r.score, reverse=True)
+        if self.fill_unmatched:
+            ranked = self._with_unmatched(ranked, page_chunks, keys)
+        self._add_ranked(title, citation_id, ranked, tokens, overhead)
+        tracing.count("documents")
+        tracing.count("pages_read", read)
+        return read
 
+    def _add_ranked(self, title: str, citation_id: str, ranked, tokens: dict[str, int], overhead: int):
+        if self.global_selection:
+            self._collect(title, citation_id, ranked, tokens, overhead)
+            return
+
+        for r in ranked:
+            cost = overhead + tokens[self._key(r)]
+            if not self.budget.can_add_tokens(cost):
+                break
+            self.blocks.append(self._block(title, citation_id, r.text))
+            self.budget.add_tokens(cost)
+            self._used_citations.add(citation_id)
+
+    def _fill_prefix(self, title: str, citation_id: str, chunks: list[str], chunk_tokens: list[int], overhead: int) -> int:
+        """Take chunks in document order into the prefix; returns how many were taken."""
+        for i, n in enumerate(chunk_tokens):
+            cost = overhead + n
+            if self._prefix_full or self._prefix_used + cost > self.prefix_tokens:
+                # Erster Chunk, der nicht passt, schließt den Präfix für alle weiteren Dokumente
+                self._prefix_full = True
+                return i
+            self._prefix_blocks.append(self._block(title, citation_id, chunks[i]))
+            self._prefix_used += cost
+            self.budget.add_tokens(cost)
+            self._prefix_citations.add(citation_id)
+            self._used_citations.add(citation_id)
+        return len(chunk_tokens)
+
+    def _collect(self, title: str, citation_id: str, ranked, tokens: dict[str, int], overhead: int):
         for r in ranked:
-            block = (
-                f"\n--- {title} {citation_id} ---\n"
-                f"{r.text.strip()}\n"
+            self._seq += 1
+            entry = (
+                r.score,
+                -self._seq,
+                citation_id,
+                self._block(title, citation_id, r.text),
+                overhead + tokens[self._key(r)],
             )
-            if not self.budget.can_add(block):
+            if len(self._candidates) < self.max_candidates:
+                heapq.heappush(self._candidates, entry)
+            elif entry > self._candidates[0]:
+                heapq.heapreplace(self._candidates, entry)
+            else:
+                # ranked ist absteigend sortiert, weitere Chunks sind nicht besser
                 break
-            self.blocks.append(block)
-            self.budget.add(block)
 
-    def build(self) -> str:
-        header = (
-            "=== MCP KONTEXT (PRODUCTION) ===\n"
-            "REGELN:\n"
-            "- Jede Aussage MUSS [C#] zitieren\n"
-            "- Keine externe Annahmen\n"
-            "- Wenn Information fehlt: 'Nicht im Kontext enthalten'\n"
+    def _select(self):
+        with self._select_lock:
+            if self._selected or not self.global_selection:
+                return
+            self._selected = True
+
+            # Nur die begrenzte Kandidatenmenge wird sortiert
+            for _, _, citation_id, block, cost in sorted(self._candidates, reverse=True):
+                if not self.budget.can_add_tokens(cost):
+                    continue
+                self.blocks.append(block)
+                self.budget.add_tokens(cost)
+                self._used_citations.add(citation_id)
+            self._candidates = []
+
+    @staticmethod
+    def _key(result: RetrievalResult) -> str:
+        return result.key or content_hash(result.text)
+
+    @staticmethod
+    def _block(title: str, citation_id: str, text: str) -> str:
+        return (
+            f"\n--- {title} {citation_id} ---\n"
+            f"{text.strip()}\n"
         )
 
+    def used_citations(self):
+        """Citations of the documents that contributed chunks to the context."""
+        self._select()
+        return [c for c in self.citations.all() if c.id in self._used_citations]
+
+    @property
+    def selected_chunks(self) -> int:
+        """Number of chunks in the context (prefix included)."""
+        self._select()
+        return len(self.blocks) + len(self._prefix_blocks)
+
+    def build(self) -> str:
+        return str(self.build_prompt())
+
+    def build_prompt(self) -> SystemPrompt:
+        """Build the context as stable prefix plus query-specific suffix."""
+        self._select()
+
+        prefix = ""
+        if self._prefix_blocks:
+            prefix = self.HEADER + "".join(self._prefix_blocks) + "\n\n=== QUELLEN (REFERENZ) ===\n"
+            for c in self.citations.all():
+                if c.id in self._prefix_citations:
+                    prefix += f"{c.id} {c.title} ({c.source})\n"
+            prefix += "\n=== ANFRAGEBEZOGENER KONTEXT ===\n"
+
         sources = "\n\n=== QUELLEN ===\n"
         for c in self.citations.all():
+            if c.id in self._prefix_citations:
+                continue
+            if self.global_selection and c.id not in self._used_citations:
+                continue
             sources += f"{c.id} {c.title} ({c.source})\n"
 
-        return header + "".join(self.blocks) + sources
+        body = "".join(self.blocks) + sources
+        return SystemPrompt(prefix, body if prefix else self.HEADER + body)
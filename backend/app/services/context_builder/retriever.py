@@ -1,16 +1,42 @@
-from core.retrieval import Retriever 
+from core.retrieval import Retriever, RetrievalResult
 
 class HybridRetriever:
-    def __init__(self, lexical: Retriever, embedding: Retriever | None = None):
+    """
+    Kombiniert lexikalische und (optional) Embedding-Scores pro Text.
+
+    Ohne Embedding-Retriever bleiben die lexikalischen Scores unverändert.
+    Mit Embeddings wird der lexikalische Score auf s / (s + 1) gestaucht und
+    mit der Kosinus-Ähnlichkeit gewichtet addiert. Beide Anteile hängen nicht
+    von der jeweiligen Kandidatenmenge ab und bleiben so über Dokumente
+    hinweg vergleichbar.
+    """
+
+    def __init__(
+        self,
+        lexical: Retriever,
+        embedding: Retriever | None = None,
+        lexical_weight: float = 0.5,
+        embedding_weight: float = 0.5,
+    ):
         self.lexical = lexical
         self.embedding = embedding
+        self.lexical_weight = lexical_weight
+        self.embedding_weight = embedding_weight
+
+    def retrieve(self, query: str, docs: list[str], keys: list[str] | None = None):
+        results = self.lexical.retrieve(query, docs, keys)
 
-    def retrieve(self, query: str, docs: list[str]):
-        results = self.lexical.retrieve(query, docs)
+        if self.embedding is None:
+            return sorted(results, key=lambda r: r.score, reverse=True)
 
-        if self.embedding:
-            emb = self.embedding.retrieve(query, docs)
-            results.extend(emb)
+        scores: dict[str, float] = {}
+        text_keys: dict[str, str | None] = {}
+        for r in results:
+            scores[r.text] = self.lexical_weight * r.score / (r.score + 1)
+            text_keys[r.text] = r.key
+        for r in self.embedding.retrieve(query, docs, keys):
+            scores[r.text] = scores.get(r.text, 0.0) + self.embedding_weight * max(r.score, 0.0)
+            text_keys[r.text] = text_keys.get(r.text) or r.key
 
-        # normalize & rerank
-        return sorted(results, key=lambda r: r.score, reverse=True)
+        fused = [RetrievalResult(text, score, "hybrid", text_keys[text]) for text, score in scores.items()]
+        return sorted(fused, key=lambda r: r.score, reverse=True)
@@ -0,0 +1,919 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.bm25 import BM25Index
+from core.config import settings
+from core.embedding import EmbeddingRetriever
+from core import tracing
+from core.metrics import CHUNKING_SECONDS, SCAN_SECONDS
+from core.retrieval import content_hash
+from core.token_counter import HeuristicCounter, TokenCounter
+from services.context_builder.chunker import Span, StructuredChunker
+from services.corpus_store import CorpusStore, open_corpus_store, store_path
+from services.document_service import DocumentService
+from services.version_index import VersionEntry, VersionIndex
+from utils.file_extractors import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkView(Sequence):
+    """
+    Lazy, read-only list of a document's chunks.
+
+    Each chunk is produced on access, so the context builder only decodes
+    (or slices) the chunks it actually selects. Slicing returns a view.
+    """
+
+    def __init__(self, fetch: Callable[[int], str], indices: range):
+        self._fetch = fetch
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ChunkView(self._fetch, self._indices[i])
+        return self._fetch(self._indices[i])
+
+
+@dataclass
+class IndexedDocument:
+    """
+    Extracted, chunked and version-tagged file held by the corpus index.
+
+    Freshly indexed documents keep their text in ``file_data`` and their
+    chunks as spans into it. Documents loaded from (or saved to) a corpus
+    store keep only metadata on the heap and read text, chunk offsets and
+    token counts from the memory-mapped store.
+    """
+    path: Path
+    size: int
+    mtime_ns: int
+    file_data: Dict
+    spans: List[Span] = field(default_factory=list)
+    tokens: List[int] = field(default_factory=list)
+    store: Optional[CorpusStore] = None
+    text_range: Tuple[int, int] = (0, 0)
+    chunk_range: Tuple[int, int] = (0, 0)
+    # Chunks sind im BM25-Index und halten ihre Embeddings
+    # (bei geladenen Dokumenten erst nach warm())
+    lexical: bool = True
+    # content_hash je Chunk, beim Indexieren berechnet (geladene Dokumente: bei warm())
+    hashes: Optional[List[str]] = None
+
+    @property
+    def relative_path(self) -> str:
+        return self.file_data["path"]
+
+    @property
+    def content(self) -> str:
+        if self.store is None:
+            return self.file_data["content"]
+        return self.store.text(*self.text_range)
+
+    def offsets(self) -> List[Tuple[int, int]]:
+        if self.store is None:
+            return [(s.start, s.end) for s in self.spans]
+        return self.store.offsets(*self.chunk_range)
+
+    @property
+    def chunks(self) -> List[str]:
+        content = self.content
+        return [content[start:end] for start, end in self.offsets()]
+
+    def chunk_view(self) -> ChunkView:
+        """Chunks as a lazy view; stored documents decode one chunk per access."""
+        if self.store is None:
+            content, spans = self.file_data["content"], self.spans
+            return ChunkView(lambda i: content[spans[i].start:spans[i].end], range(len(spans)))
+        store, (first, count), text_start = self.store, self.chunk_range, self.text_range[0]
+        return ChunkView(lambda i: store.chunk(first + i, text_start), range(count))
+
+    @property
+    def keys(self) -> List[str]:
+        """Content hashes of the chunks, the keys of the BM25 and vector indexes."""
+        if self.hashes is None:
+            self.hashes = [content_hash(chunk) for chunk in self.chunks]
+        return self.hashes
+
+    @property
+    def chunk_tokens(self) -> List[int]:
+        if self.store is None:
+            return self.tokens
+        return self.store.tokens(*self.chunk_range)
+
+    def metadata(self) -> Dict:
+        """File metadata without the extracted text."""
+        if self.store is not None:
+            return self.file_data
+        return {k: v for k, v in self.file_data.items() if k != "content"}
+
+    def as_file_data(self) -> Dict:
+        """Metadata plus content, as returned by DocumentService.process_file."""
+        if self.store is None:
+            return self.file_data
+        return {**self.file_data, "content": self.content}
+
+
+class DirectoryIndex:
+    """
+    Long-lived index of one document directory.
+
+    Holds every supported file's stat data plus the extracted and chunked
+    content of the files selected by version filtering. Changes are applied
+    one file at a time; only the version group of a changed file is
+    re-evaluated.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        doc_service: DocumentService,
+        chunker: Optional[StructuredChunker] = None,
+        apply_version_filtering: bool = True,
+        bm25: Optional[BM25Index] = None,
+        embedding: Optional[EmbeddingRetriever] = None,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        self.directory = Path(directory)
+        self.doc_service = doc_service
+        self.chunker = chunker or StructuredChunker()
+        self.bm25 = bm25 if bm25 is not None else BM25Index()
+        self.embedding = embedding
+        self.token_counter = token_counter or HeuristicCounter()
+        self.apply_version_filtering = apply_version_filtering
+        self.generation = 0
+        self.built = False
+
+        # _lock schützt den Zustand für Leser und wird nur kurz gehalten;
+        # _write_lock serialisiert Änderungen inklusive Extraktion
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        # relative path -> (size, mtime_ns) of all supported files
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        # Versionsgruppen, inkrementell pro Datei gepflegt
+        self._versions = VersionIndex()
+        # relative path -> indexed document (selected files only)
+        self._documents: Dict[str, IndexedDocument] = {}
+        # während reconcile: zu indexierende Dateien, werden gesammelt extrahiert
+        self._deferred: Optional[Dict[str, None]] = None
+        # (generation, Wert): sortierte Pfade und Fingerprint für Listings
+        self._sorted: Optional[Tuple[int, List[str]]] = None
+        self._fingerprint: Optional[Tuple[int, str]] = None
+
+    def build(self):
+        """(Re)build the index from disk, keeping still-valid documents."""
+        with self._write_lock:
+            self.reconcile()
+            self.built = True
+        logger.info(
+            f"Indexed {len(self._documents)} of {len(self._stats)} files in {self.directory}"
+        )
+
+    def reconcile(self, subtree: Optional[Path] = None) -> int:
+        """
+        Compare the index with the filesystem and apply all differences.
+
+        Args:
+            subtree: Only compare this directory below the index directory,
+                e.g. after it was created, moved or deleted
+
+        Returns:
+            Number of added, changed or removed files
+        """
+        prefix = None
+        if subtree is not None and Path(subtree) != self.directory:
+            prefix = self._relative(Path(subtree))
+
+        def inside(rel: str) -> bool:
+            return prefix is None or rel == prefix or rel.startswith(prefix + os.sep)
+
+        with self._write_lock:
+            current = {}
+            if self.directory.exists():
+                # Stat-Daten stammen direkt aus dem Verzeichnis-Scan
+                with tracing.span("scan", SCAN_SECONDS.labels(self.directory.name)):
+                    for entry in self.doc_service.walk_supported_files(self.directory, prefix):
+                        current[entry.rel.replace("/", os.sep)] = (entry.size, entry.mtime_ns)
+                tracing.count("files_scanned", len(current))
+
+            with self._lock:
+                removed = [rel for rel in self._stats if rel not in current and inside(rel)]
+                changed = [rel for rel, st in current.items() if self._stats.get(rel) != st]
+
+            def apply():
+                for rel in removed:
+                    self._remove(rel)
+                for rel in changed:
+                    self._update(rel, current[rel])
+
+            self._apply(apply)
+            return len(removed) + len(changed)
+
+    def update(self, file_path: Path, content: Optional[str] = None):
+        """
+        Apply a created or modified file.
+
+        Args:
+            file_path: Changed file
+            content: Already extracted text, skips extraction if given
+        """
+        file_path = Path(file_path)
+        if file_path.suffix.lower() not in self.doc_service.SUPPORTED_EXTENSIONS:
+            return
+        if self.doc_service.is_ignored(self.directory, file_path):
+            return
+        try:
+            stat = file_path.stat()
+        except OSError:
+            self.remove(file_path)
+            return
+        if not file_path.is_file():
+            return
+        with self._write_lock:
+            rel = self._relative(file_path)
+            if self._stats.get(rel) == (stat.st_size, stat.st_mtime_ns):
+                return
+            self._apply(
+                lambda: self._update(rel, (stat.st_size, stat.st_mtime_ns)),
+                {rel: content} if content is not None else None,
+            )
+
+    def _apply(self, changes: Callable[[], None], contents: Optional[Dict[str, str]] = None):
+        """
+        Apply index changes and index the newly selected files.
+
+        ``changes`` only updates stats and version groups under the reader
+        lock; extraction, chunking and embedding of the files it selects run
+        outside of it, so chat and listing requests keep being served from
+        the previous state. Callers hold ``_write_lock``.
+
+        Args:
+            changes: Calls ``_update``/``_remove``
+            contents: Already extracted texts by relative path
+        """
+        with self._lock:
+            self._deferred = {}
+            try:
+                changes()
+                pending = [(rel, self._stats[rel]) for rel in self._deferred]
+            finally:
+                self._deferred = None
+        try:
+            if pending:
+                self._index_pending(pending, contents)
+        finally:
+            if self.embedding is not None:
+                # Erst jetzt: unveränderte Chunks geänderter Dateien sind wieder referenziert
+                self.embedding.prune()
+
+    def _index_pending(self, pending: List[Tuple[str, Tuple[int, int]]], contents: Optional[Dict[str, str]]):
+        """Extract the pending files in one batch, then prepare and install them one by one."""
+        contents = dict(contents or {})
+        missing = [rel for rel, _ in pending if rel not in contents]
+        # Extraktion gebündelt, damit der Prozess-Pool parallel arbeiten kann
+        extracted = self.doc_service.extract_many([self.directory / rel for rel in missing])
+        contents.update(zip(missing, extracted))
+        for rel, stat in pending:
+            doc = self._prepare(rel, stat, contents[rel])
+            if doc is None:
+                continue
+            with self._lock:
+                self._install(doc)
+
+    def __len__(self) -> int:
+        """Number of indexed (version-selected) documents."""
+        return len(self._documents)
+
+    def get(self, rel: str) -> Optional[IndexedDocument]:
+        """Return the document at a relative path, indexing it on first access."""
+        with self._lock:
+            doc = self._documents.get(rel)
+        if doc is None and (self.directory / rel).is_file():
+            self.update(self.directory / rel)
+            with self._lock:
+                doc = self._documents.get(rel)
+        return doc
+
+    def remove(self, file_path: Path):
+        """Apply a deleted file."""
+        with self._write_lock:
+            rel = self._relative(Path(file_path))
+            with self._lock:
+                known = rel in self._stats
+            if known:
+                # Eine ältere Version kann nachrücken und muss indexiert werden
+                self._apply(lambda: self._remove(rel))
+
+    def documents(self, max_files: Optional[int] = None) -> List[IndexedDocument]:
+        """Return the selected documents ordered by relative path."""
+        if not self.built:
+            self.build()
+        with self._lock:
+            docs = [self._documents[rel] for rel in self._sorted_paths()]
+        return docs[:max_files] if max_files is not None else docs
+
+    def listing(self, limit: Optional[int] = 100, cursor: Optional[str] = None) -> Dict:
+        """
+        Return the metadata of the selected documents, one page at a time.
+
+        The cost depends on the number of files, not on their size: no
+        text is read or copied.
+
+        Args:
+            limit: Page size; None returns everything after the cursor
+            cursor: ``next_cursor`` of the previous page
+
+        Returns:
+            Dict with ``files`` (metadata without content), ``total_size``
+            and ``file_count`` over all pages, and ``next_cursor`` (None on
+            the last page)
+        """
+        if not self.built:
+            self.build()
+        with self._lock:
+            paths = self._sorted_paths()
+            first = bisect_right(paths, _decode_cursor(cursor)) if cursor else 0
+            page = paths[first:first + limit] if limit is not None else paths[first:]
+            files = [self._documents[rel].metadata() for rel in page]
+            total_size = sum(d.size for d in self._documents.values())
+        more = first + len(page) < len(paths)
+        return {
+            "files": files,
+            "total_size": total_size,
+            "file_count": len(paths),
+            "next_cursor": _encode_cursor(page[-1]) if more and page else None,
+        }
+
+    def fingerprint(self) -> str:
+        """
+        Hash over path, size and mtime of the selected documents.
+
+        Changes exactly when the listing changes; unlike ``generation`` it is
+        the same in every worker process, so it can back an ETag.
+        """
+        if not self.built:
+            self.build()
+        with self._lock:
+            if self._fingerprint is None or self._fingerprint[0] != self.generation:
+                digest = hashlib.sha1()
+                for rel in self._sorted_paths():
+                    doc = self._documents[rel]
+                    digest.update(f"{rel}\0{doc.size}\0{doc.mtime_ns}\n".encode("utf-8"))
+                self._fingerprint = (self.generation, digest.hexdigest())
+            return self._fingerprint[1]
+
+    def versions(self, document: str) -> Optional[Dict]:
+        """
+        Version history of a document.
+
+        Args:
+            document: Group key (``"spec.pdf"``) or the relative path of
+                any of its versions
+
+        Returns:
+            Dict with ``released``/``draft`` (latest V-/X-version), the
+            currently ``selected`` paths and the ``history`` oldest first,
+            or None if no file belongs to the document
+        """
+        if not self.built:
+            self.build()
+        with self._lock:
+            key = self._versions.key_of(document) or document
+            history = self._versions.history(key)
+            selected = self._versions.selected(key)
+            if not selected:
+                return None
+            return {
+                "document": key,
+                "released": _version_entry(self._versions.latest(key, released=True)),
+                "draft": _version_entry(self._versions.latest(key, released=False)),
+                "selected": selected,
+                "history": [_version_entry(e) for e in history],
+            }
+
+    def _sorted_paths(self) -> List[str]:
+        if self._sorted is None or self._sorted[0] != self.generation:
+            self._sorted = (self.generation, sorted(self._documents))
+        return self._sorted[1]
+
+    STORE_VERSION = 3
+
+    def load(self, store: CorpusStore) -> bool:
+        """
+        Take over a saved snapshot instead of extracting the directory.
+
+        Only metadata is read; text and chunks stay in the mapped store.
+        Chunks reach the BM25 index with ``warm`` and changes made while
+        the service was down with ``reconcile``.
+
+        Returns:
+            False if the store belongs to another directory or was written
+            with different extractors, chunking, token counting or version
+            filtering
+        """
+        meta = store.meta
+        if meta.get("version") != self.STORE_VERSION or meta.get("settings") != self._store_settings():
+            logger.info(f"Corpus store {store.path} is outdated, rebuilding {self.directory}")
+            return False
+
+        with self._write_lock, self._lock:
+            for rel in list(self._documents):
+                self._drop(rel)
+            self._stats = {rel: tuple(st) for rel, st in meta["files"].items()}
+            self._versions = VersionIndex.from_dict(meta["versions"])
+            for entry in meta["documents"]:
+                rel = entry["file_data"]["path"]
+                self._documents[rel] = IndexedDocument(
+                    path=self.directory / rel,
+                    size=entry["size"],
+                    mtime_ns=entry["mtime_ns"],
+                    file_data=entry["file_data"],
+                    store=store,
+                    text_range=tuple(entry["text"]),
+                    chunk_range=tuple(entry["chunks"]),
+                    lexical=False,
+                )
+            self.generation += 1
+            self.built = True
+        logger.info(f"Loaded {len(meta['documents'])} documents for {self.directory} from {store.path}")
+        return True
+
+    def warm(self):
+        """Add the chunks of documents loaded from a store to the BM25 index."""
+        with self._lock:
+            pending = [rel for rel, doc in self._documents.items() if not doc.lexical]
+        for rel in pending:
+            # Pro Dokument sperren, damit Änderungen nicht lange warten
+            with self._lock:
+                doc = self._documents.get(rel)
+                if doc is None or doc.lexical:
+                    continue
+                for key, chunk in zip(doc.keys, doc.chunks):
+                    self.bm25.add(key, chunk)
+                if self.embedding is not None:
+                    self.embedding.retain(doc.keys)
+                doc.lexical = True
+
+    def save(self, path: Path):
+        """Write the index to a corpus store and serve texts from it afterwards."""
+        with self._lock:
+            docs = [self._documents[rel] for rel in self._sorted_paths()]
+            meta = {
+                "version": self.STORE_VERSION,
+                "settings": self._store_settings(),
+                "files": {rel: list(st) for rel, st in self._stats.items()},
+                "versions": self._versions.to_dict(),
+                "documents": [
+                    {
+                        "size": d.size,
+                        "mtime_ns": d.mtime_ns,
+                        "file_data": {k: v for k, v in d.file_data.items() if k != "content"},
+                    }
+                    for d in docs
+                ],
+            }
+
+        # Schreiben ohne Lock; Texte ändern sich nicht, geänderte Dateien bekommen neue Objekte
+        CorpusStore.write(path, meta, ((d.content, d.offsets(), d.chunk_tokens) for d in docs))
+        store = CorpusStore(path)
+
+        with self._lock:
+            for d, entry in zip(docs, store.meta["documents"]):
+                if self._documents.get(d.relative_path) is not d:
+                    continue
+                self._documents[d.relative_path] = IndexedDocument(
+                    path=d.path,
+                    size=d.size,
+                    mtime_ns=d.mtime_ns,
+                    file_data=entry["file_data"],
+                    store=store,
+                    text_range=tuple(entry["text"]),
+                    chunk_range=tuple(entry["chunks"]),
+                    lexical=d.lexical,
+                    hashes=d.hashes,
+                )
+        logger.info(f"Saved {len(docs)} documents of {self.directory} to {path}")
+
+    def _store_settings(self) -> Dict:
+        return {
+            "directory": str(self.directory.resolve()),
+            "chunker": [type(self.chunker).__name__, self.chunker.max_chars, self.chunker.min_chars],
+            "token_counter": self.token_counter.name,
+            "version_filtering": self.apply_version_filtering,
+            "extractor": EXTRACTOR_VERSION,
+        }
+
+    def _relative(self, file_path: Path) -> str:
+        return str(file_path.relative_to(self.directory))
+
+    def _update(self, rel: str, stat: Tuple[int, int]):
+        self._stats[rel] = stat
+        key = self._versions.add(rel)
+        self._drop(rel)
+        self._reselect(key)
+
+    def _remove(self, rel: str):
+        del self._stats[rel]
+        key = self._versions.remove(rel)
+        self._drop(rel)
+        if key is not None:
+            self._reselect(key)
+
+    def _reselect(self, key: str):
+        members = self._versions.members(key)
+        if self.apply_version_filtering:
+            selected = set(self._versions.selected(key))
+        else:
+            selected = set(members)
+
+        for rel in members:
+            if rel not in selected:
+                self._drop(rel)
+        for rel in members:
+            if rel in selected and rel not in self._documents:
+                if self._deferred is not None:
+                    self._deferred[rel] = None
+                else:
+                    self._index_file(rel)
+
+    def _index_file(self, rel: str, content: Optional[str] = None):
+        doc = self._prepare(rel, self._stats[rel], content)
+        if doc is not None:
+            self._install(doc)
+
+    def _prepare(self, rel: str, stat: Tuple[int, int], content: Optional[str] = None) -> Optional[IndexedDocument]:
+        """Extract (unless given), chunk, count and embed a file without touching the index."""
+        file_path = self.directory / rel
+        try:
+            file_data = self.doc_service.process_file(file_path, self.directory, content)
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}")
+            return None
+        content = file_data["content"]
+        with tracing.span("chunk", CHUNKING_SECONDS.labels("index")):
+            spans = self.chunker.spans(content, doc_id=rel, kind=StructuredChunker.kind_for(rel))
+        chunks = [content[s.start:s.end] for s in spans]
+        keys = [content_hash(chunk) for chunk in chunks]
+        if self.embedding is not None:
+            try:
+                self.embedding.embed_documents(chunks, keys)
+            except Exception as e:
+                # Fehlende Embeddings werden bei der ersten Anfrage nachgeholt
+                logger.warning(f"Embedding {file_path} failed: {e}")
+        return IndexedDocument(
+            path=file_path,
+            size=stat[0],
+            mtime_ns=stat[1],
+            file_data=file_data,
+            spans=spans,
+            tokens=self.token_counter.count_many(chunks),
+            hashes=keys,
+        )
+
+    def _install(self, doc: IndexedDocument):
+        """Add a prepared document if its file is still unchanged and selected."""
+        rel = doc.relative_path
+        if self._stats.get(rel) != (doc.size, doc.mtime_ns) or rel in self._documents:
+            return
+        key = self._versions.key_of(rel)
+        if self.apply_version_filtering and (key is None or rel not in self._versions.selected(key)):
+            return
+        for key, chunk in zip(doc.keys, doc.chunks):
+            self.bm25.add(key, chunk)
+        if self.embedding is not None:
+            self.embedding.retain(doc.keys)
+        self._documents[rel] = doc
+        self.generation += 1
+        logger.debug(f"Indexed {doc.path}")
+
+    def _drop(self, rel: str):
+        if self._deferred is not None:
+            self._deferred.pop(rel, None)
+        doc = self._documents.pop(rel, None)
+        if doc is None:
+            return
+        if doc.lexical:
+            for key, chunk in zip(doc.keys, doc.chunks):
+                self.bm25.remove(key, chunk)
+            if self.embedding is not None:
+                # Gelöscht wird erst nach dem Indexieren, siehe _apply
+                self.embedding.release(doc.keys)
+        self.generation += 1
+
+
+def _version_entry(entry: Optional[VersionEntry]) -> Optional[Dict]:
+    if entry is None:
+        return None
+    version = entry.v_version or entry.x_version
+    return {
+        "path": entry.path,
+        "version": ".".join(map(str, version)),
+        "version_type": "V" if entry.is_released else "X",
+        "is_released": entry.is_released,
+    }
+
+
+def _encode_cursor(rel: str) -> str:
+    return base64.urlsafe_b64encode(rel.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class CorpusWatcher:
+    """
+    Keeps directory indexes current.
+
+    Uses a native watchdog observer where available and falls back to
+    periodically reconciling the indexes with the filesystem. Events are
+    queued and applied by a single worker thread, so bursts of events for
+    the same file are collapsed. File events update single files; a created,
+    moved or deleted directory reconciles only its subtree. Modified events
+    of directories (fired for the parent of every created or deleted file)
+    are ignored.
+    """
+
+    def __init__(
+        self,
+        indexes: Iterable[DirectoryIndex],
+        mode: str = "auto",
+        poll_interval: float = 10.0,
+        debounce: float = 0.5,
+    ):
+        self.indexes = list(indexes)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.active_mode: Optional[str] = None
+
+        self._pending: Dict[Path, DirectoryIndex] = {}
+        # geänderte Verzeichnisse: nur deren Teilbaum wird abgeglichen
+        self._subtrees: Dict[Path, DirectoryIndex] = {}
+        self._full_reconcile = False
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self.mode == "off":
+            self.active_mode = "off"
+            return
+
+        if self.mode in ("auto", "native") and self._start_observer():
+            self.active_mode = "native"
+        elif self.mode == "native":
+            raise RuntimeError("Native file watching is not available")
+        else:
+            self.active_mode = "polling"
+            self._spawn(self._poll_loop, "corpus-poller")
+
+        self._spawn(self._worker_loop, "corpus-watcher")
+        logger.info(f"Corpus watcher started ({self.active_mode})")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def notify(self, path: Path, is_directory: bool = False):
+        """Queue a changed file, or a changed directory whose subtree is reconciled."""
+        index = self._index_for(Path(path))
+        if index is None:
+            return
+        # Änderungen in node_modules, .git usw. lösen keinen Abgleich aus
+        if Path(path) != index.directory and index.doc_service.is_ignored(index.directory, Path(path)):
+            return
+        with self._pending_lock:
+            if is_directory:
+                self._subtrees[Path(path)] = index
+            else:
+                self._pending[Path(path)] = index
+        self._wakeup.set()
+
+    def _start_observer(self) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("opened", "closed_no_write"):
+                    return
+                # Kommt für das Elternverzeichnis jeder neuen/gelöschten Datei
+                if event.is_directory and event.event_type == "modified":
+                    return
+                watcher.notify(Path(event.src_path), event.is_directory)
+                dest = getattr(event, "dest_path", None)
+                if dest:
+                    watcher.notify(Path(dest), event.is_directory)
+
+        try:
+            observer = Observer()
+            for index in self.indexes:
+                if index.directory.exists():
+                    observer.schedule(Handler(), str(index.directory), recursive=True)
+            observer.start()
+        except Exception as e:
+            logger.warning(f"Native file watching unavailable, falling back to polling: {e}")
+            return False
+
+        self._observer = observer
+        return True
+
+    def _index_for(self, path: Path) -> Optional[DirectoryIndex]:
+        for index in self.indexes:
+            if path == index.directory or index.directory in path.parents:
+                return index
+        return None
+
+    def _spawn(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            with self._pending_lock:
+                self._full_reconcile = True
+            self._wakeup.set()
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            if self._stop.is_set():
+                break
+            # Kurz warten, damit zusammengehörige Events gebündelt werden
+            time.sleep(self.debounce)
+            with self._pending_lock:
+                self._wakeup.clear()
+                pending, self._pending = self._pending, {}
+                subtrees, self._subtrees = self._subtrees, {}
+                full, self._full_reconcile = self._full_reconcile, False
+
+            try:
+                if full:
+                    for index in self.indexes:
+                        index.reconcile()
+                    continue
+                for path, index in subtrees.items():
+                    index.reconcile(path)
+                for path, index in pending.items():
+                    if any(path == tree or tree in path.parents for tree in subtrees):
+                        continue
+                    if path.is_file():
+                        index.update(path)
+                    else:
+                        index.remove(path)
+            except Exception as e:
+                logger.error(f"Error applying corpus changes: {e}", exc_info=True)
+
+
+class CorpusIndex:
+    """Corpus index over all configured document directories."""
+
+    def __init__(
+        self,
+        doc_service: DocumentService,
+        directories: Iterable[Path],
+        apply_version_filtering: bool = True,
+        embedding: Optional[EmbeddingRetriever] = None,
+        token_counter: Optional[TokenCounter] = None,
+        store_dir: Optional[Path] = None,
+    ):
+        self.doc_service = doc_service
+        self.embedding = embedding
+        self.token_counter = token_counter or HeuristicCounter()
+        self.store_dir = Path(store_dir) if store_dir is not None else None
+        # Ein gemeinsamer BM25-Index, damit Scores verzeichnisübergreifend vergleichbar sind
+        self.bm25 = BM25Index()
+        self._indexes = {
+            Path(d): DirectoryIndex(
+                d,
+                doc_service,
+                apply_version_filtering=apply_version_filtering,
+                bm25=self.bm25,
+                embedding=embedding,
+                token_counter=self.token_counter,
+            )
+            for d in directories
+        }
+        self.watcher: Optional[CorpusWatcher] = None
+        self._catch_up: Optional[threading.Thread] = None
+
+    def get(self, directory: Path) -> DirectoryIndex:
+        return self._indexes[Path(directory)]
+
+    def indexes(self) -> List[DirectoryIndex]:
+        return list(self._indexes.values())
+
+    @property
+    def generation(self) -> int:
+        return sum(index.generation for index in self._indexes.values())
+
+    def start(self, watch_mode: str = "auto", poll_interval: float = 10.0):
+        """
+        Build all directory indexes and start watching for changes.
+
+        With a store directory, saved snapshots are loaded instead of
+        rescanning; BM25 warm-up and the reconcile with the filesystem then
+        run in the background.
+        """
+        loaded = []
+        for index in self._indexes.values():
+            store = open_corpus_store(self._store_path(index)) if self.store_dir else None
+            if store is not None and index.load(store):
+                loaded.append(index)
+                continue
+            index.build()
+            self._save(index)
+
+        if loaded:
+            self._catch_up = threading.Thread(
+                target=self._catch_up_loaded, args=(loaded,), name="corpus-catch-up", daemon=True
+            )
+            self._catch_up.start()
+
+        self.watcher = CorpusWatcher(
+            self._indexes.values(), mode=watch_mode, poll_interval=poll_interval
+        )
+        self.watcher.start()
+
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self._catch_up is not None:
+            self._catch_up.join()
+            self._catch_up = None
+        self.save()
+
+    def save(self):
+        """Write all indexes to their corpus stores (no-op without a store directory)."""
+        for index in self._indexes.values():
+            self._save(index)
+
+    def _save(self, index: DirectoryIndex):
+        if self.store_dir is None:
+            return
+        try:
+            index.save(self._store_path(index))
+        except OSError as e:
+            logger.warning(f"Could not save corpus store for {index.directory}: {e}")
+
+    def _store_path(self, index: DirectoryIndex) -> Path:
+        return store_path(self.store_dir, index.directory)
+
+    def _catch_up_loaded(self, indexes: List[DirectoryIndex]):
+        for index in indexes:
+            try:
+                index.warm()
+                if index.reconcile():
+                    self._save(index)
+            except Exception as e:
+                logger.error(f"Catching up {index.directory} failed: {e}", exc_info=True)
+
+    def refresh(self) -> int:
+        """Reconcile all indexes with the filesystem; returns the number of changes."""
+        return sum(index.reconcile() for index in self._indexes.values())
+
+
+def create_corpus_index(
+    doc_service: DocumentService,
+    embedding: Optional[EmbeddingRetriever] = None,
+    token_counter: Optional[TokenCounter] = None,
+) -> CorpusIndex:
+    return CorpusIndex(
+        doc_service,
+        [settings.PROJECT_DIR, settings.REFERENCE_DIR],
+        apply_version_filtering=settings.ENABLE_VERSION_FILTERING,
+        embedding=embedding,
+        token_counter=token_counter,
+        store_dir=settings.CORPUS_STORE_DIR if settings.CORPUS_STORE_ENABLED else None,
+    )
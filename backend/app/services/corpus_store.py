@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCPCORP2"
+_HEADER = struct.Struct("<8sQQ")  # magic, meta length, chunk rows
+# start, end (Zeichen-Offsets im Dokument), Byte-Offsets im Dokument-Blob, tokens
+_ROW = 5
+
+
+class CorpusStore:
+    """
+    Read-only, memory-mapped snapshot of an indexed directory.
+
+    One file holds a JSON metadata table (file stats, version groups,
+    document metadata), an int64 chunk table (character and byte offsets
+    into the document text and token count per chunk) and one contiguous
+    UTF-8 text blob. The file is opened with ``mmap`` and the chunk table is
+    a view into it, so several worker processes share the page cache
+    instead of each holding the corpus on its heap. The byte offsets let
+    ``chunk`` decode a single chunk without touching the rest of the
+    document.
+
+    Layout::
+
+        MAGIC | meta length | chunk rows | meta JSON | pad to 8 | chunk table | text blob
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, meta_len, rows = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a corpus store")
+
+        start = _HEADER.size
+        self.meta: Dict = json.loads(self._mmap[start:start + meta_len])
+        table_offset = _align(start + meta_len)
+        self._table = np.frombuffer(
+            self._mmap, dtype="<i8", count=rows * _ROW, offset=table_offset
+        ).reshape(rows, _ROW)
+        self._blob_offset = table_offset + rows * _ROW * 8
+
+    def text(self, start: int, end: int) -> str:
+        """Decode a byte range of the text blob."""
+        return self._mmap[self._blob_offset + start:self._blob_offset + end].decode("utf-8")
+
+    def chunk(self, row: int, text_start: int) -> str:
+        """Decode one chunk of the document whose text starts at byte ``text_start``."""
+        start, end = self._table[row, 2:4].tolist()
+        return self.text(text_start + start, text_start + end)
+
+    def offsets(self, first: int, count: int) -> List[Tuple[int, int]]:
+        return [tuple(row) for row in self._table[first:first + count, :2].tolist()]
+
+    def tokens(self, first: int, count: int) -> List[int]:
+        return self._table[first:first + count, 4].tolist()
+
+    def close(self):
+        # Die Tabelle ist eine View auf die Map und muss vorher freigegeben werden
+        self._table = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @staticmethod
+    def write(path: Path, meta: Dict, documents: Iterable[Tuple[str, List[Tuple[int, int]], List[int]]]):
+        """
+        Write a store atomically.
+
+        Args:
+            path: Target file; replaced only once the new file is complete
+            meta: Metadata; a ``documents`` list is filled in here
+            documents: (text, chunk offsets, chunk token counts) per entry of
+                ``meta["documents"]``, in the same order
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        rows: List[List[int]] = []
+        blobs: List[bytes] = []
+        blob_size = 0
+        for entry, (text, offsets, tokens) in zip(meta["documents"], documents):
+            data = text.encode("utf-8")
+            entry["text"] = [blob_size, blob_size + len(data)]
+            entry["chunks"] = [len(rows), len(offsets)]
+            rows.extend(
+                [start, end, byte_start, byte_end, n]
+                for (start, end), (byte_start, byte_end), n in zip(offsets, _byte_offsets(text, offsets), tokens)
+            )
+            blobs.append(data)
+            blob_size += len(data)
+
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        table = np.asarray(rows, dtype="<i8").reshape(-1, _ROW)
+        padding = _align(_HEADER.size + len(meta_bytes)) - _HEADER.size - len(meta_bytes)
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, len(meta_bytes), len(table)))
+                f.write(meta_bytes)
+                f.write(b"\0" * padding)
+                f.write(table.tobytes())
+                for data in blobs:
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # Laufende Worker behalten ihre Map auf die alte Datei
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def store_path(store_dir: Path, directory: Path) -> Path:
+    """Store file for a document directory."""
+    key = hashlib.sha1(str(Path(directory).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(store_dir) / f"{key}.corpus"
+
+
+def open_corpus_store(path: Path) -> Optional[CorpusStore]:
+    """Open a store, or None if it is missing or unreadable."""
+    if not Path(path).exists():
+        return None
+    try:
+        return CorpusStore(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Ignoring unreadable corpus store {path}: {e}")
+        return None
+
+
+def _byte_offsets(text: str, offsets: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """UTF-8 byte positions of character offsets, in one pass over the text."""
+    if text.isascii():
+        return list(offsets)
+    positions = {}
+    chars = nbytes = 0
+    for point in sorted({p for span in offsets for p in span}):
+        nbytes += len(text[chars:point].encode("utf-8"))
+        chars = point
+        positions[point] = nbytes
+    return [(positions[start], positions[end]) for start, end in offsets]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
@@ -1,15 +1,18 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+import multiprocessing
+from itertools import islice
 from datetime import datetime
 import logging
 
 from .version_handler import VersionHandler
-from utils.file_extractors import (
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    extract_text_from_xlsx,
-    extract_text_from_pptx
-)
+from .extraction_cache import ExtractionCache
+from core import tracing
+from core.metrics import EXTRACTION_SECONDS, file_type
+from utils.file_extractors import extract_text, extract_file
+from utils.file_walker import DEFAULT_IGNORE_PATTERNS, IgnoreRules, WalkEntry, walk
 
 logger = logging.getLogger(__name__)
 
@@ -23,35 +26,278 @@ class DocumentService:
         '.h', '.cs', '.go', '.rs', '.json', '.yaml', '.yml'
     }
     
-    def __init__(self):
+    # .gitignore-artige Ausschlüsse, pro Verzeichnis-Wurzel
+    IGNORE_FILE = '.mcpignore'
+    
+    def __init__(
+        self,
+        extraction_cache: Optional[ExtractionCache] = None,
+        max_workers: int = 1,
+        ignore_patterns: Optional[List[str]] = None,
+        max_depth: Optional[int] = None
+    ):
         self.version_handler = VersionHandler()
+        self.extraction_cache = extraction_cache
+        self.max_workers = max_workers
+        self.ignore_patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        self.max_depth = max_depth
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._ignore_rules: Dict[Path, tuple] = {}
     
     def extract_text_from_file(self, file_path: Path) -> str:
         """Extract text from any supported file."""
         try:
+            if self.extraction_cache is not None:
+                return self.extraction_cache.get_or_extract(
+                    file_path,
+                    lambda content: self.extract_text_from_content(file_path.name, content)
+                )
+            
             with open(file_path, 'rb') as f:
                 content = f.read()
             
-            filename = file_path.name.lower()
-            
-            if filename.endswith('.pdf'):
-                return extract_text_from_pdf(content)
-            elif filename.endswith('.docx'):
-                return extract_text_from_docx(content)
-            elif filename.endswith('.xlsx') or filename.endswith('.xls'):
-                return extract_text_from_xlsx(content)
-            elif filename.endswith('.pptx'):
-                return extract_text_from_pptx(content)
-            elif filename.endswith(('.txt', '.md', '.py', '.js', '.java', 
-                                   '.cpp', '.c', '.h', '.cs', '.go', '.rs',
-                                   '.json', '.yaml', '.yml')):
-                return content.decode('utf-8', errors='ignore')
-            else:
-                return f"[Unsupported file type: {filename}]"
+            return self.extract_text_from_content(file_path.name, content)
                 
         except Exception as e:
-            logger.error(f"Error reading {file_path.name}: {e}")
-            return f"[Error reading {file_path.name}: {str(e)}]"
+            return self._error_text(file_path, e)
+    
+    @staticmethod
+    def extract_text_from_content(filename: str, content: bytes) -> str:
+        """Extract text from raw file content, dispatching on the file name."""
+        tracing.count("files_extracted")
+        with tracing.span("extract", EXTRACTION_SECONDS.labels(file_type(filename))):
+            return extract_text(filename, content)
+    
+    @staticmethod
+    def _record_extraction(file_path: Path, seconds: float):
+        """Record an extraction measured in a worker process."""
+        tracing.count("files_extracted")
+        tracing.record("extract", seconds, EXTRACTION_SECONDS.labels(file_type(file_path.name)))
+    
+    def extract_many(self, file_paths: List[Path]) -> List[str]:
+        """
+        Extract several files, on the process pool if one is configured.
+        
+        Cache lookups happen in this process; only misses are sent to the
+        workers. Failing files yield the same error placeholder as
+        extract_text_from_file and do not affect the others. If a worker
+        dies (segfault, OOM), the files still pending are retried one by
+        one on a fresh pool, so only the file that crashes it gets the
+        placeholder.
+        
+        Args:
+            file_paths: Files to extract
+            
+        Returns:
+            Extracted texts in the order of file_paths
+        """
+        if self.max_workers <= 1 or len(file_paths) < 2:
+            return [self.extract_text_from_file(p) for p in file_paths]
+        
+        results: List[Optional[str]] = [None] * len(file_paths)
+        pending = {}
+        pool = self._get_pool()
+        
+        for i, file_path in enumerate(file_paths):
+            try:
+                stat = file_path.stat()
+                if self.extraction_cache is not None:
+                    results[i] = self.extraction_cache.lookup(file_path, stat)
+                    if results[i] is not None:
+                        continue
+                try:
+                    pending[i] = (stat, pool.submit(extract_file, str(file_path)))
+                except BrokenProcessPool:
+                    pending[i] = (stat, None)
+            except Exception as e:
+                results[i] = self._error_text(file_path, e)
+        
+        crashed = []
+        for i, (stat, future) in pending.items():
+            file_path = file_paths[i]
+            if future is None:
+                crashed.append(i)
+                continue
+            try:
+                results[i] = self._finish_extraction(file_path, stat, future.result())
+            except BrokenProcessPool:
+                crashed.append(i)
+            except Exception as e:
+                results[i] = self._error_text(file_path, e)
+        
+        if crashed:
+            # Ein abgestürzter Worker reißt alle offenen Aufträge mit; welche Datei
+            # schuld war, ist unbekannt. Deshalb einzeln in frischen Pools wiederholen.
+            self._discard_pool()
+            for i in crashed:
+                file_path = file_paths[i]
+                try:
+                    results[i] = self._extract_on_pool(file_path, pending[i][0])
+                except BrokenProcessPool as e:
+                    self._discard_pool()
+                    results[i] = self._error_text(file_path, e)
+                except Exception as e:
+                    results[i] = self._error_text(file_path, e)
+        
+        return results
+    
+    def extract_or_raise(self, file_path: Path) -> str:
+        """
+        Extract a single file, raising instead of returning an error placeholder.
+        
+        Uses the extraction cache and, if configured, the process pool, so
+        large uploads are parsed outside the server process.
+        """
+        if self.max_workers <= 1:
+            if self.extraction_cache is not None:
+                return self.extraction_cache.get_or_extract(
+                    file_path,
+                    lambda content: self.extract_text_from_content(file_path.name, content)
+                )
+            return self.extract_text_from_content(file_path.name, file_path.read_bytes())
+        
+        stat = file_path.stat()
+        if self.extraction_cache is not None:
+            text = self.extraction_cache.lookup(file_path, stat)
+            if text is not None:
+                return text
+        try:
+            return self._extract_on_pool(file_path, stat)
+        except BrokenProcessPool:
+            self._discard_pool()
+            raise
+    
+    def _extract_on_pool(self, file_path: Path, stat) -> str:
+        """Extract one file on the pool and wait for it."""
+        future = self._get_pool().submit(extract_file, str(file_path))
+        return self._finish_extraction(file_path, stat, future.result())
+    
+    def _finish_extraction(self, file_path: Path, stat, result) -> str:
+        """Record and cache the (text, digest, seconds) result of a worker."""
+        text, digest, seconds = result
+        self._record_extraction(file_path, seconds)
+        if self.extraction_cache is not None:
+            self.extraction_cache.store(file_path, stat, digest, text)
+        return text
+    
+    def close(self):
+        """Shut down the extraction worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+    
+    def _discard_pool(self):
+        """Shut down a broken pool; the next call starts a fresh one."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn statt fork: der Prozess hat bereits Threads (Watcher, Event-Loop)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    @staticmethod
+    def _error_text(file_path: Path, error: Exception) -> str:
+        logger.error(f"Error reading {file_path.name}: {error}")
+        return f"[Error reading {file_path.name}: {str(error)}]"
+    
+    def walk_supported_files(self, directory: Path, subdirectory: Optional[Path] = None) -> Iterator[WalkEntry]:
+        """
+        Stream the supported files below directory with their stat data.
+        
+        Applies the ignore patterns (plus the directory's ``.mcpignore``)
+        and the depth limit; stopping the iteration stops the walk. With
+        ``subdirectory`` (relative to directory) only that subtree is walked.
+        """
+        return walk(
+            directory,
+            extensions=self.SUPPORTED_EXTENSIONS,
+            ignore=self.ignore_rules(directory),
+            max_depth=self.max_depth,
+            subdirectory=Path(subdirectory).as_posix() if subdirectory is not None else None
+        )
+    
+    def list_supported_files(self, directory: Path) -> List[Path]:
+        """List all files with a supported extension below directory."""
+        return [entry.path for entry in self.walk_supported_files(directory)]
+    
+    def ignore_rules(self, directory: Path) -> IgnoreRules:
+        """Ignore rules of a directory; reloaded when its ignore file changes."""
+        ignore_file = Path(directory) / self.IGNORE_FILE
+        try:
+            mtime = ignore_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = self._ignore_rules.get(Path(directory))
+        if cached is None or cached[0] != mtime:
+            rules = IgnoreRules.from_file(ignore_file, self.ignore_patterns)
+            cached = self._ignore_rules[Path(directory)] = (mtime, rules)
+        return cached[1]
+    
+    def is_ignored(self, directory: Path, file_path: Path) -> bool:
+        """Whether a path below directory is excluded by ignore rules or depth limit."""
+        try:
+            rel = Path(file_path).relative_to(directory)
+        except ValueError:
+            return True
+        if self.max_depth is not None and len(rel.parts) - 1 > self.max_depth:
+            return True
+        return self.ignore_rules(directory).excludes(rel.as_posix())
+    
+    def process_file(
+        self,
+        file_path: Path,
+        directory: Path,
+        content: Optional[str] = None
+    ) -> Dict:
+        """
+        Extract a single file and collect its metadata.
+        
+        Args:
+            file_path: File to process
+            directory: Root directory the relative path is computed against
+            content: Already extracted text, skips extraction if given
+            
+        Returns:
+            File dict as listed by scan_directory
+        """
+        stat = file_path.stat()
+        if content is None:
+            content = self.extract_text_from_file(file_path)
+        relative_path = file_path.relative_to(directory)
+        
+        file_data = {
+            "name": file_path.name,
+            "path": str(relative_path),
+            "size": stat.st_size,
+            "content": content,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        }
+        file_data.update(self.version_metadata(file_path.name))
+        return file_data
+    
+    def version_metadata(self, filename: str) -> Dict:
+        """Return version, is_released and version_type for a filename."""
+        version_info = self.version_handler.parse_version_from_filename(filename)
+        
+        if version_info['has_v']:
+            return {
+                "version": '.'.join(map(str, version_info['v_version'])),
+                "is_released": True,
+                "version_type": "V",
+            }
+        if version_info['has_x']:
+            return {
+                "version": '.'.join(map(str, version_info['x_version'])),
+                "is_released": False,
+                "version_type": "X",
+            }
+        return {"version": None, "is_released": False, "version_type": None}
     
     def scan_directory(
         self, 
@@ -74,69 +320,26 @@ class DocumentService:
             logger.warning(f"Directory does not exist: {directory}")
             return {"files": [], "total_size": 0, "file_count": 0}
         
-        # Collect all supported files
-        all_files = []
-        for file_path in directory.rglob('*'):
-            if file_path.is_file():
-                if file_path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
-                    all_files.append(file_path)
-        
-        logger.info(f"Found {len(all_files)} supported files in {directory}")
-        
-        # Apply version filtering if enabled
+        # Ohne Versionsfilter bricht der Scan nach max_files Dateien ab
+        entries = self.walk_supported_files(directory)
         if apply_version_filtering:
-            selected_files = self.version_handler.select_latest_versions(all_files)
+            all_files = [entry.path for entry in entries]
+            logger.info(f"Found {len(all_files)} supported files in {directory}")
+            selected_files = self.version_handler.select_latest_versions(all_files)[:max_files]
         else:
-            selected_files = all_files
-        
-        # Limit to max_files
-        selected_files = selected_files[:max_files]
+            selected_files = [entry.path for entry in islice(entries, max_files)]
         
         # Process files
         files = []
         total_size = 0
         
-        for file_path in selected_files:
+        contents = self.extract_many(selected_files)
+        
+        for file_path, content in zip(selected_files, contents):
             try:
-                size = file_path.stat().st_size
-                content = self.extract_text_from_file(file_path)
-                relative_path = file_path.relative_to(directory)
-                
-                # Parse version for metadata
-                version_info = self.version_handler.parse_version_from_filename(
-                    file_path.name
-                )
-                
-                file_data = {
-                    "name": file_path.name,
-                    "path": str(relative_path),
-                    "size": size,
-                    "content": content,
-                    "modified": datetime.fromtimestamp(
-                        file_path.stat().st_mtime
-                    ).isoformat(),
-                }
-                
-                # Add version metadata if present
-                if version_info['has_v']:
-                    file_data["version"] = '.'.join(
-                        map(str, version_info['v_version'])
-                    )
-                    file_data["is_released"] = True
-                    file_data["version_type"] = "V"
-                elif version_info['has_x']:
-                    file_data["version"] = '.'.join(
-                        map(str, version_info['x_version'])
-                    )
-                    file_data["is_released"] = False
-                    file_data["version_type"] = "X"
-                else:
-                    file_data["version"] = None
-                    file_data["is_released"] = False
-                    file_data["version_type"] = None
-                
+                file_data = self.process_file(file_path, directory, content)
                 files.append(file_data)
-                total_size += size
+                total_size += file_data["size"]
                 
             except Exception as e:
                 logger.error(f"Error processing {file_path}: {e}")
@@ -0,0 +1,271 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from core.config import settings
+from utils.file_extractors import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Persistent on-disk cache for extracted document text.
+
+    Files are looked up by path, size and mtime first, so unchanged files are
+    served without reading them. If the stat data changed, the content hash
+    decides: touched or renamed files with identical bytes are still a hit.
+    Extracted texts are stored once per content hash and evicted in LRU order
+    once the cache grows beyond ``max_bytes``.
+
+    The cache records the extractor version it was filled with and is
+    emptied on open if the extractors have changed since.
+    """
+
+    DB_NAME = "extraction_cache.sqlite3"
+
+    def __init__(self, directory: Path, max_bytes: int = 512 * 1024 * 1024, version: int = EXTRACTOR_VERSION):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.directory / self.DB_NAME),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " digest TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            " digest TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " nbytes INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS texts_last_access ON texts(last_access)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL)"
+        )
+        self._check_version()
+
+        self._total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM texts"
+        ).fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_extract(self, file_path: Path, extract: Callable[[bytes], str]) -> str:
+        """
+        Return the cached text for ``file_path`` or extract and store it.
+
+        Args:
+            file_path: File to extract
+            extract: Function turning the raw file content into text
+
+        Returns:
+            Extracted text
+        """
+        key = str(file_path.resolve())
+        stat = file_path.stat()
+
+        text = self._lookup_stat(key, stat)
+        if text is not None:
+            return text
+
+        content = file_path.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        text = self._lookup_digest(key, stat, digest)
+        if text is not None:
+            return text
+
+        # Extraction runs outside the lock; failures propagate and are not cached
+        text = extract(content)
+        self._put(key, stat, digest, text)
+        return text
+
+    def lookup(self, file_path: Path, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """
+        Return the cached text for ``file_path`` without extracting.
+
+        Falls back to hashing the file content if its stat data changed.
+        A None result counts as miss; the caller is expected to extract the
+        file elsewhere and hand the result to ``store``.
+        """
+        key = str(file_path.resolve())
+        stat = stat or file_path.stat()
+
+        text = self._lookup_stat(key, stat)
+        if text is not None:
+            return text
+
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        text = self._lookup_digest(key, stat, digest)
+        if text is None:
+            with self._lock:
+                self.misses += 1
+        return text
+
+    def store(self, file_path: Path, stat: os.stat_result, digest: str, text: str):
+        """Store text extracted from a file with the given stat data and content digest."""
+        with self._lock:
+            self._store(str(file_path.resolve()), stat, digest, text)
+
+    def _lookup_stat(self, key: str, stat) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT t.digest, t.text FROM files f JOIN texts t ON t.digest = f.digest"
+                " WHERE f.path = ? AND f.size = ? AND f.mtime_ns = ?",
+                (key, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+            if not row:
+                return None
+            self._touch(row[0])
+            self.hits += 1
+            return row[1]
+
+    def _lookup_digest(self, key: str, stat, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text FROM texts WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not row:
+                return None
+            self._remember_file(key, stat, digest)
+            self._touch(digest)
+            self.hits += 1
+            return row[0]
+
+    def _put(self, key: str, stat, digest: str, text: str):
+        with self._lock:
+            self.misses += 1
+            self._store(key, stat, digest, text)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and size information."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM files")
+            self._db.execute("DELETE FROM texts")
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _check_version(self):
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'extractor_version'"
+        ).fetchone()
+        if row is not None and row[0] == str(self.version):
+            return
+        # Texte eines älteren Extraktors (oder ohne Versionseintrag) sind veraltet
+        self._db.execute("BEGIN")
+        try:
+            self._db.execute("DELETE FROM files")
+            self._db.execute("DELETE FROM texts")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('extractor_version', ?)",
+                (str(self.version),),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        if row is not None:
+            logger.info(f"Extraction cache {self.directory} cleared: extractor version {row[0]} -> {self.version}")
+
+    def _touch(self, digest: str):
+        self._db.execute(
+            "UPDATE texts SET last_access = ? WHERE digest = ?", (time.time(), digest)
+        )
+
+    def _remember_file(self, key: str, stat, digest: str):
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (key, stat.st_size, stat.st_mtime_ns, digest),
+        )
+
+    def _store(self, key: str, stat, digest: str, text: str):
+        nbytes = len(text.encode("utf-8"))
+        if nbytes > self.max_bytes:
+            logger.debug(f"Not caching {key}: {nbytes} bytes exceed cache size")
+            return
+
+        self._db.execute("BEGIN")
+        try:
+            exists = self._db.execute(
+                "SELECT 1 FROM texts WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not exists:
+                self._db.execute(
+                    "INSERT INTO texts (digest, text, nbytes, last_access) VALUES (?, ?, ?, ?)",
+                    (digest, text, nbytes, time.time()),
+                )
+                self._total_bytes += nbytes
+            self._remember_file(key, stat, digest)
+            self._evict()
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT digest, nbytes FROM texts ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if not row:
+                break
+            digest, nbytes = row
+            self._db.execute("DELETE FROM texts WHERE digest = ?", (digest,))
+            self._db.execute("DELETE FROM files WHERE digest = ?", (digest,))
+            self._total_bytes -= nbytes
+            self.evictions += 1
+
+
+def open_extraction_cache() -> Optional[ExtractionCache]:
+    """Create the configured extraction cache, or None if disabled/unavailable."""
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    try:
+        return ExtractionCache(
+            settings.EXTRACTION_CACHE_DIR,
+            max_bytes=settings.EXTRACTION_CACHE_MAX_BYTES,
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Extraction cache disabled: {e}")
+        return None
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from core.config import settings
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_API_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+def _model_names(tags: Dict) -> set:
+    """Model names reported by Ollama, with and without the ``:latest`` tag."""
+    names = set()
+    for model in tags.get("models", []):
+        name = model.get("name") or model.get("model") or ""
+        names.add(name)
+        if name.endswith(":latest"):
+            names.add(name[: -len(":latest")])
+    return names
+
+
+class HealthChecker:
+    """
+    Probes the backends the API depends on and caches the result.
+
+    Every ``ttl`` seconds at most one probe round runs; concurrent health
+    requests share it, so load balancers and the frontend polling ``/health``
+    do not multiply the requests sent to Ollama or the Anthropic API.
+    """
+
+    def __init__(self, corpus_index=None, response_cache=None, ttl: float = 15.0, timeout: float = 2.0):
+        self.corpus_index = corpus_index
+        self.response_cache = response_cache
+        self.ttl = ttl
+        self.timeout = timeout
+        self._flight = SingleFlight("health")
+        self._result: Optional[Dict] = None
+        self._checked = 0.0
+
+    async def check(self, client: httpx.AsyncClient, force: bool = False) -> Dict:
+        """Return the cached result, probing again once it is older than ``ttl``."""
+        if not force and self._result is not None and time.monotonic() - self._checked < self.ttl:
+            return self._result
+        return await self._flight.do("probe", lambda: self._probe(client))
+
+    async def _probe(self, client: httpx.AsyncClient) -> Dict:
+        ollama, claude = await asyncio.gather(self._probe_ollama(client), self._probe_claude(client))
+        backends = {
+            "ollama": ollama,
+            "claude": claude,
+            "embedding": self._embedding(ollama),
+            "corpus": self._corpus(),
+            "response_cache": self._response_cache(),
+        }
+        default_llm = "local" if settings.USE_LOCAL_LLM else "cloud"
+        required = ["ollama" if settings.USE_LOCAL_LLM else "claude", "corpus"]
+        if settings.EMBEDDING_MODEL:
+            required.append("embedding")
+        self._result = {
+            "status": "healthy" if all(backends[name]["ok"] for name in required) else "degraded",
+            "ollama_available": ollama["ok"],
+            "claude_available": claude["ok"],
+            "default_llm": default_llm,
+            "backends": backends,
+            "checked_at": time.time(),
+        }
+        self._checked = time.monotonic()
+        if self._result["status"] != "healthy":
+            failed = [name for name in required if not backends[name]["ok"]]
+            logger.warning(f"Health check degraded: {', '.join(failed)}")
+        return self._result
+
+    async def _probe_ollama(self, client: httpx.AsyncClient) -> Dict:
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"{settings.OLLAMA_HOST}/api/tags", timeout=self.timeout)
+            response.raise_for_status()
+            models = _model_names(response.json())
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__, "latency_ms": _ms(start)}
+        model_available = settings.LOCAL_MODEL in models
+        return {
+            # Erreichbar, aber ohne Modell kann Ollama keine Anfrage beantworten
+            "ok": model_available,
+            "model": settings.LOCAL_MODEL,
+            "model_available": model_available,
+            "models": sorted(models),
+            "latency_ms": _ms(start),
+        }
+
+    async def _probe_claude(self, client: httpx.AsyncClient) -> Dict:
+        if not settings.ANTHROPIC_API_KEY:
+            return {"ok": False, "error": "ANTHROPIC_API_KEY not configured"}
+        start = time.perf_counter()
+        try:
+            # Modellliste: authentifiziert, kostet aber keine Tokens
+            response = await client.get(
+                f"{ANTHROPIC_API_URL}/v1/models",
+                params={"limit": 1},
+                headers={"x-api-key": settings.ANTHROPIC_API_KEY, "anthropic-version": ANTHROPIC_VERSION},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__, "latency_ms": _ms(start)}
+        return {"ok": True, "latency_ms": _ms(start)}
+
+    def _embedding(self, ollama: Dict) -> Dict:
+        model = settings.EMBEDDING_MODEL
+        if not model:
+            return {"ok": True, "enabled": False}
+        available = model in ollama.get("models", ())
+        return {"ok": available, "enabled": True, "model": model, "model_available": available}
+
+    def _corpus(self) -> Dict:
+        if self.corpus_index is None:
+            return {"ok": True, "enabled": False}
+        watcher = self.corpus_index.watcher
+        directories = {
+            str(index.directory): {"built": index.built, "documents": len(index)}
+            for index in self.corpus_index.indexes()
+        }
+        return {
+            "ok": all(d["built"] for d in directories.values()),
+            "watcher": watcher.active_mode if watcher is not None else None,
+            "directories": directories,
+        }
+
+    def _response_cache(self) -> Dict:
+        if self.response_cache is None:
+            return {"ok": True, "enabled": False}
+        try:
+            stats = self.response_cache.stats()
+        except Exception as e:
+            return {"ok": False, "enabled": True, "error": str(e)}
+        return {"ok": True, "enabled": True, "backend": stats["backend"], "entries": stats["entries"]}
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from services.corpus_index import DirectoryIndex, IndexedDocument
+from services.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+_DOCUMENT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class IngestJob:
+    """Extraction and indexing of one uploaded file."""
+
+    id: str
+    filename: str
+    path: Path
+    size: int
+    status: str = "queued"  # queued | extracting | indexing | done | error
+    error: Optional[str] = None
+    pages: int = 0  # bereits extrahierte PDF-Seiten
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    # Handle für Chat-Anfragen, sobald der Job fertig ist
+    document: Optional[Dict] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "status": self.status,
+            "error": self.error,
+            "pages": self.pages,
+            "created": self.created,
+            "finished": self.finished,
+            "document": self.document,
+        }
+
+
+class IngestJobManager:
+    """
+    Runs upload ingestion in the background.
+
+    Every upload lives in its own directory ``<upload dir>/<document id>/``
+    and is indexed by a ``DirectoryIndex`` over the upload directory, so
+    chat requests reference uploads by id instead of resending their text.
+    Finished jobs are kept for status queries up to ``max_jobs``; the
+    documents themselves stay available after the job is forgotten.
+
+    With a ``PageCache``, PDFs are extracted page by page through the cache.
+    Chat requests for an upload that is still being ingested read the same
+    pages lazily via ``pages`` instead of waiting for the job.
+    """
+
+    def __init__(self, index: DirectoryIndex, max_jobs: int = 1000, page_cache: Optional[PageCache] = None):
+        self.index = index
+        self.max_jobs = max_jobs
+        self.page_cache = page_cache
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def directory(self) -> Path:
+        return self.index.directory
+
+    def new_path(self, filename: str) -> Tuple[str, Path]:
+        """Reserve a document id and the target path for an upload."""
+        document_id = uuid.uuid4().hex
+        # Nur der Dateiname, keine Pfadanteile des Clients
+        name = Path(filename.replace("\\", "/")).name or "upload"
+        return document_id, self.directory / document_id / name
+
+    def submit(self, document_id: str, path: Path, size: int) -> IngestJob:
+        """Start extracting and indexing a fully written upload."""
+        job = IngestJob(id=document_id, filename=path.name, path=path, size=size)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            oldest, _ = next(iter(self._jobs.items()))
+            if oldest in self._tasks:
+                break
+            self._jobs.pop(oldest)
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def document(self, document_id: str) -> Optional[IndexedDocument]:
+        """Indexed document of an upload, or None for unknown or failed uploads."""
+        if not _DOCUMENT_ID.match(document_id):
+            return None
+        job = self._jobs.get(document_id)
+        if job is not None:
+            return self._document(job) if job.status == "done" else None
+        # Upload aus einem früheren Lauf
+        folder = self.directory / document_id
+        files = sorted(p for p in folder.iterdir() if p.is_file()) if folder.is_dir() else []
+        if not files:
+            return None
+        return self.index.get(self._relative(files[0]))
+
+    def pages(self, document_id: str) -> Optional[Iterator[str]]:
+        """Lazy pages of a PDF upload whose ingestion has not finished yet."""
+        job = self._jobs.get(document_id)
+        if job is None or job.status in ("done", "error") or not self._paged(job):
+            return None
+        return self.page_cache.pages(job.path)
+
+    async def wait(self, job_id: str):
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: IngestJob):
+        try:
+            job.status = "extracting"
+            if self._paged(job):
+                content = await asyncio.to_thread(self._extract_pages, job)
+            else:
+                content = await asyncio.to_thread(self.index.doc_service.extract_or_raise, job.path)
+            job.status = "indexing"
+            await asyncio.to_thread(self.index.update, job.path, content)
+            document = await asyncio.to_thread(self._document, job)
+            if document is None:
+                raise ValueError("Document could not be indexed")
+            job.document = {
+                "id": job.id,
+                "name": job.filename,
+                "size": job.size,
+                "chunks": len(document.spans),
+                "tokens": sum(document.chunk_tokens),
+            }
+            job.status = "done"
+            logger.info(f"Ingested upload {job.filename} ({job.size} bytes) as {job.id}")
+        except asyncio.CancelledError:
+            job.status = "error"
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Error ingesting upload {job.filename}: {e}")
+            job.status = "error"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            self._tasks.pop(job.id, None)
+
+    def _paged(self, job: IngestJob) -> bool:
+        return self.page_cache is not None and job.path.suffix.lower() == ".pdf"
+
+    def _extract_pages(self, job: IngestJob) -> str:
+        pages = []
+        for page in self.page_cache.pages(job.path):
+            pages.append(page)
+            job.pages = len(pages)
+        return "\n".join(pages)
+
+    def _document(self, job: IngestJob) -> Optional[IndexedDocument]:
+        return self.index.get(self._relative(job.path))
+
+    def _relative(self, path: Path) -> str:
+        return str(path.relative_to(self.directory))
@@ -1,6 +1,27 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 class LLMClient(ABC):
     @abstractmethod
     async def chat(self, prompt: str, system_prompt: str) -> dict:
         ...
+
+    async def aclose(self):
+        """Release connections held by the client."""
+
+    async def stream(self, prompt: str, system_prompt: str) -> AsyncIterator[dict]:
+        """
+        Stream the answer as events.
+
+        Yields {"type": "token", "text": ...} while generating and a final
+        {"type": "done", "model": ..., "llm_type": ..., "usage": ...}.
+        Clients without native streaming emit the full answer as one token.
+        """
+        result = await self.chat(prompt, system_prompt)
+        yield {"type": "token", "text": result["response"]}
+        yield {
+            "type": "done",
+            "model": result.get("model"),
+            "llm_type": result.get("llm_type"),
+            "usage": result.get("usage", {"input_tokens": 0, "output_tokens": 0}),
+        }
@@ -1,16 +1,45 @@
 import anthropic
+from core.config import settings
+from core.prompt import SystemPrompt
 from .base import LLMClient
 
 class ClaudeClient(LLMClient):
 
+    MODEL = "claude-sonnet-4-20250514"
+    MAX_TOKENS = 4000
+
     def __init__(self, api_key: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.model = self.MODEL
+        # Der Anthropic-Client hält seinen eigenen Keep-Alive-Pool
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, timeout=settings.LLM_TIMEOUT)
+
+    async def aclose(self):
+        await self.client.close()
+
+    @staticmethod
+    def _system(system_prompt: str):
+        # Stabiler Präfix als eigener Block mit Cache-Marker
+        if not isinstance(system_prompt, SystemPrompt) or not system_prompt.prefix_length:
+            return system_prompt
+        blocks = [{"type": "text", "text": system_prompt.prefix, "cache_control": {"type": "ephemeral"}}]
+        if system_prompt.suffix:
+            blocks.append({"type": "text", "text": system_prompt.suffix})
+        return blocks
+
+    @staticmethod
+    def _usage(usage) -> dict:
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        }
 
     async def chat(self, prompt: str, system_prompt: str) -> dict:
-        msg = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            system=system_prompt,
+        msg = await self.client.messages.create(
+            model=self.model,
+            max_tokens=self.MAX_TOKENS,
+            system=self._system(system_prompt),
             messages=[{"role": "user", "content": prompt}],
         )
 
@@ -18,4 +47,27 @@ class ClaudeClient(LLMClient):
             block.text for block in msg.content if block.type == "text"
         )
 
-        return {"response": text, "model": msg.model}
+        return {
+            "response": text,
+            "model": msg.model,
+            "llm_type": "cloud",
+            "usage": self._usage(msg.usage),
+        }
+
+    async def stream(self, prompt: str, system_prompt: str):
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=self.MAX_TOKENS,
+            system=self._system(system_prompt),
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                yield {"type": "token", "text": text}
+            msg = await stream.get_final_message()
+
+        yield {
+            "type": "done",
+            "model": msg.model,
+            "llm_type": "cloud",
+            "usage": self._usage(msg.usage),
+        }
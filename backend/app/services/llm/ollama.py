@@ -1,22 +1,76 @@
+import json
 import httpx
 from .base import LLMClient
 
 class OllamaClient(LLMClient):
 
-    def __init__(self, host: str, model: str):
+    def __init__(
+        self,
+        host: str,
+        model: str,
+        client: httpx.AsyncClient | None = None,
+        keep_alive: str | None = None,
+    ):
         self.host = host
         self.model = model
+        # Hält das Modell samt KV-Cache geladen; gleicher Prompt-Präfix wird dann nicht neu berechnet
+        self.keep_alive = keep_alive
+        # Ohne gemeinsamen Client wird ein eigener angelegt und wiederverwendet
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=600)
+
+    async def aclose(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+    def _payload(self, prompt: str, system_prompt: str, stream: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "prompt": f"System: {system_prompt}\n\nUser: {prompt}",
+            "stream": stream,
+        }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _usage(self, data: dict) -> dict:
+        return {
+            "input_tokens": data.get("prompt_eval_count", 0),
+            "output_tokens": data.get("eval_count", 0),
+        }
 
     async def chat(self, prompt: str, system_prompt: str) -> dict:
-        async with httpx.AsyncClient(timeout=600) as c:
-            r = await c.post(
-                f"{self.host}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": f"System: {system_prompt}\n\nUser: {prompt}",
-                    "stream": False,
-                }
-            )
+        r = await self.client.post(
+            f"{self.host}/api/generate",
+            json=self._payload(prompt, system_prompt, stream=False)
+        )
         r.raise_for_status()
         data = r.json()
-        return {"response": data["response"], "model": self.model}
+        return {
+            "response": data["response"],
+            "model": self.model,
+            "llm_type": "local",
+            "usage": self._usage(data),
+        }
+
+    async def stream(self, prompt: str, system_prompt: str):
+        async with self.client.stream(
+            "POST",
+            f"{self.host}/api/generate",
+            json=self._payload(prompt, system_prompt, stream=True)
+        ) as r:
+            r.raise_for_status()
+            # Ollama liefert eine JSON-Zeile pro Token-Batch
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield {"type": "token", "text": data["response"]}
+                if data.get("done"):
+                    yield {
+                        "type": "done",
+                        "model": self.model,
+                        "llm_type": "local",
+                        "usage": self._usage(data),
+                    }
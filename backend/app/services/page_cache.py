@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from core import tracing
+from utils.file_extractors import iter_pdf_pages
+
+# (resolved path, size, mtime_ns)
+FileKey = Tuple[str, int, int]
+
+
+class PageCache:
+    """
+    In-memory cache of extracted PDF pages.
+
+    ``pages`` yields a PDF page by page: cached pages are returned directly,
+    the parser is only started at the first missing page and only runs as
+    long as the consumer keeps pulling. Pages are keyed by path, size and
+    mtime, so a changed file is never served from stale pages. Entries are
+    evicted in LRU order once the cached text exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (file key, page number) -> text, älteste Nutzung zuerst
+        self._pages: "OrderedDict[Tuple[FileKey, int], str]" = OrderedDict()
+        # file key -> page count, sobald eine Datei einmal vollständig gelesen wurde
+        self._counts: Dict[FileKey, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def pages(self, file_path: Path) -> Iterator[str]:
+        """Yield the pages of a PDF, extracting only pages that are not cached."""
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+        number = 0
+        while True:
+            count = self._counts.get(key)
+            if count is not None and number >= count:
+                return
+            text = self._get(key, number)
+            if text is None:
+                break
+            yield text
+            number += 1
+
+        # Ab der ersten fehlenden Seite parsen, solange der Aufrufer weiterliest
+        for text in iter_pdf_pages(file_path.read_bytes(), start=number):
+            tracing.count("pages_extracted")
+            self._put(key, number, text)
+            yield text
+            number += 1
+        with self._lock:
+            self._counts[key] = number
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "pages": len(self._pages),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _get(self, key: FileKey, number: int) -> Optional[str]:
+        with self._lock:
+            text = self._pages.get((key, number))
+            if text is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end((key, number))
+            self.hits += 1
+            return text
+
+    def _put(self, key: FileKey, number: int, text: str):
+        with self._lock:
+            if (key, number) in self._pages:
+                return
+            self._pages[(key, number)] = text
+            self._bytes += len(text)
+            while self._bytes > self.max_bytes and self._pages:
+                (old_key, _), old = self._pages.popitem(last=False)
+                self._bytes -= len(old)
+                self._counts.pop(old_key, None)
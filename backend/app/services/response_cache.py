@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(message.casefold().split())
+
+
+def response_cache_key(message: str, context: str, model: str) -> str:
+    """
+    Cache key of a chat answer.
+
+    The context is part of the key, so any change of the documents that
+    ended up in the context yields a new key; answers built on the old
+    corpus are never served again and age out via TTL/LRU.
+    """
+    context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    raw = f"{model}\0{normalize_message(message)}\0{context_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Base class for chat response caches with TTL and LRU eviction."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process cache; entries are lost on restart and not shared between workers."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0):
+        super().__init__(max_entries, ttl)
+        self._lock = threading.Lock()
+        # key -> (expires, value), älteste Nutzung zuerst
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(entry[1])
+
+    def set(self, key: str, value: Dict):
+        # Als JSON abgelegt, damit Aufrufer die gecachte Antwort nicht verändern
+        data = json.dumps(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache in a SQLite file; survives restarts and is shared by all workers."""
+
+    DB_NAME = "response_cache.sqlite3"
+
+    def __init__(self, directory: Path, max_entries: int = 1000, ttl: float = 3600.0):
+        super().__init__(max_entries, ttl)
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(directory / self.DB_NAME),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + self.ttl, now),
+                )
+                self._db.execute("DELETE FROM responses WHERE expires < ?", (now,))
+                excess = self._count() - self.max_entries
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN"
+                        " (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions += excess
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Create the configured response cache, or None if disabled/unavailable."""
+    backend = settings.RESPONSE_CACHE_BACKEND
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return MemoryResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL)
+    if backend == "sqlite":
+        try:
+            return SQLiteResponseCache(
+                settings.RESPONSE_CACHE_DIR,
+                settings.RESPONSE_CACHE_MAX_ENTRIES,
+                settings.RESPONSE_CACHE_TTL,
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Response cache disabled: {e}")
+            return None
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
@@ -1,9 +1,9 @@
-import re
 from pathlib import Path
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import List, Dict
 import logging
 
+from .version_index import VersionIndex, base_filename, group_key, parse_versions
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,6 +11,9 @@ class VersionHandler:
     """
     Handles document versioning logic.
     Prefers released V-versions over draft X-versions.
+    
+    Stateless facade over ``VersionIndex``; long-lived indexes keep a
+    ``VersionIndex`` and update it per file instead.
     """
     
     @staticmethod
@@ -36,34 +39,14 @@ class VersionHandler:
                 'has_x': bool
             }
         """
-        # Patterns für V-Version (freigegeben) und X-Version (Entwurf)
-        v_pattern = r'[_\-\s]V(\d+)\.(\d+)(?:\.(\d+))?'
-        x_pattern = r'[_\-\s]X(\d+)\.(\d+)(?:\.(\d+))?'
-        
-        v_match = re.search(v_pattern, filename, re.IGNORECASE)
-        x_match = re.search(x_pattern, filename, re.IGNORECASE)
-        
-        result = {
+        v_version, x_version = parse_versions(filename)
+        return {
             'filename': filename,
-            'v_version': None,
-            'x_version': None,
-            'has_v': False,
-            'has_x': False
+            'v_version': v_version,
+            'x_version': x_version,
+            'has_v': v_version is not None,
+            'has_x': x_version is not None
         }
-        
-        if v_match:
-            major, minor, patch = v_match.groups()
-            result['v_version'] = (int(major), int(minor), int(patch or 0))
-            result['has_v'] = True
-            logger.debug(f"Found V-version in {filename}: {result['v_version']}")
-        
-        if x_match:
-            major, minor, patch = x_match.groups()
-            result['x_version'] = (int(major), int(minor), int(patch or 0))
-            result['has_x'] = True
-            logger.debug(f"Found X-version in {filename}: {result['x_version']}")
-        
-        return result
 
     @staticmethod
     def get_base_filename(filename: str) -> str:
@@ -81,24 +64,23 @@ class VersionHandler:
         Returns:
             Base filename without version tags
         """
-        # Remove version patterns (both V and X)
-        base = re.sub(
-            r'[_\-\s][VX]\d+\.\d+(?:\.\d+)?', 
-            '', 
-            filename, 
-            flags=re.IGNORECASE
-        )
-        
-        # Clean up double separators
-        base = re.sub(r'[_\-]{2,}', '_', base)
-        base = re.sub(r'^[_\-]+|[_\-]+$', '', base)
+        return base_filename(filename)
+
+    @classmethod
+    def get_group_key(cls, file_path: Path) -> str:
+        """
+        Key under which all versions of a document are grouped.
         
-        return base
+        Example: "docs/spec_V1.2.pdf" -> "spec.pdf"
+        """
+        return group_key(file_path)
 
     def select_latest_versions(self, files: List[Path]) -> List[Path]:
         """
         Select latest version of each document.
         
+        Builds a throwaway ``VersionIndex``; the input order is kept.
+        
         Logic:
         1. Group files by base name (without version)
         2. For each group:
@@ -112,55 +94,13 @@ class VersionHandler:
         Returns:
             List of selected file paths (latest versions only)
         """
-        # Group files by base name
-        file_groups = defaultdict(list)
-        
-        for file_path in files:
-            # Get base name without extension and version
-            base_name = self.get_base_filename(file_path.stem)
-            extension = file_path.suffix
-            full_base = f"{base_name}{extension}"
-            
-            version_info = self.parse_version_from_filename(file_path.name)
-            version_info['path'] = file_path
-            
-            file_groups[full_base].append(version_info)
-        
-        selected_files = []
-        
-        for base_name, versions in file_groups.items():
-            # Separate by version type
-            v_versions = [v for v in versions if v['has_v']]
-            x_versions = [v for v in versions if v['has_x'] and not v['has_v']]
-            no_versions = [v for v in versions if not v['has_v'] and not v['has_x']]
-            
-            if v_versions:
-                # Prefer latest V-version (released)
-                latest = max(v_versions, key=lambda x: x['v_version'])
-                selected_files.append(latest['path'])
-                logger.info(
-                    f"Selected V-version: {latest['path'].name} "
-                    f"(V{'.'.join(map(str, latest['v_version']))})"
-                )
-                
-            elif x_versions:
-                # Use latest X-version (draft)
-                latest = max(x_versions, key=lambda x: x['x_version'])
-                selected_files.append(latest['path'])
-                logger.info(
-                    f"Selected X-version: {latest['path'].name} "
-                    f"(X{'.'.join(map(str, latest['x_version']))})"
-                )
-                
-            elif no_versions:
-                # Include all files without version tags
-                for v in no_versions:
-                    selected_files.append(v['path'])
-                    logger.info(f"Selected file without version: {v['path'].name}")
+        index = VersionIndex.build(str(p) for p in files)
+        selected = set(index.select_all())
+        selected_files = [p for p in files if str(p) in selected]
         
-        logger.info(
+        logger.debug(
             f"Version filtering: {len(files)} files -> "
             f"{len(selected_files)} selected"
         )
         
-        return selected_files
\ No newline at end of file
+        return selected_files
@@ -0,0 +1,230 @@
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import PurePath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Version = Tuple[int, int, int]
+
+# V-Version (freigegeben) und X-Version (Entwurf), z.B. "spec_V1.2.pdf", "doc-X0.5.docx"
+_V_PATTERN = re.compile(r'[_\-\s]V(\d+)\.(\d+)(?:\.(\d+))?', re.IGNORECASE)
+_X_PATTERN = re.compile(r'[_\-\s]X(\d+)\.(\d+)(?:\.(\d+))?', re.IGNORECASE)
+_VERSION_TAG = re.compile(r'[_\-\s][VX]\d+\.\d+(?:\.\d+)?', re.IGNORECASE)
+_REPEATED_SEPARATORS = re.compile(r'[_\-]{2,}')
+_EDGE_SEPARATORS = re.compile(r'^[_\-]+|[_\-]+$')
+
+
+def _version(match: Optional[re.Match]) -> Optional[Version]:
+    if match is None:
+        return None
+    major, minor, patch = match.groups()
+    return (int(major), int(minor), int(patch or 0))
+
+
+def parse_versions(filename: str) -> Tuple[Optional[Version], Optional[Version]]:
+    """Return the V- and X-version of a filename (None if absent)."""
+    return _version(_V_PATTERN.search(filename)), _version(_X_PATTERN.search(filename))
+
+
+def base_filename(filename: str) -> str:
+    """Filename without version tags, e.g. "doc_X0.5_final" -> "doc_final"."""
+    base = _VERSION_TAG.sub('', filename)
+    base = _REPEATED_SEPARATORS.sub('_', base)
+    return _EDGE_SEPARATORS.sub('', base)
+
+
+def group_key(path: PurePath) -> str:
+    """Key under which all versions of a document are grouped ("docs/spec_V1.2.pdf" -> "spec.pdf")."""
+    return f"{base_filename(path.stem)}{path.suffix}"
+
+
+def _name_key(path: str) -> Tuple[str, str]:
+    """File name and group key of a path string, without building PurePath objects."""
+    name = path[max(path.rfind("/"), path.rfind(os.sep)) + 1:]
+    # Wie PurePath.suffix: kein Suffix für ".bashrc" oder "name."
+    dot = name.rfind(".")
+    if 0 < dot < len(name) - 1:
+        return name, base_filename(name[:dot]) + name[dot:]
+    return name, base_filename(name)
+
+
+@dataclass
+class VersionEntry:
+    """Version information of one file."""
+    path: str
+    v_version: Optional[Version] = None
+    x_version: Optional[Version] = None
+
+    @property
+    def is_released(self) -> bool:
+        return self.v_version is not None
+
+    @property
+    def is_draft(self) -> bool:
+        return self.x_version is not None and self.v_version is None
+
+
+@dataclass
+class VersionGroup:
+    """All versions of one document and the currently selected ones."""
+    key: str
+    entries: Dict[str, VersionEntry] = field(default_factory=dict)
+    released: Optional[VersionEntry] = None
+    draft: Optional[VersionEntry] = None
+
+    def selected(self) -> List[str]:
+        """Latest released version, else latest draft, else all unversioned files."""
+        if self.released is not None:
+            return [self.released.path]
+        if self.draft is not None:
+            return [self.draft.path]
+        return sorted(self.entries)
+
+    def history(self) -> List[VersionEntry]:
+        """Versioned entries, oldest first; released before draft on equal numbers."""
+        return sorted(
+            (e for e in self.entries.values() if e.v_version or e.x_version),
+            key=lambda e: (e.v_version or e.x_version, e.is_released, e.path),
+        )
+
+    def _offer(self, entry: VersionEntry):
+        if entry.is_released:
+            if self.released is None or _newer(entry, entry.v_version, self.released, self.released.v_version):
+                self.released = entry
+        elif entry.is_draft:
+            if self.draft is None or _newer(entry, entry.x_version, self.draft, self.draft.x_version):
+                self.draft = entry
+
+    def _recompute(self):
+        self.released = self.draft = None
+        for entry in self.entries.values():
+            self._offer(entry)
+
+
+def _newer(entry: VersionEntry, version: Version, current: VersionEntry, current_version: Version) -> bool:
+    # Bei gleicher Version gewinnt der kleinere Pfad, unabhängig von der Reihenfolge
+    return version > current_version or (version == current_version and entry.path < current.path)
+
+
+class VersionIndex:
+    """
+    Incrementally maintained version groups.
+
+    Files are added and removed one at a time; each change parses only the
+    changed filename and touches only its own group. The latest released
+    and draft version of every group are kept up to date, so lookups and
+    the selection of a group are O(1) (removing the selected version
+    rescans that one group).
+
+    Paths are opaque strings (typically relative paths); the group is
+    derived from the file name with ``group_key``.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, VersionGroup] = {}
+        # path -> group key
+        self._keys: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._keys
+
+    def add(self, path: str) -> str:
+        """Add or re-add a file; returns its group key."""
+        name, key = _name_key(path)
+        v_version, x_version = parse_versions(name)
+        return self._insert(VersionEntry(path, v_version, x_version), key)
+
+    def remove(self, path: str) -> Optional[str]:
+        """Remove a file; returns its group key, or None if it was unknown."""
+        key = self._keys.pop(path, None)
+        if key is None:
+            return None
+        group = self._groups[key]
+        entry = group.entries.pop(path)
+        if not group.entries:
+            del self._groups[key]
+        elif entry is group.released or entry is group.draft:
+            group._recompute()
+        return key
+
+    def key_of(self, path: str) -> Optional[str]:
+        return self._keys.get(path)
+
+    def group(self, key: str) -> Optional[VersionGroup]:
+        return self._groups.get(key)
+
+    def members(self, key: str) -> List[str]:
+        group = self._groups.get(key)
+        return sorted(group.entries) if group else []
+
+    def selected(self, key: str) -> List[str]:
+        """Selected file(s) of a group: latest released, else latest draft, else all."""
+        group = self._groups.get(key)
+        return group.selected() if group else []
+
+    def latest(self, key: str, released: Optional[bool] = None) -> Optional[VersionEntry]:
+        """
+        Latest version of a document.
+
+        Args:
+            key: Group key, e.g. ``"spec.pdf"``
+            released: True for the latest V-version, False for the latest
+                X-only draft, None for whichever is selected
+        """
+        group = self._groups.get(key)
+        if group is None:
+            return None
+        if released is True:
+            return group.released
+        if released is False:
+            return group.draft
+        return group.released or group.draft
+
+    def history(self, key: str) -> List[VersionEntry]:
+        """All versions of a document, oldest first."""
+        group = self._groups.get(key)
+        return group.history() if group else []
+
+    def select_all(self) -> List[str]:
+        """Selected files of all groups."""
+        return [path for group in self._groups.values() for path in group.selected()]
+
+    def to_dict(self) -> Dict[str, list]:
+        """Parsed versions and group key per path, to restore the index without regex parsing."""
+        return {
+            path: [entry.v_version, entry.x_version, key]
+            for key, group in self._groups.items()
+            for path, entry in group.entries.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> "VersionIndex":
+        index = cls()
+        for path, (v_version, x_version, key) in data.items():
+            index._insert(VersionEntry(
+                path,
+                tuple(v_version) if v_version else None,
+                tuple(x_version) if x_version else None,
+            ), key)
+        return index
+
+    @classmethod
+    def build(cls, paths: Iterable[str]) -> "VersionIndex":
+        index = cls()
+        for path in paths:
+            index.add(path)
+        return index
+
+    def _insert(self, entry: VersionEntry, key: str) -> str:
+        if entry.path in self._keys:
+            self.remove(entry.path)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = VersionGroup(key)
+        group.entries[entry.path] = entry
+        group._offer(entry)
+        self._keys[entry.path] = key
+        return key
@@ -1,14 +1,37 @@
+import hashlib
 import io
+import time
+from pathlib import Path
+from typing import Iterator, Tuple
+
 import PyPDF2
 import docx
 import openpyxl
 from pptx import Presentation
 
+# Version des extrahierten Textformats. Bei jeder Änderung der Ausgabe erhöhen:
+# Extraktions-Cache und Korpus-Store verwerfen dann ihre alten Texte.
+#   2: PPTX mit "=== Slide N ==="-Markern
+#   3: PDF seitenweise mit "=== Page N ==="-Markern
+EXTRACTOR_VERSION = 3
+
+
+def iter_pdf_pages(content: bytes, start: int = 0) -> Iterator[str]:
+    """
+    Yield the text of a PDF page by page.
+
+    Pages are parsed only when the consumer asks for them, so stopping
+    early skips the remaining pages entirely. Every page starts with a
+    ``=== Page N ===`` marker, which the chunker treats as a hard boundary.
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    for number in range(start, len(reader.pages)):
+        yield f"=== Page {number + 1} ===\n{reader.pages[number].extract_text() or ''}"
+
 
 def extract_text_from_pdf(content: bytes) -> str:
     """Extract text from PDF content."""
-    reader = PyPDF2.PdfReader(io.BytesIO(content))
-    return "\n".join(p.extract_text() or "" for p in reader.pages)
+    return "\n".join(iter_pdf_pages(content))
 
 
 def extract_text_from_docx(content: bytes) -> str:
@@ -31,9 +54,46 @@ def extract_text_from_xlsx(content: bytes) -> str:
 def extract_text_from_pptx(content: bytes) -> str:
     """Extract text from PPTX content."""
     pres = Presentation(io.BytesIO(content))
-    return "\n".join(
-        shape.text
-        for slide in pres.slides
-        for shape in slide.shapes
-        if hasattr(shape, "text")
-    )
\ No newline at end of file
+    lines = []
+    for number, slide in enumerate(pres.slides, start=1):
+        lines.append(f"=== Slide {number} ===")
+        lines.extend(shape.text for shape in slide.shapes if hasattr(shape, "text"))
+    return "\n".join(lines)
+
+
+TEXT_EXTENSIONS = (
+    '.txt', '.md', '.py', '.js', '.java', '.cpp', '.c', '.h',
+    '.cs', '.go', '.rs', '.json', '.yaml', '.yml'
+)
+
+
+def extract_text(filename: str, content: bytes) -> str:
+    """Extract text from raw file content, dispatching on the file name."""
+    filename = filename.lower()
+
+    if filename.endswith('.pdf'):
+        return extract_text_from_pdf(content)
+    elif filename.endswith('.docx'):
+        return extract_text_from_docx(content)
+    elif filename.endswith('.xlsx') or filename.endswith('.xls'):
+        return extract_text_from_xlsx(content)
+    elif filename.endswith('.pptx'):
+        return extract_text_from_pptx(content)
+    elif filename.endswith(TEXT_EXTENSIONS):
+        return content.decode('utf-8', errors='ignore')
+    else:
+        return f"[Unsupported file type: {filename}]"
+
+
+def extract_file(path: str) -> Tuple[str, str, float]:
+    """
+    Read and extract a file; entry point for extraction worker processes.
+
+    Returns:
+        Tuple of extracted text, SHA-256 digest of the file content and
+        extraction time in seconds (measured in the worker, reading excluded)
+    """
+    content = Path(path).read_bytes()
+    start = time.perf_counter()
+    text = extract_text(Path(path).name, content)
+    return text, hashlib.sha256(content).hexdigest(), time.perf_counter() - start
@@ -0,0 +1,186 @@
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+# Verzeichnisse, die nie Dokumente enthalten und beim Scannen übersprungen werden
+DEFAULT_IGNORE_PATTERNS = (
+    ".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/",
+    ".venv/", "venv/", ".tox/", ".mypy_cache/", ".pytest_cache/", ".idea/",
+)
+
+
+class WalkEntry(NamedTuple):
+    """File found by ``walk`` with the stat data of the directory scan."""
+    path: Path
+    rel: str
+    size: int
+    mtime_ns: int
+
+
+class IgnoreRules:
+    """
+    Exclude patterns with ``.gitignore`` semantics.
+
+    Supported: ``*``, ``?``, ``[...]``, ``**`` across directories, ``#``
+    comments, ``!`` negation (the last matching pattern wins), a trailing
+    ``/`` for directories only and a leading or inner ``/`` anchoring the
+    pattern at the root. Patterns without a slash match the name at any
+    depth. Paths are relative to the root, with ``/`` as separator.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        # (regex, negated, directories only, anchored)
+        self._rules: List[Tuple[Pattern, bool, bool, bool]] = []
+        for line in patterns:
+            self.add(line)
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def add(self, pattern: str):
+        pattern = pattern.rstrip("\n").rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if pattern:
+            self._rules.append((re.compile(_translate(pattern)), negated, dir_only, anchored))
+
+    @classmethod
+    def from_file(cls, path: Path, defaults: Iterable[str] = ()) -> "IgnoreRules":
+        rules = cls(defaults)
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    rules.add(line)
+        except OSError:
+            pass
+        return rules
+
+    def match(self, rel: str, is_dir: bool) -> bool:
+        """Whether the path itself is excluded (its parents are not checked)."""
+        name = rel.rsplit("/", 1)[-1]
+        ignored = False
+        for regex, negated, dir_only, anchored in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel if anchored else name):
+                ignored = not negated
+        return ignored
+
+    def excludes(self, rel: str, is_dir: bool = False) -> bool:
+        """Whether the path or one of its parent directories is excluded."""
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), True):
+                return True
+        return self.match(rel, is_dir)
+
+
+def _translate(pattern: str) -> str:
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out) + r"\Z"
+
+
+def walk(
+    root: Path,
+    extensions: Optional[Iterable[str]] = None,
+    ignore: Optional[IgnoreRules] = None,
+    max_depth: Optional[int] = None,
+    subdirectory: Optional[str] = None,
+) -> Iterator[WalkEntry]:
+    """
+    Yield the files below ``root``, depth-first.
+
+    Each directory's files come in name order before its subdirectories.
+
+    Built on ``os.scandir``: the file type comes from the directory entry
+    and every yielded file is stat'ed exactly once. Excluded directories
+    are pruned without being opened, and because results are streamed a
+    caller that stops iterating (e.g. via ``itertools.islice``) also stops
+    the walk. Symlinked directories are not followed.
+
+    Args:
+        root: Directory to walk
+        extensions: Lower-case suffixes (with dot) to yield; None yields all
+        ignore: Exclude rules, relative to ``root``
+        max_depth: Deepest directory level to enter; 0 = only ``root`` itself
+        subdirectory: Only walk below this path relative to ``root`` (``/``
+            separated); ignore rules, depth and ``rel`` still count from ``root``
+    """
+    extensions = frozenset(extensions) if extensions is not None else None
+    # Stapel von (Verzeichnis, relativer Präfix, Tiefe); rückwärts, damit sortiert abgearbeitet wird
+    if subdirectory:
+        parts = subdirectory.strip("/").split("/")
+        if max_depth is not None and len(parts) > max_depth:
+            return
+        stack = [(os.path.join(os.fspath(root), *parts), "/".join(parts) + "/", len(parts))]
+    else:
+        stack = [(os.fspath(root), "", 0)]
+    while stack:
+        directory, prefix, depth = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel = prefix + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if ignore and ignore.match(rel, True):
+                    continue
+                subdirs.append((entry.path, rel + "/", depth + 1))
+                continue
+
+            if extensions is not None:
+                dot = entry.name.rfind(".")
+                if dot <= 0 or entry.name[dot:].lower() not in extensions:
+                    continue
+            if ignore and ignore.match(rel, False):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            yield WalkEntry(Path(entry.path), rel, stat.st_size, stat.st_mtime_ns)
+
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,117 @@
+"""
+Recall und Latenz der Vektorsuche: exakt vs. IVF.
+
+Erzeugt geclusterte Zufallsvektoren (ähnlich echten Chunk-Embeddings) und
+vergleicht die approximative Suche mit der exakten Suche als Referenz.
+
+Zusätzlich wird der Pfad des Kontextaufbaus gemessen: Die Vektoren werden
+auf ``--docs`` Dokumente verteilt und pro Anfrage jedes Dokument über
+``EmbeddingRetriever.retrieve`` bewertet (exakt bzw. aus den globalen
+IVF-Treffern). Recall@top-k bezieht sich auf die besten ``--top-k`` Chunks
+über alle Dokumente, wie sie der Builder global auswählt.
+
+    python benchmarks/bench_vector_index.py --size 100000 --dim 384
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from core.embedding import EmbeddingRetriever  # noqa: E402
+from core.vector_index import VectorIndex  # noqa: E402
+
+
+def clustered(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def per_document(index: VectorIndex, queries: np.ndarray, documents, top_k: int):
+    """Score every document per query through the retriever; returns (latencies, global top keys)."""
+    vectors = {f"q{i}": q for i, q in enumerate(queries)}
+    retriever = EmbeddingRetriever(lambda texts: [vectors[t] for t in texts], index=index, top_k=top_k)
+    times, tops = [], []
+    for name in vectors:
+        t0 = time.perf_counter()
+        found = []
+        for keys in documents:
+            found.extend((r.score, r.key) for r in retriever.retrieve(name, keys, keys))
+        times.append(time.perf_counter() - t0)
+        tops.append({key for _, key in sorted(found, reverse=True)[:top_k]})
+    return times, tops
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--docs", type=int, default=500, help="documents for the per-document path")
+    parser.add_argument("--top-k", type=int, default=256, help="retriever top_k (CONTEXT_MAX_CANDIDATES)")
+    parser.add_argument("--doc-queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    data = clustered(args.size, args.dim, clusters=max(1, args.size // 500), rng=rng)
+    queries = clustered(args.queries, args.dim, clusters=max(1, args.size // 500), rng=rng)
+    keys = [str(i) for i in range(args.size)]
+
+    index = VectorIndex(args.dim, ivf_threshold=args.size + 1)
+    t0 = time.perf_counter()
+    index.add(keys, data)
+    print(f"add {args.size} x {args.dim}: {time.perf_counter() - t0:.2f}s")
+
+    exact, exact_times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        exact.append({key for key, _ in index.search(q, args.k, exact=True)})
+        exact_times.append(time.perf_counter() - t0)
+    print(f"exact    p50 {percentile_ms(exact_times, 50):7.2f} ms  p95 {percentile_ms(exact_times, 95):7.2f} ms")
+
+    documents = [keys[i::args.docs] for i in range(args.docs)]
+    doc_queries = queries[:args.doc_queries]
+    doc_times, doc_exact = per_document(index, doc_queries, documents, args.top_k)
+    print(
+        f"per-document exact, {args.docs} docs: p50 {percentile_ms(doc_times, 50):7.2f} ms  "
+        f"p95 {percentile_ms(doc_times, 95):7.2f} ms"
+    )
+
+    t0 = time.perf_counter()
+    index.train()
+    print(f"train IVF: {time.perf_counter() - t0:.2f}s")
+
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        hits, times = 0, []
+        for q, truth in zip(queries, exact):
+            t0 = time.perf_counter()
+            found = index.search(q, args.k)
+            times.append(time.perf_counter() - t0)
+            hits += len(truth & {key for key, _ in found})
+        recall = hits / (args.k * len(queries))
+        print(
+            f"ivf np={nprobe:<3} p50 {percentile_ms(times, 50):7.2f} ms  "
+            f"p95 {percentile_ms(times, 95):7.2f} ms  recall@{args.k} {recall:.3f}"
+        )
+
+        doc_times, doc_found = per_document(index, doc_queries, documents, args.top_k)
+        doc_recall = sum(len(t & f) for t, f in zip(doc_exact, doc_found)) / (args.top_k * len(doc_exact))
+        print(
+            f"  per-document np={nprobe:<3} p50 {percentile_ms(doc_times, 50):7.2f} ms  "
+            f"p95 {percentile_ms(doc_times, 95):7.2f} ms  recall@{args.top_k} {doc_recall:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Verzeichnis-Scan: os.scandir-Walker vs. bisheriges rglob + stat.
+
+Legt einen synthetischen Baum an (Dokumente, dazu node_modules/.git mit
+vielen Einträgen wie in echten Projektordnern) und misst die vollständige
+Auflistung inklusive Stat-Daten sowie den Abbruch nach max_files.
+
+    python benchmarks/bench_walker.py --entries 200000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.document_service import DocumentService  # noqa: E402
+
+
+def build_tree(root: Path, entries: int):
+    """About half documents, half entries below ignored directories."""
+    per_dir = 100
+    created = 0
+    kinds = (".txt", ".md", ".pdf", ".py", ".png")
+    while created < entries:
+        n = created // per_dir
+        if n % 2:
+            directory = root / ("node_modules" if n % 4 == 1 else ".git") / f"p{n}"
+        else:
+            directory = root / f"area{n % 20}" / f"dir{n}"
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(per_dir):
+            (directory / f"file{i}{kinds[i % len(kinds)]}").touch()
+        created += per_dir
+
+
+def rglob_listing(service: DocumentService, root: Path):
+    """Implementation before the walker: rglob, is_file and stat per path."""
+    files = [
+        p for p in root.rglob("*")
+        if p.is_file() and p.suffix.lower() in service.SUPPORTED_EXTENSIONS
+    ]
+    return {str(p.relative_to(root)): (p.stat().st_size, p.stat().st_mtime_ns) for p in files}
+
+
+def walker_listing(service: DocumentService, root: Path):
+    return {e.rel: (e.size, e.mtime_ns) for e in service.walk_supported_files(root)}
+
+
+def timed(label: str, fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<34} {best * 1000:9.1f} ms  ({len(result)} files)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--max-files", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", type=Path, help="existing tree instead of a synthetic one")
+    args = parser.parse_args()
+
+    service = DocumentService()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.dir or Path(tmp)
+        if args.dir is None:
+            t0 = time.perf_counter()
+            build_tree(root, args.entries)
+            print(f"created {args.entries} entries in {time.perf_counter() - t0:.1f}s")
+
+        old = timed("rglob + stat (before)", lambda: rglob_listing(service, root), args.repeat)
+        new = timed("scandir walker", lambda: walker_listing(service, root), args.repeat)
+        no_ignore = DocumentService(ignore_patterns=[])
+        timed("scandir walker, no ignore rules", lambda: walker_listing(no_ignore, root), args.repeat)
+        timed(
+            f"scandir walker, first {args.max_files}",
+            lambda: list(islice(service.walk_supported_files(root), args.max_files)),
+            args.repeat,
+        )
+        print(f"speedup full listing: {old / new:.1f}x (rglob also descends into node_modules/.git)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Synthetische Korpora für die Benchmarks.
+
+Baut das Schema aus ``test/create_test_files.sh`` in großem Maßstab nach:
+``project/docs``, ``project/src`` und ``reference/ISO|DIN`` mit Dateien in
+V-/X-Versionen (mehrere V, nur X, gemischt, unversioniert) und einem
+Dateityp-Mix wie in echten Projektordnern. PDF, DOCX, XLSX und PPTX sind
+echte Dokumente, damit ``scan_directory`` die Extraktoren wirklich
+durchläuft; pro Typ wird eine Vorlage erzeugt und unter vielen Namen
+geschrieben.
+
+Ein erzeugter Korpus wird anhand von ``corpus.manifest`` wiederverwendet, wenn
+Größe, Seed und Format übereinstimmen.
+
+    python benchmarks/corpus.py /tmp/corpus --files 10000
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List
+
+CORPUS_FORMAT = 1
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+WORDS = (
+    "anforderung schnittstelle spezifikation prüfung version freigabe norm "
+    "sicherheit modul komponente dokument system daten prozess messung "
+    "toleranz grenzwert bericht änderung konfiguration parameter kalibrierung "
+    "temperatur druck spannung strom signal protokoll verfahren qualität "
+    "requirement interface test release safety module component process"
+).split()
+
+# Anteil der Dateitypen (Summe 1.0)
+TYPE_MIX = (
+    (".txt", 0.30), (".md", 0.20), (".py", 0.15), (".json", 0.10),
+    (".pdf", 0.12), (".docx", 0.06), (".xlsx", 0.04), (".pptx", 0.03),
+)
+
+# Versionsmuster wie in create_test_files.sh: mehrere V, nur X, V+X gemischt, ohne Version
+VERSION_PATTERNS = (
+    ("V1.0", "V2.0", "V2.1"),
+    ("X0.1", "X0.2", "X0.3"),
+    ("V1.0", "X0.5", "X0.9"),
+    (None,),
+    ("V2.0", "X1.0"),
+)
+
+BASENAMES = ("specification", "draft", "report", "api", "manual", "protocol", "ISO-9001", "DIN-Standard")
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(sentence(rng, rng.randint(6, 16)) for _ in range(sentences))
+
+
+def text_document(rng: random.Random, paragraphs: int = 6) -> str:
+    return "\n\n".join(paragraph(rng) for _ in range(paragraphs)) + "\n"
+
+
+def markdown_document(rng: random.Random, sections: int = 4) -> str:
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Abschnitt {i + 1}\n\n" + text_document(rng, 2))
+    return "# " + sentence(rng, 4) + "\n\n" + "\n".join(parts)
+
+
+def python_document(rng: random.Random, functions: int = 6) -> str:
+    parts = ['"""' + sentence(rng) + '"""\n']
+    for i in range(functions):
+        parts.append(
+            f"def {rng.choice(WORDS)}_{i}(value):\n"
+            f'    """{sentence(rng)}"""\n'
+            f"    return value * {i + 1}\n"
+        )
+    return "\n\n".join(parts)
+
+
+def json_document(rng: random.Random, entries: int = 20) -> str:
+    return json.dumps({f"{rng.choice(WORDS)}_{i}": sentence(rng, 6) for i in range(entries)}, indent=2)
+
+
+def pdf_bytes(pages: List[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count)) + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = b"BT /F1 10 Tf 40 750 Td (" + escaped.encode("latin-1", "replace") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def docx_bytes(rng: random.Random, paragraphs: int = 20) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for _ in range(paragraphs):
+        document.add_paragraph(paragraph(rng, 3))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def xlsx_bytes(rng: random.Random, rows: int = 200, sheets: int = 2) -> bytes:
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    for s in range(sheets):
+        sheet = workbook.active if s == 0 else workbook.create_sheet()
+        sheet.title = f"Tabelle{s + 1}"
+        for r in range(rows):
+            sheet.append([r, rng.choice(WORDS), rng.random() * 100, sentence(rng, 5)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def pptx_bytes(rng: random.Random, slides: int = 10) -> bytes:
+    from pptx import Presentation
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for _ in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = sentence(rng, 4)
+        slide.placeholders[1].text = paragraph(rng, 2)
+    buffer = io.BytesIO()
+    presentation.save(buffer)
+    return buffer.getvalue()
+
+
+def samples(seed: int = 0, scale: int = 1) -> Dict[str, bytes]:
+    """One document per supported type; ``scale`` multiplies its length."""
+    rng = random.Random(seed)
+    return {
+        ".txt": text_document(rng, 6 * scale).encode("utf-8"),
+        ".md": markdown_document(rng, 4 * scale).encode("utf-8"),
+        ".py": python_document(rng, 6 * scale).encode("utf-8"),
+        ".json": json_document(rng, 20 * scale).encode("utf-8"),
+        ".pdf": pdf_bytes([sentence(rng, 14) for _ in range(5 * scale)]),
+        ".docx": docx_bytes(rng, 20 * scale),
+        ".xlsx": xlsx_bytes(rng, 200 * scale),
+        ".pptx": pptx_bytes(rng, 10 * scale),
+    }
+
+
+def _layout(index: int) -> str:
+    """Directory of the n-th document group, spread like a real project tree."""
+    area = index % 4
+    if area == 0:
+        return f"reference/{'ISO' if index % 8 == 0 else 'DIN'}/part{index % 50}"
+    if area == 1:
+        return f"project/src/module{index % 100}"
+    return f"project/docs/area{index % 40}/topic{index % 400}"
+
+
+def generate(root: Path, files: int, seed: int = 0) -> Dict:
+    """
+    Create (or reuse) a corpus of ``files`` files below ``root``.
+
+    Returns:
+        The manifest stored in ``root/corpus.manifest`` (no supported suffix, so scans skip it)
+    """
+    root = Path(root)
+    manifest_path = root / "corpus.manifest"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("files") == files and manifest.get("seed") == seed and manifest.get("format") == CORPUS_FORMAT:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    if root.exists() and any(root.iterdir()):
+        # Nur selbst erzeugte Korpora werden ersetzt
+        if not manifest_path.exists():
+            raise ValueError(f"{root} is not empty and not a generated corpus")
+        shutil.rmtree(root)
+    root.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    binary = {ext: content for ext, content in samples(seed).items() if ext in (".pdf", ".docx", ".xlsx", ".pptx")}
+    extensions = [ext for ext, _ in TYPE_MIX]
+    weights = [w for _, w in TYPE_MIX]
+
+    written = 0
+    group = 0
+    counts: Dict[str, int] = {}
+    while written < files:
+        ext = rng.choices(extensions, weights)[0]
+        directory = root / _layout(group)
+        directory.mkdir(parents=True, exist_ok=True)
+        base = f"{BASENAMES[group % len(BASENAMES)]}-{group}"
+        for version in VERSION_PATTERNS[group % len(VERSION_PATTERNS)]:
+            if written >= files:
+                break
+            name = f"{base}_{version}{ext}" if version else f"{base}{ext}"
+            if ext in binary:
+                (directory / name).write_bytes(binary[ext])
+            elif ext == ".md":
+                (directory / name).write_text(markdown_document(rng, 2), encoding="utf-8")
+            elif ext == ".py":
+                (directory / name).write_text(python_document(rng, 3), encoding="utf-8")
+            elif ext == ".json":
+                (directory / name).write_text(json_document(rng, 8), encoding="utf-8")
+            else:
+                (directory / name).write_text(text_document(rng, 3), encoding="utf-8")
+            counts[ext] = counts.get(ext, 0) + 1
+            written += 1
+        group += 1
+
+    manifest = {
+        "format": CORPUS_FORMAT,
+        "files": files,
+        "seed": seed,
+        "groups": group,
+        "types": counts,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--files", type=int, default=SIZES["1k"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(generate(args.root, args.files, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
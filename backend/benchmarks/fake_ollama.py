@@ -0,0 +1,175 @@
+"""
+Lokaler Ersatz für Ollama für Lasttests, ohne Modell und ohne Netzwerk.
+
+Bedient ``/api/generate`` und ``/api/chat`` (gestreamt als NDJSON oder am
+Stück), ``/api/tags``, ``/api/embed`` und ``/api/pull`` im Format von
+Ollama. Antwortzeiten folgen einem einfachen Modell:
+
+- Prefill: ``latency`` plus Prompt-Tokens / ``prompt_rate``
+- Decode: ``tokens`` Tokens mit ``tokens_per_second``
+- höchstens ``parallel`` Generierungen gleichzeitig (wie
+  ``OLLAMA_NUM_PARALLEL``), weitere warten in der Schlange
+
+    python benchmarks/fake_ollama.py --port 11435 --latency 0.2 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, List
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = "Laut Spezifikation liegt der Grenzwert der Schnittstelle im zulässigen Bereich [C1]".split()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def create_app(
+    latency: float = 0.1,
+    tokens_per_second: float = 50.0,
+    tokens: int = 64,
+    prompt_rate: float = 2_000.0,
+    parallel: int = 4,
+    models: List[str] = ("llama3.2", "nomic-embed-text"),
+    embedding_dim: int = 256,
+) -> FastAPI:
+    """
+    Args:
+        latency: Fixed delay before the first token (model load, scheduling)
+        tokens_per_second: Decode rate per request
+        tokens: Tokens per answer
+        prompt_rate: Prompt tokens processed per second (4 characters ~ 1 token)
+        parallel: Generations served at the same time
+        models: Names reported by /api/tags
+        embedding_dim: Length of the vectors returned by /api/embed
+    """
+    app = FastAPI(title="fake-ollama")
+    slots = asyncio.Semaphore(parallel)
+    app.state.stats = {"generate": 0, "chat": 0, "embed": 0, "queued_max": 0}
+    waiting = [0]
+
+    async def generate(prompt: str) -> AsyncIterator[str]:
+        waiting[0] += 1
+        app.state.stats["queued_max"] = max(app.state.stats["queued_max"], waiting[0])
+        async with slots:
+            waiting[0] -= 1
+            await asyncio.sleep(latency + len(prompt) / 4 / prompt_rate)
+            for i in range(tokens):
+                if i:
+                    await asyncio.sleep(1 / tokens_per_second)
+                yield WORDS[i % len(WORDS)] + " "
+
+    def final(model: str, prompt: str, started: float, extra: dict) -> dict:
+        return {
+            "model": model,
+            "created_at": _now(),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "prompt_eval_count": len(prompt) // 4,
+            "eval_count": tokens,
+            **extra,
+        }
+
+    async def respond(model: str, prompt: str, stream: bool, chunk, last: dict):
+        started = time.perf_counter()
+        if not stream:
+            text = "".join([t async for t in generate(prompt)])
+            return JSONResponse(final(model, prompt, started, {**chunk(text), **last}))
+
+        async def lines():
+            async for token in generate(prompt):
+                yield json.dumps({"model": model, "created_at": _now(), "done": False, **chunk(token)}) + "\n"
+            yield json.dumps(final(model, prompt, started, {**chunk(""), **last})) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def api_generate(request: Request):
+        body = await request.json()
+        app.state.stats["generate"] += 1
+        prompt = (body.get("system") or "") + body.get("prompt", "")
+        return await respond(
+            body.get("model", ""), prompt, body.get("stream", True),
+            lambda text: {"response": text}, {"context": []},
+        )
+
+    @app.post("/api/chat")
+    async def api_chat(request: Request):
+        body = await request.json()
+        app.state.stats["chat"] += 1
+        prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+        return await respond(
+            body.get("model", ""), prompt, body.get("stream", True),
+            lambda text: {"message": {"role": "assistant", "content": text}}, {},
+        )
+
+    @app.get("/api/tags")
+    async def api_tags():
+        return {
+            "models": [
+                {"name": f"{m}:latest", "model": f"{m}:latest", "size": 0, "modified_at": _now()}
+                for m in models
+            ]
+        }
+
+    @app.post("/api/embed")
+    async def api_embed(request: Request):
+        body = await request.json()
+        app.state.stats["embed"] += 1
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = []
+        for text in texts:
+            # Deterministisch pro Text, damit gleiche Chunks gleiche Vektoren bekommen
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(embedding_dim).astype(np.float32)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return {"model": body.get("model", ""), "embeddings": vectors}
+
+    @app.post("/api/pull")
+    async def api_pull():
+        return {"status": "success"}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=64)
+    parser.add_argument("--prompt-rate", type=float, default=2_000.0)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--model", action="append", dest="models", help="reported model names (repeatable)")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        tokens=args.tokens,
+        prompt_rate=args.prompt_rate,
+        parallel=args.parallel,
+        models=args.models or ["llama3.2", "nomic-embed-text"],
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+End-to-End-Lasttest: wie viele gleichzeitige Chat-Nutzer verträgt eine Instanz?
+
+Startet ``fake_ollama.py`` und das Backend (uvicorn, eigener Prozess) auf
+localhost mit einem synthetischen Korpus aus ``corpus.py`` und treibt dann
+für jede Nebenläufigkeitsstufe eine feste Zeit lang geschlossene
+Nutzer-Schleifen mit einem Mix aus Anfragen:
+
+- ``chat``: ``POST /chat`` über Projekt und Referenz
+- ``stream``: ``POST /chat/stream`` (zusätzlich Time-to-First-Token)
+- ``document``: ``POST /chat`` mit eingebettetem Dokument, ohne Korpus
+- ``listing``: ``GET /directories/project``
+
+Jede Frage ist eindeutig, damit weder Antwort- noch Kontext-Cache greifen.
+Berichtet werden Durchsatz sowie p50/p95/p99 je Stufe und Anfragetyp und
+die Stufe, ab der die Latenz einbricht (p95 über ``--degradation`` mal dem
+Wert der ersten Stufe oder mehr als 1 % Fehler). Alles läuft offline.
+
+    python benchmarks/load_test.py --concurrency 1 4 16 32 --duration 20
+    python benchmarks/load_test.py --tokens-per-second 20 --mix chat=1,stream=3 --json /tmp/load.json
+    python benchmarks/load_test.py --backend-url http://localhost:8000  # laufende Instanz
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+import corpus
+
+BENCHMARKS = Path(__file__).resolve().parent
+APP_DIR = BENCHMARKS.parent / "app"
+SHAPES = ("chat", "stream", "document", "listing")
+
+
+@dataclass
+class Sample:
+    shape: str
+    latency: float
+    ok: bool
+    ttft: Optional[float] = None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SHAPES:
+            raise argparse.ArgumentTypeError(f"unknown request shape {name!r}, expected one of {SHAPES}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    with httpx.Client(trust_env=False, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url}: process exited with {process.returncode}")
+            try:
+                if client.get(url).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+
+@contextmanager
+def running(cmd: List[str], url: str, cwd: Path, env: Dict[str, str], log: Path) -> Iterator[None]:
+    with open(log, "wb") as out:
+        process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=out, stderr=subprocess.STDOUT)
+        try:
+            wait_ready(url, process)
+            yield
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+@contextmanager
+def local_stack(args, workdir: Path) -> Iterator[str]:
+    """Start fake Ollama and the backend on free ports; yields the backend URL."""
+    manifest = corpus.generate(workdir / "corpus", args.files)
+    print(f"# corpus: {manifest['files']} files in {workdir / 'corpus'}", flush=True)
+
+    ollama_port, backend_port = free_port(), free_port()
+    ollama_cmd = [
+        sys.executable, str(BENCHMARKS / "fake_ollama.py"), "--port", str(ollama_port),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        "--tokens", str(args.tokens), "--prompt-rate", str(args.prompt_rate),
+        "--parallel", str(args.parallel),
+    ]
+    env = {
+        **os.environ,
+        "OLLAMA_HOST": f"http://127.0.0.1:{ollama_port}",
+        "USE_LOCAL_LLM": "true",
+        "LOCAL_MODEL": "llama3.2",
+        "ANTHROPIC_API_KEY": "",
+        "PROJECT_DIR": str(workdir / "corpus" / "project"),
+        "REFERENCE_DIR": str(workdir / "corpus" / "reference"),
+        "UPLOAD_DIR": str(workdir / "uploads"),
+        "EXTRACTION_CACHE_DIR": str(workdir / "cache"),
+        "RESPONSE_CACHE_BACKEND": "off",
+        "CORPUS_STORE_DIR": str(workdir / "cache" / "corpus"),
+        "CORPUS_WATCH_MODE": "off",
+        "SLOW_REQUEST_LOG": str(workdir / "slow_requests.log"),
+        "EMBEDDING_MODEL": "nomic-embed-text" if args.embeddings else "",
+        "NO_PROXY": "*",
+    }
+    backend_cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(backend_port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    with running(ollama_cmd, f"http://127.0.0.1:{ollama_port}/api/tags", BENCHMARKS, env, workdir / "fake_ollama.log"):
+        with running(backend_cmd, f"{backend_url}/", APP_DIR, env, workdir / "backend.log"):
+            print(f"# backend {backend_url} (logs in {workdir})", flush=True)
+            yield backend_url
+
+
+class Driver:
+    """Closed-loop users: each sends its next request as soon as the previous one finished."""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], document: str, seed: int = 0):
+        self.client = client
+        self.shapes = list(mix)
+        self.weights = [mix[s] for s in self.shapes]
+        self.document = document
+        self.rng = random.Random(seed)
+        self.counter = 0
+
+    def _question(self) -> str:
+        self.counter += 1
+        return f"Welche Grenzwerte nennt die Spezifikation für Schnittstelle {self.counter}?"
+
+    async def request(self, shape: str) -> Sample:
+        start = time.perf_counter()
+        ttft = None
+        try:
+            if shape == "listing":
+                r = await self.client.get("/directories/project", params={"limit": 100})
+                ok = r.status_code == 200
+            elif shape == "stream":
+                payload = {"message": self._question()}
+                ok = False
+                async with self.client.stream("POST", "/chat/stream", json=payload) as r:
+                    async for line in r.aiter_lines():
+                        if ttft is None and line.startswith("event: token"):
+                            ttft = time.perf_counter() - start
+                        if line.startswith("event: done"):
+                            ok = r.status_code == 200
+                        elif line.startswith("event: error"):
+                            ok = False
+            else:
+                payload = {"message": self._question()}
+                if shape == "document":
+                    payload.update(
+                        documents=[{"name": "upload.txt", "content": self.document}],
+                        include_project=False,
+                        include_reference=False,
+                    )
+                r = await self.client.post("/chat", json=payload)
+                # Fehler liefert /chat als 200 mit model "error"
+                ok = r.status_code == 200 and r.json().get("model") != "error"
+        except httpx.HTTPError:
+            ok = False
+        return Sample(shape, time.perf_counter() - start, ok, ttft)
+
+    async def run(self, concurrency: int, duration: float) -> List[Sample]:
+        samples: List[Sample] = []
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                shape = self.rng.choices(self.shapes, self.weights)[0]
+                samples.append(await self.request(shape))
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        return samples
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    def stats(group: List[Sample]) -> Dict:
+        latencies = [s.latency for s in group if s.ok]
+        result = {
+            "requests": len(group),
+            "errors": sum(not s.ok for s in group),
+            "p50_ms": _ms(percentile(latencies, 50)),
+            "p95_ms": _ms(percentile(latencies, 95)),
+            "p99_ms": _ms(percentile(latencies, 99)),
+        }
+        ttfts = [s.ttft for s in group if s.ok and s.ttft is not None]
+        if ttfts:
+            result["ttft_p50_ms"] = _ms(percentile(ttfts, 50))
+            result["ttft_p95_ms"] = _ms(percentile(ttfts, 95))
+        return result
+
+    overall = stats(samples)
+    overall["throughput_rps"] = round(len(samples) / elapsed, 2) if elapsed else 0.0
+    overall["shapes"] = {
+        shape: stats([s for s in samples if s.shape == shape])
+        for shape in SHAPES if any(s.shape == shape for s in samples)
+    }
+    return overall
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def degradation_point(levels: Dict[int, Dict], factor: float) -> Optional[int]:
+    """First concurrency whose p95 exceeds ``factor`` x the first level's p95 or has > 1 % errors."""
+    base = None
+    for concurrency, result in levels.items():
+        if base is None:
+            base = result["p95_ms"]
+        error_rate = result["errors"] / result["requests"] if result["requests"] else 1.0
+        if error_rate > 0.01 or (base and result["p95_ms"] and result["p95_ms"] > factor * base):
+            return concurrency
+    return None
+
+
+def print_level(concurrency: int, result: Dict):
+    print(
+        f"c={concurrency:<4} {result['throughput_rps']:8.2f} req/s  "
+        f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+        f"errors {result['errors']}/{result['requests']}",
+        flush=True,
+    )
+    for shape, s in result["shapes"].items():
+        ttft = f"  ttft p50 {s['ttft_p50_ms']} ms" if "ttft_p50_ms" in s else ""
+        print(f"    {shape:<9} n={s['requests']:<5} p50 {s['p50_ms']} p95 {s['p95_ms']} p99 {s['p99_ms']} ms{ttft}")
+
+
+async def drive(url: str, args) -> Dict[int, Dict]:
+    document = corpus.text_document(random.Random(1), 40)
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout, trust_env=False) as client:
+        driver = Driver(client, args.mix, document, args.seed)
+        # Aufwärmen: Index-Zugriffe, Verbindungen, erster LLM-Aufruf
+        await driver.run(1, args.warmup)
+        levels = {}
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            samples = await driver.run(concurrency, args.duration)
+            levels[concurrency] = summarize(samples, time.perf_counter() - start)
+            print_level(concurrency, levels[concurrency])
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat=4,stream=4,document=1,listing=1"))
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--degradation", type=float, default=2.0, help="p95 factor over the first level")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--backend-url", help="test a running backend instead of starting one")
+    stack = parser.add_argument_group("local stack")
+    stack.add_argument("--files", type=int, default=corpus.SIZES["1k"], help="corpus size")
+    stack.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    stack.add_argument("--embeddings", action="store_true", help="enable dense retrieval via the fake /api/embed")
+    stack.add_argument("--workdir", type=Path, help="keep corpus, caches and logs here")
+    fake = parser.add_argument_group("fake Ollama")
+    fake.add_argument("--latency", type=float, default=0.1, help="seconds before the first token")
+    fake.add_argument("--tokens-per-second", type=float, default=50.0)
+    fake.add_argument("--tokens", type=int, default=64, help="tokens per answer")
+    fake.add_argument("--prompt-rate", type=float, default=2_000.0, help="prompt tokens per second")
+    fake.add_argument("--parallel", type=int, default=4, help="concurrent generations (OLLAMA_NUM_PARALLEL)")
+    args = parser.parse_args()
+
+    if args.backend_url:
+        levels = asyncio.run(drive(args.backend_url, args))
+    else:
+        with tempfile.TemporaryDirectory(prefix="mcp-load-") as tmp:
+            workdir = args.workdir or Path(tmp)
+            workdir.mkdir(parents=True, exist_ok=True)
+            with local_stack(args, workdir) as url:
+                levels = asyncio.run(drive(url, args))
+
+    knee = degradation_point(levels, args.degradation)
+    if knee is None:
+        print(f"# no degradation up to {max(levels)} concurrent users")
+    else:
+        sustained = [c for c in levels if c < knee]
+        print(
+            f"# latency degrades at {knee} concurrent users"
+            + (f"; last good level: {sustained[-1]}" if sustained else "")
+        )
+
+    if args.json:
+        config = {k: v for k, v in vars(args).items() if k not in ("json", "workdir")}
+        args.json.write_text(json.dumps({
+            "config": config,
+            "levels": {str(c): r for c, r in levels.items()},
+            "degrades_at": knee,
+        }, indent=2, default=str) + "\n")
+        print(f"# results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Microbenchmarks der Ingest- und Retrieval-Pipeline mit Baselines.
+
+Misst jede Stufe einzeln: ``scan_directory`` und
+``VersionHandler.select_latest_versions`` auf synthetischen Korpora (1k,
+10k, 100k Dateien, siehe ``corpus.py``), jeden Extraktor, ``TextChunker``
+und ``StructuredChunker``, ``LexicalRetriever`` und ``BM25Retriever`` sowie
+``ProductionMCPContextBuilder`` (``add_document`` und ``build`` getrennt).
+
+Ergebnisse lassen sich als Baseline speichern und spätere Läufe dagegen
+vergleichen; der Vergleich endet mit Exit-Code 1, wenn eine Stufe langsamer
+geworden ist. Baselines sind maschinenabhängig und nur auf demselben
+Rechner vergleichbar.
+
+    python benchmarks/suite.py --sizes 1k 10k --save benchmarks/baselines/main.json
+    python benchmarks/suite.py --sizes 1k 10k --compare benchmarks/baselines/main.json
+    python benchmarks/suite.py --filter retrieve --repeat 20
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from core.bm25 import BM25Index, BM25Retriever  # noqa: E402
+from core.lexical import LexicalRetriever  # noqa: E402
+from core.retrieval import content_hash  # noqa: E402
+from services.context_builder.chunker import StructuredChunker, TextChunker  # noqa: E402
+from services.context_builder.production_builder import ProductionMCPContextBuilder  # noqa: E402
+from services.context_builder.retriever import HybridRetriever  # noqa: E402
+from services.document_service import DocumentService  # noqa: E402
+from services.version_handler import VersionHandler  # noqa: E402
+from utils.file_extractors import extract_text  # noqa: E402
+
+import corpus  # noqa: E402
+
+BASELINE_FORMAT = 1
+QUERY = "spezifikation schnittstelle grenzwert temperatur"
+
+
+@dataclass
+class Case:
+    """A benchmark: ``run`` is timed, ``setup`` (untimed) prepares each repetition."""
+    name: str
+    run: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+
+
+def measure(case: Case, repeat: int, warmup: int = 1) -> Dict:
+    times = []
+    for i in range(warmup + repeat):
+        state = case.setup() if case.setup is not None else None
+        start = time.perf_counter()
+        case.run(state)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            times.append(elapsed)
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+        "repeat": repeat,
+    }
+
+
+def corpus_cases(root: Path, size: str) -> List[Case]:
+    # Ohne Extraktions-Cache: gemessen wird der Scan, nicht ein warmer Cache aus früheren Läufen
+    service = DocumentService(extraction_cache=None)
+    handler = VersionHandler()
+    paths = service.list_supported_files(root)
+    return [
+        Case(
+            f"scan_directory/{size}",
+            lambda _: service.scan_directory(root, max_files=100, apply_version_filtering=True),
+        ),
+        Case(f"select_latest_versions/{size}", lambda _: handler.select_latest_versions(paths)),
+    ]
+
+
+def extractor_cases() -> List[Case]:
+    # Größere Dokumente als im Korpus, damit die Parserzeit den Aufruf-Overhead überwiegt
+    return [
+        Case(f"extract/{ext.lstrip('.')}", lambda _, ext=ext, content=content: extract_text(f"sample{ext}", content))
+        for ext, content in corpus.samples(seed=1, scale=10).items()
+    ]
+
+
+def text_cases() -> List[Case]:
+    rng = random.Random(2)
+    text = corpus.text_document(rng, 2_000)  # ~1 MB
+    structured = StructuredChunker()
+    chunks = structured.split(text, kind=StructuredChunker.kind_for("bench.txt"))
+    index = BM25Index()
+    for chunk in chunks:
+        index.add(content_hash(chunk), chunk)
+
+    # Wie Korpus-Dokumente: beim Indexieren gechunkt, gezählt und im BM25-Index,
+    # damit build die Auswahl über echte Treffer misst und nicht nur Auffüllen
+    counter = ProductionMCPContextBuilder(query=QUERY).counter
+    documents = []
+    for i in range(50):
+        title = f"doc{i}.txt"
+        doc_chunks = structured.split(corpus.text_document(rng, 40), kind=StructuredChunker.kind_for(title))
+        keys = [content_hash(c) for c in doc_chunks]
+        for key, chunk in zip(keys, doc_chunks):
+            index.add(key, chunk)
+        documents.append((title, doc_chunks, counter.count_many(doc_chunks), keys))
+
+    def builder():
+        return ProductionMCPContextBuilder(
+            query=QUERY,
+            max_tokens=8_000,
+            retriever=HybridRetriever(BM25Retriever(index, top_k=256)),
+            global_selection=True,
+        )
+
+    def add_documents(b):
+        for title, doc_chunks, tokens, keys in documents:
+            b.add_document(title=title, source=title, chunks=doc_chunks, chunk_tokens=tokens, chunk_keys=keys)
+
+    def filled_builder():
+        b = builder()
+        add_documents(b)
+        return b
+
+    kb = len(text) // 1024
+    return [
+        Case(f"TextChunker.split/{kb}KB", lambda _: TextChunker().split(text)),
+        Case(f"StructuredChunker.split/{kb}KB", lambda _: structured.split(text, kind="text")),
+        Case(f"LexicalRetriever.retrieve/{len(chunks)}chunks", lambda _: LexicalRetriever().retrieve(QUERY, chunks)),
+        Case(f"BM25Retriever.retrieve/{len(chunks)}chunks", lambda _: BM25Retriever(index).retrieve(QUERY, chunks)),
+        Case(f"ProductionMCPContextBuilder.add_document/{len(documents)}docs", add_documents, setup=builder),
+        Case(f"ProductionMCPContextBuilder.build/{len(documents)}docs", lambda b: b.build(), setup=filled_builder),
+    ]
+
+
+def run_suite(sizes: List[str], corpus_dir: Path, repeat: int, name_filter: Optional[str]) -> Dict[str, Dict]:
+    def selected(cases):
+        return [c for c in cases if not name_filter or name_filter in c.name]
+
+    results = {}
+
+    def run(cases):
+        for case in selected(cases):
+            results[case.name] = measure(case, repeat)
+            r = results[case.name]
+            print(f"{case.name:<48} {r['median_s'] * 1000:10.2f} ms  (min {r['min_s'] * 1000:.2f})", flush=True)
+
+    run(extractor_cases())
+    run(text_cases())
+    for size in sizes:
+        root = corpus_dir / size
+        if not selected([Case(f"scan_directory/{size}", None), Case(f"select_latest_versions/{size}", None)]):
+            continue
+        t0 = time.perf_counter()
+        manifest = corpus.generate(root, corpus.SIZES[size])
+        print(f"# corpus {size}: {manifest['files']} files ({time.perf_counter() - t0:.1f}s)", flush=True)
+        run(corpus_cases(root, size))
+    return results
+
+
+def machine() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline: Dict, results: Dict[str, Dict], tolerance: float, min_delta: float) -> List[str]:
+    """
+    Compare medians with a baseline and print a table.
+
+    A case regresses if its median grew by more than ``tolerance`` (relative)
+    and by more than ``min_delta`` seconds, so sub-millisecond noise does not
+    fail the check.
+
+    Returns:
+        Names of the regressed cases
+    """
+    if baseline.get("machine") != machine():
+        print("# warning: baseline was recorded on a different machine or Python version")
+    regressions = []
+    print(f"{'case':<48} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>11} {result['median_s'] * 1000:9.2f}ms {'new':>8}")
+            continue
+        old, new = base["median_s"], result["median_s"]
+        change = (new - old) / old if old else 0.0
+        regressed = change > tolerance and new - old > min_delta
+        if regressed:
+            regressions.append(name)
+        marker = "  REGRESSION" if regressed else ("  faster" if change < -tolerance else "")
+        print(f"{name:<48} {old * 1000:9.2f}ms {new * 1000:9.2f}ms {change:+7.1%}{marker}")
+    for name in baseline["results"].keys() - results.keys():
+        print(f"# {name}: in baseline, not run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", default=["1k", "10k"], choices=list(corpus.SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only cases whose name contains this text")
+    parser.add_argument(
+        "--corpus-dir", type=Path, default=Path(tempfile.gettempdir()) / "mcp-benchmark-corpus",
+        help="generated corpora are kept here and reused",
+    )
+    parser.add_argument("--save", type=Path, help="write the results as baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown of the median")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns below this")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.corpus_dir, args.repeat, args.filter)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "format": BASELINE_FORMAT,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": machine(),
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"# baseline written to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(baseline, results, args.tolerance, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"# {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("# no regressions")
+
+
+if __name__ == "__main__":
+    main()
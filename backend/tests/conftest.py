@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import httpx
+import pytest
+
+# Die App importiert ihre Module relativ zu backend/app (z.B. "from core.config import settings")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+# Keine Schreibzugriffe auf /data und keine Worker-Prozesse beim Import der App
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("EXTRACTION_WORKERS", "1")
+os.environ.setdefault("CORPUS_WATCH_MODE", "off")
+os.environ.setdefault("CORPUS_STORE_ENABLED", "false")
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "off")
+
+from services.llm.base import LLMClient  # noqa: E402
+
+
+class FakeLLM(LLMClient):
+    """
+    LLM replacement answering with a fixed text after an optional delay.
+
+    ``response`` may contain ``{n}``, the number of the call. With
+    ``tokens`` the answer is streamed token by token and ``chat`` must not
+    be used.
+    """
+
+    def __init__(
+        self,
+        response: str = "ok [C1]",
+        delay: float = 0.0,
+        model: str = "fake",
+        usage: Tuple[int, int] = (1, 1),
+        tokens: Optional[Sequence[str]] = None,
+    ):
+        self.response = response
+        self.delay = delay
+        self.model = model
+        self.usage = {"input_tokens": usage[0], "output_tokens": usage[1]}
+        self.tokens = tokens
+        self.calls = 0
+
+    async def chat(self, prompt: str, system_prompt: str) -> dict:
+        if self.tokens is not None:
+            raise AssertionError("stream expected")
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {
+            "response": self.response.format(n=self.calls),
+            "model": self.model,
+            "llm_type": "local",
+            "usage": self.usage,
+        }
+
+    async def stream(self, prompt: str, system_prompt: str):
+        if self.tokens is None:
+            async for event in super().stream(prompt, system_prompt):
+                yield event
+            return
+        self.calls += 1
+        for token in self.tokens:
+            yield {"type": "token", "text": token}
+        yield {"type": "done", "model": self.model, "llm_type": "local", "usage": self.usage}
+
+
+class FixedBuilder:
+    """Context builder returning a fixed prompt."""
+
+    def __init__(self, context: str = "ctx"):
+        self.context = context
+
+    def build_prompt(self):
+        return self.context
+
+
+@pytest.fixture
+def fake_llm():
+    """Factory for ``FakeLLM`` instances."""
+    return FakeLLM
+
+
+@pytest.fixture
+def fixed_builder():
+    """Factory for ``FixedBuilder`` instances."""
+    return FixedBuilder
+
+
+@pytest.fixture
+def chat_payload():
+    """Chat request over one uploaded document, without project and reference files."""
+    return {
+        "message": "welt",
+        "documents": [{"name": "doc.txt", "content": "Hallo Welt"}],
+        "include_project": False,
+        "include_reference": False,
+    }
+
+
+@pytest.fixture
+def app_client():
+    """
+    Async context manager factory: ``async with app_client(llm) as client``
+    yields an httpx client on the app whose chat service uses ``llm``.
+    """
+    from api.dependencies import get_chat_service
+    from main import app
+    from services.chat_service import ChatService
+
+    @asynccontextmanager
+    async def client(llm: LLMClient):
+        app.dependency_overrides[get_chat_service] = lambda: ChatService(llm)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+                yield c
+        finally:
+            app.dependency_overrides.clear()
+
+    yield client
+    app.dependency_overrides.clear()
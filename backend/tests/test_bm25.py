@@ -0,0 +1,67 @@
+from core.bm25 import BM25Index, BM25Retriever
+from core.retrieval import content_hash
+from services.context_builder.retriever import HybridRetriever
+
+
+def test_bm25_ranks_by_term_statistics():
+    docs = [
+        "safety norm ISO 26262 functional safety requirements",
+        "the the the the safety",
+        "coding standards for python projects",
+    ]
+    index = BM25Index()
+    for d in docs:
+        index.add(content_hash(d), d)
+
+    ranked = HybridRetriever(BM25Retriever(index, include_unmatched=True)).retrieve("functional safety", docs)
+
+    assert ranked[0].text == docs[0]
+    assert ranked[-1].text == docs[2]
+    assert ranked[-1].score == 0.0
+
+
+def test_ingest_keys_skip_hashing_and_unmatched_texts():
+    docs = ["brake pads", "coding style", "brake fluid"]
+    index = BM25Index()
+    keys = [content_hash(d) for d in docs]
+    for key, d in zip(keys, docs):
+        index.add(key, d)
+
+    class Chunks(list):
+        touched = set()
+
+        def __getitem__(self, i):
+            self.touched.add(i)
+            return super().__getitem__(i)
+
+        def __iter__(self):
+            raise AssertionError("chunk texts must not be iterated")
+
+    chunks = Chunks(docs)
+    ranked = BM25Retriever(index).retrieve("brake", chunks, keys)
+
+    assert sorted(r.text for r in ranked) == ["brake fluid", "brake pads"]
+    assert [r.key for r in ranked] == [content_hash(r.text) for r in ranked]
+    assert chunks.touched == {0, 2}
+
+
+def test_remove_keeps_shared_chunks():
+    index = BM25Index()
+    index.add("shared chunk", "shared chunk")
+    index.add("shared chunk", "shared chunk")
+    index.remove("shared chunk", "shared chunk")
+
+    assert [key for key, _ in index.search("chunk")] == ["shared chunk"]
+
+    index.remove("shared chunk", "shared chunk")
+    assert index.search("chunk") == []
+    assert len(index) == 0
+
+
+def test_unknown_texts_are_scored_without_indexing():
+    retriever = BM25Retriever(top_k=1, include_unmatched=False)
+
+    ranked = retriever.retrieve("upload", ["an upload text", "upload upload upload", "other"])
+
+    assert [r.text for r in ranked] == ["upload upload upload"]
+    assert len(retriever.index) == 0
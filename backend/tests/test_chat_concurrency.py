@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+
+def test_requests_are_served_while_chat_is_in_flight(app_client, fake_llm):
+    async def run():
+        async with app_client(fake_llm(delay=0.5)) as client:
+            start = time.perf_counter()
+            chats = [
+                asyncio.create_task(client.post("/chat", json={"message": f"frage {i}"}))
+                for i in range(5)
+            ]
+            await asyncio.sleep(0.1)
+            # Während die Chats noch auf das LLM warten, muss der Server weiter antworten
+            listing = await client.get("/directories/project")
+            listing_done = time.perf_counter() - start
+            responses = await asyncio.gather(*chats)
+            total = time.perf_counter() - start
+        return listing, listing_done, responses, total
+
+    listing, listing_done, responses, total = asyncio.run(run())
+
+    assert listing.status_code == 200
+    assert listing_done < 0.5
+    assert all(r.status_code == 200 for r in responses)
+    assert all(r.json()["response"] == "ok [C1]" for r in responses)
+    # seriell wären es 5 x 0.5s
+    assert total < 1.5
@@ -0,0 +1,23 @@
+import asyncio
+import json
+
+
+def test_chat_stream_emits_tokens_and_final_event(app_client, fake_llm, chat_payload):
+    async def run():
+        async with app_client(fake_llm(tokens=("Hallo", " Welt", " [C1]"), usage=(3, 3))) as client:
+            return await client.post("/chat/stream", json=chat_payload)
+
+    response = asyncio.run(run())
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert "".join(e["text"] for e in events if e["type"] == "token") == "Hallo Welt [C1]"
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["usage"] == {"input_tokens": 3, "output_tokens": 3}
+    assert done["citations"] == [{"id": "[C1]", "title": "doc.txt", "source": "upload"}]
+    assert done["timing"]["time_to_first_token"] is not None
@@ -0,0 +1,41 @@
+from services.context_builder.chunker import Span, StructuredChunker
+
+
+def texts(text, spans):
+    return [text[s.start:s.end] for s in spans]
+
+
+def test_markdown_headings_start_new_chunks():
+    text = "# Intro\nShort intro.\n\n## Safety\nBrake rules.\n"
+
+    spans = StructuredChunker().spans(text, doc_id="a.md", kind="markdown")
+
+    assert texts(text, spans) == ["# Intro\nShort intro.", "## Safety\nBrake rules."]
+    assert spans[0] == Span("a.md", 0, len("# Intro\nShort intro."))
+
+
+def test_paragraphs_are_packed_without_splitting_words():
+    paragraphs = [("word " * 30).strip() for _ in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = StructuredChunker(max_chars=400, min_chars=50).split(text)
+
+    assert all(len(c) <= 400 for c in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+    assert all(c.startswith("word") and c.endswith("word") for c in chunks)
+
+
+def test_code_definitions_stay_whole():
+    func = "def f{i}(x):\n    y = x + {i}\n\n    return y\n"
+    text = "\n".join(func.format(i=i) for i in range(6))
+
+    chunks = StructuredChunker(max_chars=100, min_chars=10).split(text, kind="code")
+
+    assert all(c.startswith("def f") for c in chunks)
+    assert sum(c.count("return y") for c in chunks) == 6
+
+
+def test_sheet_markers_are_hard_boundaries():
+    text = "=== Sheet: A ===\n1\t2\n=== Sheet: B ===\n3\t4"
+
+    assert StructuredChunker().split(text) == ["=== Sheet: A ===\n1\t2", "=== Sheet: B ===\n3\t4"]
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from core.prompt import SystemPrompt
+from services.llm.claude import ClaudeClient
+
+
+def test_stable_prefix_gets_cache_marker():
+    system = ClaudeClient._system(SystemPrompt("reference", "query part"))
+
+    assert system == [
+        {"type": "text", "text": "reference", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "query part"},
+    ]
+    assert ClaudeClient._system("plain") == "plain"
+    assert ClaudeClient._system(SystemPrompt("", "no prefix")) == "no prefix"
+
+
+def test_usage_reports_cache_reads():
+    usage = SimpleNamespace(
+        input_tokens=10, output_tokens=5, cache_read_input_tokens=900, cache_creation_input_tokens=None
+    )
+
+    assert ClaudeClient._usage(usage) == {
+        "input_tokens": 10,
+        "output_tokens": 5,
+        "cache_read_input_tokens": 900,
+        "cache_creation_input_tokens": 0,
+    }
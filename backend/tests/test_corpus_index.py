@@ -0,0 +1,171 @@
+import threading
+import time
+from pathlib import Path
+
+from core.embedding import EmbeddingRetriever
+from services.context_builder.chunker import StructuredChunker
+from services.corpus_index import CorpusIndex, DirectoryIndex
+from services.document_service import DocumentService
+
+
+def _names(index: DirectoryIndex):
+    return [d.file_data["name"] for d in index.documents()]
+
+
+def test_incremental_updates(tmp_path: Path):
+    (tmp_path / "spec_V1.0.txt").write_text("Spec 1")
+    (tmp_path / "notes.md").write_text("Notes")
+    index = DirectoryIndex(tmp_path, DocumentService())
+    index.build()
+    assert _names(index) == ["notes.md", "spec_V1.0.txt"]
+
+    newer = tmp_path / "spec_V2.0.txt"
+    newer.write_text("Spec 2")
+    index.update(newer)
+    assert _names(index) == ["notes.md", "spec_V2.0.txt"]
+
+    newer.unlink()
+    index.remove(newer)
+    assert _names(index) == ["notes.md", "spec_V1.0.txt"]
+    assert index.documents()[1].chunks == ["Spec 1"]
+
+
+def test_reconcile_only_reextracts_changes(tmp_path: Path):
+    (tmp_path / "a.txt").write_text("A")
+    (tmp_path / "b.txt").write_text("B")
+    service = DocumentService()
+    index = DirectoryIndex(tmp_path, service)
+    index.build()
+
+    (tmp_path / "a.txt").write_text("AA")
+    (tmp_path / "b.txt").unlink()
+
+    assert index.reconcile() == 2
+    assert [d.content for d in index.documents()] == ["AA"]
+    assert index.reconcile() == 0
+
+
+def test_readers_are_served_during_reconcile_extraction(tmp_path: Path):
+    (tmp_path / "a.txt").write_text("A")
+    started, release = threading.Event(), threading.Event()
+
+    class SlowService(DocumentService):
+        def extract_many(self, file_paths):
+            if file_paths:
+                started.set()
+                release.wait(5)
+            return super().extract_many(file_paths)
+
+    index = DirectoryIndex(tmp_path, SlowService())
+    release.set()
+    index.build()
+    release.clear()
+
+    (tmp_path / "b.txt").write_text("B")
+    worker = threading.Thread(target=index.reconcile)
+    worker.start()
+    assert started.wait(5)
+    # Extraktion läuft noch: Leser sehen den bisherigen Stand, ohne zu warten
+    assert index.listing()["file_count"] == 1
+    assert [d.content for d in index.documents()] == ["A"]
+    release.set()
+    worker.join(5)
+    assert [d.content for d in index.documents()] == ["A", "B"]
+
+
+def test_polling_watcher_picks_up_new_files(tmp_path: Path):
+    corpus = CorpusIndex(DocumentService(), [tmp_path])
+    corpus.start(watch_mode="polling", poll_interval=0.05)
+    corpus.watcher.debounce = 0.01
+    try:
+        (tmp_path / "new.txt").write_text("New")
+        deadline = time.time() + 5
+        while time.time() < deadline and not corpus.get(tmp_path).documents():
+            time.sleep(0.05)
+        assert _names(corpus.get(tmp_path)) == ["new.txt"]
+    finally:
+        corpus.stop()
+
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.05)
+
+
+def test_native_watcher_updates_single_files_without_reconcile(tmp_path: Path):
+    (tmp_path / "old.txt").write_text("Old")
+    corpus = CorpusIndex(DocumentService(), [tmp_path])
+    corpus.start(watch_mode="native")
+    corpus.watcher.debounce = 0.01
+    index = corpus.get(tmp_path)
+    subtrees = []
+    reconcile = index.reconcile
+    index.reconcile = lambda subtree=None: subtrees.append(subtree) or reconcile(subtree)
+    try:
+        (tmp_path / "new.txt").write_text("New")
+        _wait_for(lambda: len(index.documents()) == 2)
+        assert _names(index) == ["new.txt", "old.txt"]
+        # Das Modified-Event des Verzeichnisses löst keinen Abgleich aus
+        assert subtrees == []
+
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "inner.txt").write_text("Inner")
+        _wait_for(lambda: len(index.documents()) == 3)
+        assert "inner.txt" in _names(index)
+        assert tmp_path not in subtrees
+    finally:
+        corpus.stop()
+
+
+class CountingEmbedder:
+    """Zählt eingebettete Texte; Vektoren sind beliebig, aber stabil."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+
+def _sections(prefix: str, count: int) -> str:
+    return "\n\n".join(f"# {prefix} {i}\n" + f"Absatz {i} über {prefix}. " * 40 for i in range(count))
+
+
+def test_changed_file_only_embeds_changed_chunks(tmp_path: Path):
+    text = _sections("Bremse", 12)
+    (tmp_path / "a.md").write_text(text)
+    embedder = CountingEmbedder()
+    embedding = EmbeddingRetriever(embedder)
+    index = DirectoryIndex(tmp_path, DocumentService(), chunker=StructuredChunker(max_chars=1_200), embedding=embedding)
+    index.build()
+    chunks = index.documents()[0].chunks
+    assert len(chunks) == 12
+    embedder.texts.clear()
+
+    (tmp_path / "a.md").write_text(text.replace("Absatz 5 ", "Abschnitt 5 "))
+    index.reconcile()
+
+    assert len(embedder.texts) == 1
+    assert len(embedding) == 12
+
+
+def test_deleting_a_file_keeps_shared_chunk_vectors(tmp_path: Path):
+    shared = _sections("Norm", 7)
+    (tmp_path / "b.md").write_text(shared + "\n\n" + _sections("Pedal", 1))
+    (tmp_path / "c.md").write_text(shared)
+    embedder = CountingEmbedder()
+    embedding = EmbeddingRetriever(embedder)
+    index = DirectoryIndex(tmp_path, DocumentService(), chunker=StructuredChunker(max_chars=1_200), embedding=embedding)
+    index.build()
+    assert len(embedding) == 8
+    embedder.texts.clear()
+
+    (tmp_path / "c.md").unlink()
+    index.reconcile()
+
+    assert len(embedding) == 8
+    embedding.retrieve("Norm", index.documents()[0].chunks, index.documents()[0].keys)
+    assert embedder.texts == ["Norm"]
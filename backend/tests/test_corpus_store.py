@@ -0,0 +1,106 @@
+from pathlib import Path
+
+from core.bm25 import BM25Index, BM25Retriever
+from services.context_builder.production_builder import ProductionMCPContextBuilder
+from services.context_builder.retriever import HybridRetriever
+from services.corpus_index import CorpusIndex, DirectoryIndex
+from services.document_service import DocumentService
+
+
+class CountingService(DocumentService):
+    def __init__(self):
+        super().__init__()
+        self.processed = []
+
+    def process_file(self, file_path, directory, content=None):
+        self.processed.append(file_path.name)
+        return super().process_file(file_path, directory, content)
+
+
+def test_saved_index_loads_without_extraction(tmp_path: Path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "spec_V1.0.md").write_text("# Brakes\nBremsanlage prüfen.\n\n# Safety\nISO 26262")
+    (docs / "spec_V2.0.md").write_text("# Brakes\nneu")
+    (docs / "notes.txt").write_text("Notizen zum Projekt")
+    store = tmp_path / "store.corpus"
+
+    built = DirectoryIndex(docs, DocumentService())
+    built.build()
+    expected = [(d.relative_path, d.content, d.chunks, d.chunk_tokens) for d in built.documents()]
+    built.save(store)
+    # Nach dem Speichern kommen die Texte aus dem Store
+    assert [(d.relative_path, d.content, d.chunks, d.chunk_tokens) for d in built.documents()] == expected
+
+    service = CountingService()
+    bm25 = BM25Index()
+    loaded = DirectoryIndex(docs, service, bm25=bm25)
+    assert loaded.load(built.documents()[0].store)
+    assert [(d.relative_path, d.content, d.chunks, d.chunk_tokens) for d in loaded.documents()] == expected
+    assert service.processed == []
+
+    loaded.warm()
+    assert len(bm25) == sum(len(d.chunks) for d in loaded.documents())
+
+    (docs / "notes.txt").write_text("Neue Notizen")
+    assert loaded.reconcile() == 1
+    assert service.processed == ["notes.txt"]
+
+
+def test_corpus_index_starts_from_store(tmp_path: Path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("alpha")
+    stores = tmp_path / "stores"
+
+    first = CorpusIndex(DocumentService(), [docs], store_dir=stores)
+    first.start(watch_mode="off")
+    first.stop()
+
+    service = CountingService()
+    second = CorpusIndex(service, [docs], store_dir=stores)
+    second.start(watch_mode="off")
+    second.stop()
+
+    assert service.processed == []
+    assert second.get(docs).documents()[0].content == "alpha"
+    assert "alpha" in [c for d in second.get(docs).documents() for c in d.chunks]
+
+
+def test_builder_decodes_only_selected_chunks(tmp_path: Path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    sections = [f"# Abschnitt {i}\nFüllt den Text über Größen und Maße." for i in range(40)]
+    sections[25] = "# Bremse\nBremsanlage prüfen"
+    (docs / "spec.md").write_text("\n\n".join(sections))
+
+    bm25 = BM25Index()
+    index = DirectoryIndex(docs, DocumentService(), bm25=bm25)
+    index.build()
+    expected = index.documents()[0].chunks
+    index.save(tmp_path / "store.corpus")
+    document = index.documents()[0]
+    assert list(document.chunk_view()) == expected
+
+    store = document.store
+    decoded = []
+    text = store.text
+    store.text = lambda start, end: decoded.append((start, end)) or text(start, end)
+
+    builder = ProductionMCPContextBuilder(
+        query="Bremsanlage",
+        max_tokens=300,
+        retriever=HybridRetriever(BM25Retriever(bm25)),
+        fill_unmatched=False,
+    )
+    builder.add_document(
+        title=document.relative_path,
+        source="project",
+        chunks=document.chunk_view(),
+        chunk_tokens=document.chunk_tokens,
+        chunk_keys=document.keys,
+    )
+
+    assert "Bremsanlage prüfen" in builder.build()
+    # Nur der ausgewählte Chunk wurde aus dem Store dekodiert
+    assert [text(*r) for r in decoded] == ["# Bremse\nBremsanlage prüfen"]
@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+
+import api.routes_chat as routes_chat
+from core.config import settings
+from main import app
+from services.corpus_index import CorpusIndex, DirectoryIndex
+from services.document_service import DocumentService
+
+
+def test_listing_pages_metadata_without_content(tmp_path: Path):
+    for i in range(5):
+        (tmp_path / f"doc{i}.txt").write_text("x" * 1000)
+    index = DirectoryIndex(tmp_path, DocumentService())
+
+    first = index.listing(limit=2)
+    second = index.listing(limit=2, cursor=first["next_cursor"])
+    last = index.listing(limit=2, cursor=second["next_cursor"])
+
+    assert [f["name"] for f in first["files"]] == ["doc0.txt", "doc1.txt"]
+    assert [f["name"] for f in second["files"]] == ["doc2.txt", "doc3.txt"]
+    assert [f["name"] for f in last["files"]] == ["doc4.txt"]
+    assert last["next_cursor"] is None
+    assert first["file_count"] == 5
+    assert first["total_size"] == 5000
+    assert "content" not in first["files"][0]
+
+
+def test_fingerprint_changes_with_the_listing(tmp_path: Path):
+    doc = tmp_path / "doc.txt"
+    doc.write_text("a")
+    index = DirectoryIndex(tmp_path, DocumentService())
+    before = index.fingerprint()
+    assert index.fingerprint() == before
+
+    doc.write_text("ab")
+    index.update(doc)
+    assert index.fingerprint() != before
+
+
+async def _requests(paths):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        listing = await client.get("/directories/project", params={"limit": 1})
+        cached = await client.get(
+            "/directories/project",
+            params={"limit": 1},
+            headers={"If-None-Match": listing.headers["etag"]},
+        )
+        content = await client.get(f"/directories/project/files/{paths[0]}", headers={"Accept-Encoding": "gzip"})
+        escape = await client.get("/directories/project/files/..%2Fsecret.txt")
+    return listing, cached, content, escape
+
+
+def test_listing_endpoint_supports_etags_and_file_content(tmp_path: Path, monkeypatch):
+    project = tmp_path / "project"
+    (project / "sub").mkdir(parents=True)
+    (project / "sub" / "a.txt").write_text("Hallo " * 500)
+    (project / "b.txt").write_text("Welt")
+    monkeypatch.setattr(settings, "PROJECT_DIR", project)
+    monkeypatch.setattr(routes_chat, "corpus_index", CorpusIndex(DocumentService(), [project]))
+
+    listing, cached, content, escape = asyncio.run(_requests(["sub/a.txt"]))
+
+    assert listing.status_code == 200
+    body = listing.json()
+    assert body["file_count"] == 2
+    assert [f["path"] for f in body["files"]] == ["b.txt"]
+    assert body["next_cursor"]
+    assert cached.status_code == 304
+
+    assert content.status_code == 200
+    assert content.headers["content-encoding"] == "gzip"
+    assert content.json()["content"] == "Hallo " * 500
+    assert escape.status_code in (400, 404)
@@ -0,0 +1,61 @@
+import os
+import time
+from pathlib import Path
+
+from services import document_service
+from services.document_service import DocumentService
+from utils.file_extractors import extract_file
+
+
+def test_extract_many_on_pool_keeps_order_and_isolates_errors(tmp_path: Path):
+    files = []
+    for i in range(4):
+        f = tmp_path / f"doc{i}.txt"
+        f.write_text(f"text {i}")
+        files.append(f)
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    files.insert(2, broken)
+
+    service = DocumentService(max_workers=2)
+    try:
+        texts = service.extract_many(files)
+    finally:
+        service.close()
+
+    assert texts[:2] == ["text 0", "text 1"]
+    assert texts[2].startswith("[Error reading broken.pdf")
+    assert texts[3:] == ["text 2", "text 3"]
+
+
+def _crash_on_segfault_files(path: str):
+    # Läuft im Worker-Prozess: simuliert einen Absturz (Segfault/OOM) des Parsers
+    if "segfault" in path:
+        os._exit(1)
+    # Langsam genug, dass die übrigen Dateien beim Absturz noch offen sind
+    time.sleep(0.2)
+    return extract_file(path)
+
+
+def test_worker_crash_only_affects_the_crashing_file(tmp_path: Path, monkeypatch):
+    files = []
+    for i in range(6):
+        f = tmp_path / f"doc{i}.txt"
+        f.write_text(f"text {i}")
+        files.append(f)
+    crashing = tmp_path / "segfault.txt"
+    crashing.write_text("boom")
+    files.insert(1, crashing)
+    monkeypatch.setattr(document_service, "extract_file", _crash_on_segfault_files)
+
+    service = DocumentService(max_workers=2)
+    try:
+        texts = service.extract_many(files)
+        # Der kaputte Pool wurde ersetzt und ist weiter nutzbar
+        assert service.extract_many(files[2:4]) == ["text 1", "text 2"]
+    finally:
+        service.close()
+
+    assert texts[0] == "text 0"
+    assert texts[1].startswith("[Error reading segfault.txt")
+    assert texts[2:] == [f"text {i}" for i in range(1, 6)]
@@ -0,0 +1,95 @@
+import hashlib
+
+from core.bm25 import BM25Retriever
+from core.embedding import EmbeddingRetriever
+from services.context_builder.production_builder import ProductionMCPContextBuilder
+from services.context_builder.retriever import HybridRetriever
+
+
+class HashingEmbedder:
+    """Deterministischer Ersatz für ein Embedding-Modell: Bag-of-Words-Hashing."""
+
+    def __init__(self, dims: int = 64):
+        self.dims = dims
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dims
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dims] += 1.0
+            vectors.append(vector)
+        return vectors
+
+
+def test_chunks_are_embedded_once_in_batches():
+    embedder = HashingEmbedder()
+    retriever = EmbeddingRetriever(embedder, batch_size=2)
+    docs = ["brake system", "safety norm", "coding style"]
+
+    retriever.embed_documents(docs)
+    ranked = retriever.retrieve("safety norm", docs + ["safety norm"])
+
+    assert ranked[0].text == "safety norm"
+    # 2 Batches beim Indexieren, danach nur noch die Query
+    assert embedder.calls == [["brake system", "safety norm"], ["coding style"], ["safety norm"]]
+
+
+def test_query_is_embedded_once_per_request():
+    embedder = HashingEmbedder()
+    retriever = EmbeddingRetriever(embedder)
+    documents = [[f"brake part {i}", f"pedal {i}"] for i in range(5)]
+    for chunks in documents:
+        retriever.embed_documents(chunks)
+    embedder.calls.clear()
+
+    builder = ProductionMCPContextBuilder(query="brake", retriever=HybridRetriever(BM25Retriever(), retriever))
+    for i, chunks in enumerate(documents):
+        builder.add_document(title=f"d{i}", content="", source=str(i), chunks=chunks)
+
+    assert embedder.calls == [["brake"]]
+
+
+def test_hybrid_fuses_scores_per_text():
+    docs = ["brake system", "safety norm", "coding style"]
+    hybrid = HybridRetriever(BM25Retriever(), EmbeddingRetriever(HashingEmbedder()))
+
+    ranked = hybrid.retrieve("safety", docs)
+
+    assert len(ranked) == len(docs)
+    assert ranked[0].text == "safety norm"
+    assert ranked[0].source == "hybrid"
+
+
+def test_saved_vectors_are_not_embedded_again(tmp_path):
+    docs = ["brake system", "safety norm", "coding style"]
+    first = EmbeddingRetriever(HashingEmbedder())
+    first.embed_documents(docs)
+    first.save(tmp_path / "vectors.npz")
+
+    embedder = HashingEmbedder()
+    second = EmbeddingRetriever(embedder)
+    assert second.load(tmp_path / "vectors.npz")
+    second.retrieve("safety", docs)
+
+    assert embedder.calls == [["safety"]]
+
+
+def test_trained_index_is_searched_once_per_query():
+    embedder = HashingEmbedder()
+    retriever = EmbeddingRetriever(embedder, top_k=4, ivf_threshold=8, nlist=2)
+    documents = [[f"brake part {i} {j}" for j in range(4)] for i in range(3)]
+    for chunks in documents:
+        retriever.embed_documents(chunks)
+    assert retriever.index.is_trained
+
+    searches = []
+    search = retriever.index.search
+    retriever.index.search = lambda *args, **kwargs: searches.append(1) or search(*args, **kwargs)
+    for chunks in documents:
+        ranked = retriever.retrieve("brake part", chunks)
+        assert ranked and {r.text for r in ranked} <= set(chunks)
+
+    assert len(searches) == 1
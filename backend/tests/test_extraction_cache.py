@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+from services.extraction_cache import ExtractionCache
+
+
+def test_unchanged_file_is_extracted_once(tmp_path: Path):
+    f = tmp_path / "doc.txt"
+    f.write_text("Hello World")
+    calls = []
+
+    def extract(content: bytes) -> str:
+        calls.append(content)
+        return content.decode()
+
+    cache = ExtractionCache(tmp_path / "cache")
+    assert cache.get_or_extract(f, extract) == "Hello World"
+    assert cache.get_or_extract(f, extract) == "Hello World"
+    cache.close()
+
+    # Neustart: Cache liegt auf der Platte
+    cache = ExtractionCache(tmp_path / "cache")
+    assert cache.get_or_extract(f, extract) == "Hello World"
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_changed_file_is_extracted_again(tmp_path: Path):
+    f = tmp_path / "doc.txt"
+    f.write_text("v1")
+    cache = ExtractionCache(tmp_path / "cache")
+    cache.get_or_extract(f, bytes.decode)
+
+    f.write_text("v2")
+    os.utime(f, ns=(0, 0))
+
+    assert cache.get_or_extract(f, bytes.decode) == "v2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction(tmp_path: Path):
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=10)
+    for name in ("a", "b", "c"):
+        f = tmp_path / f"{name}.txt"
+        f.write_text(name * 4)
+        cache.get_or_extract(f, bytes.decode)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 10
+    assert stats["evictions"] == 1
+
+
+def test_cache_is_cleared_when_extractors_change(tmp_path: Path):
+    f = tmp_path / "slides.txt"
+    f.write_text("Slide")
+    calls = []
+
+    def extract(content: bytes) -> str:
+        calls.append(content)
+        return content.decode()
+
+    ExtractionCache(tmp_path / "cache", version=1).get_or_extract(f, extract)
+    assert ExtractionCache(tmp_path / "cache", version=1).get_or_extract(f, extract) == "Slide"
+    assert len(calls) == 1
+
+    cache = ExtractionCache(tmp_path / "cache", version=2)
+    assert cache.stats()["entries"] == 0
+    cache.get_or_extract(f, extract)
+    assert len(calls) == 2
@@ -0,0 +1,61 @@
+from itertools import islice
+from pathlib import Path
+
+from services.document_service import DocumentService
+from utils.file_walker import IgnoreRules, walk
+
+
+def _tree(root: Path, paths):
+    for rel in paths:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+
+
+def test_walk_prunes_ignored_directories_and_limits_depth(tmp_path: Path):
+    _tree(tmp_path, [
+        "a.txt", "b.bin", "docs/c.md", "docs/deep/d.txt",
+        "node_modules/pkg/readme.md", "build/out.txt", "keep/build.txt",
+    ])
+    rules = IgnoreRules(["node_modules/", "/build", "*.md", "!docs/*.md"])
+
+    rels = [e.rel for e in walk(tmp_path, extensions={".txt", ".md"}, ignore=rules)]
+    assert rels == ["a.txt", "docs/c.md", "docs/deep/d.txt", "keep/build.txt"]
+
+    shallow = [e.rel for e in walk(tmp_path, extensions={".txt"}, ignore=rules, max_depth=1)]
+    assert shallow == ["a.txt", "keep/build.txt"]
+
+    # Teilbaum: Regeln, Tiefe und rel gelten weiter relativ zur Wurzel
+    sub = [e.rel for e in walk(tmp_path, extensions={".txt", ".md"}, ignore=rules, subdirectory="docs")]
+    assert sub == ["docs/c.md", "docs/deep/d.txt"]
+    assert list(walk(tmp_path, ignore=rules, max_depth=1, subdirectory="docs/deep")) == []
+
+
+def test_walk_reports_stat_data_and_stops_early(tmp_path: Path):
+    _tree(tmp_path, [f"f{i}.txt" for i in range(10)])
+
+    entries = list(islice(walk(tmp_path), 3))
+
+    assert [e.rel for e in entries] == ["f0.txt", "f1.txt", "f2.txt"]
+    stat = (tmp_path / "f0.txt").stat()
+    assert (entries[0].size, entries[0].mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def test_ignore_rules_match_gitignore_semantics():
+    rules = IgnoreRules(["# Kommentar", "**/tmp/**", "*.log", "!important.log", "src/**/gen_*.py"])
+
+    assert rules.excludes("a/tmp/x.txt")
+    assert rules.excludes("debug.log")
+    assert not rules.excludes("important.log")
+    assert rules.excludes("src/a/b/gen_x.py")
+    assert not rules.excludes("lib/gen_x.py")
+
+
+def test_document_service_applies_ignore_file(tmp_path: Path):
+    _tree(tmp_path, ["a.txt", "drafts/b.txt", ".git/c.txt"])
+    (tmp_path / ".mcpignore").write_text("drafts/\n")
+    service = DocumentService()
+
+    assert [p.name for p in service.list_supported_files(tmp_path)] == ["a.txt"]
+    assert service.is_ignored(tmp_path, tmp_path / "drafts" / "new.txt")
+    assert not service.is_ignored(tmp_path, tmp_path / "a.txt")
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+
+from core.config import settings
+from core.metrics import Registry
+from services.health import HealthChecker
+
+
+def _sample(text: str, line_start: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not in metrics")
+
+
+def test_histogram_renders_cumulative_buckets():
+    r = Registry()
+    h = r.histogram("op_seconds", "Op latency", ["kind"], buckets=(0.1, 1.0))
+    h.labels("a").observe(0.05)
+    h.labels("a").observe(0.5)
+    h.labels("a").observe(5)
+
+    text = r.render()
+
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{kind="a",le="1"} 2' in text
+    assert 'op_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'op_seconds_count{kind="a"} 3' in text
+
+
+def test_metrics_endpoint_reports_llm_and_request_stages(app_client, fake_llm, chat_payload):
+    async def run():
+        async with app_client(fake_llm(tokens=("Hallo", " Welt", " [C1]"), usage=(3, 3))) as client:
+            before = (await client.get("/metrics")).text
+            await client.post("/chat/stream", json=chat_payload)
+            return before, await client.get("/metrics")
+
+    before, response = asyncio.run(run())
+    after = response.text
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    def delta(line_start):
+        try:
+            old = _sample(before, line_start)
+        except AssertionError:
+            old = 0.0
+        return _sample(after, line_start) - old
+
+    assert delta('mcp_llm_time_to_first_token_seconds_count{llm_type="local"}') == 1
+    assert delta('mcp_llm_tokens_total{llm_type="local",direction="output"}') == 3
+    assert delta('mcp_context_build_seconds_count{stage="collect"}') == 1
+    assert delta('mcp_retrieval_seconds_count') >= 1
+    assert delta('mcp_http_request_seconds_count{method="POST",route="/chat/stream",status="200"}') == 1
+    # Der Scrape selbst läuft noch
+    assert _sample(after, "mcp_http_requests_in_flight") == 1
+    assert "mcp_cache_hit_ratio" in after
+
+
+def test_health_probes_backends_and_caches_the_result(monkeypatch):
+    monkeypatch.setattr(settings, "USE_LOCAL_LLM", True)
+    monkeypatch.setattr(settings, "LOCAL_MODEL", "llama3.2")
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", None)
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", None)
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"models": [{"name": "llama3.2:latest"}]})
+
+    async def run():
+        checker = HealthChecker(ttl=60)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first, second = await asyncio.gather(checker.check(client), checker.check(client))
+            cached = await checker.check(client)
+            # Modell fehlt: Ollama erreichbar, aber nicht einsatzbereit
+            monkeypatch.setattr(settings, "LOCAL_MODEL", "mistral")
+            refreshed = await checker.check(client, force=True)
+        return first, second, cached, refreshed
+
+    first, second, cached, refreshed = asyncio.run(run())
+
+    assert first["status"] == "healthy" and first["ollama_available"]
+    assert not first["claude_available"]
+    assert second is first and cached is first
+    assert calls == ["/api/tags", "/api/tags"]
+    assert refreshed["status"] == "degraded"
+    assert refreshed["backends"]["ollama"]["model_available"] is False
@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from main import app
+from services.llm.ollama import OllamaClient
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    if body["stream"]:
+        lines = [
+            {"response": "Hal", "done": False},
+            {"response": "lo", "done": False},
+            {"response": "", "done": True, "prompt_eval_count": 7, "eval_count": 2},
+        ]
+        return httpx.Response(200, text="\n".join(json.dumps(l) for l in lines))
+    return httpx.Response(200, json={"response": "Hallo", "prompt_eval_count": 7, "eval_count": 2})
+
+
+def test_ollama_client_uses_shared_client():
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            llm = OllamaClient("http://ollama", "llama3.2", client=client)
+            result = await llm.chat("hi", "system")
+            events = [e async for e in llm.stream("hi", "system")]
+            await llm.aclose()
+            return result, events, client.is_closed
+
+    result, events, closed = asyncio.run(run())
+
+    assert result["usage"] == {"input_tokens": 7, "output_tokens": 2}
+    assert [e["text"] for e in events if e["type"] == "token"] == ["Hal", "lo"]
+    assert events[-1]["usage"] == {"input_tokens": 7, "output_tokens": 2}
+    # Der gemeinsame Client gehört der App, nicht dem LLM-Client
+    assert not closed
+
+
+def test_lifespan_creates_one_llm_client():
+    with TestClient(app):
+        llm = app.state.llm
+        assert llm.client is app.state.http_client
+    assert app.state.http_client.is_closed
+
+
+def test_keep_alive_is_sent_to_ollama():
+    llm = OllamaClient("http://ollama", "llama3.2", client=httpx.AsyncClient(), keep_alive="30m")
+
+    assert llm._payload("hi", "system", stream=False)["keep_alive"] == "30m"
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import utils.file_extractors as file_extractors
+from core.bm25 import BM25Index, BM25Retriever
+from services.context_builder.production_builder import ProductionMCPContextBuilder
+from services.context_builder.retriever import HybridRetriever
+from services.page_cache import PageCache
+
+
+def _pdf(pages):
+    """Minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count)) + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def _counting_parser(monkeypatch):
+    parsed = []
+    original = file_extractors.iter_pdf_pages
+
+    def iter_pages(content, start=0):
+        for number, page in enumerate(original(content, start), start=start):
+            parsed.append(number)
+            yield page
+
+    monkeypatch.setattr("services.page_cache.iter_pdf_pages", iter_pages)
+    return parsed
+
+
+def test_pages_are_extracted_lazily_and_cached(tmp_path: Path, monkeypatch):
+    pdf = tmp_path / "manual.pdf"
+    pdf.write_bytes(_pdf(["Einleitung", "Wartung", "Anhang"]))
+    parsed = _counting_parser(monkeypatch)
+    cache = PageCache()
+
+    pages = cache.pages(pdf)
+    assert next(pages) == "=== Page 1 ===\nEinleitung"
+    pages.close()
+    assert parsed == [0]
+
+    assert list(cache.pages(pdf))[1:] == ["=== Page 2 ===\nWartung", "=== Page 3 ===\nAnhang"]
+    assert parsed == [0, 1, 2]
+
+    # Vollständig gelesen: kein weiteres Parsen
+    assert len(list(cache.pages(pdf))) == 3
+    assert parsed == [0, 1, 2]
+
+
+def test_page_cache_evicts_oldest_pages(tmp_path: Path):
+    pdf = tmp_path / "manual.pdf"
+    pdf.write_bytes(_pdf(["a" * 10, "b" * 10, "c" * 10]))
+    cache = PageCache(max_bytes=60)
+
+    list(cache.pages(pdf))
+
+    assert cache.stats()["bytes"] <= 60
+    assert cache.stats()["pages"] == 2
+
+
+def test_builder_stops_reading_pages_once_budget_is_covered():
+    pages_read = []
+
+    def pages():
+        for number in range(500):
+            pages_read.append(number)
+            yield f"=== Page {number + 1} ===\n" + ("Pumpe Wartung Intervall " if number < 3 else "Garantie Lieferung ") * 20
+
+    retriever = HybridRetriever(BM25Retriever(BM25Index()))
+    builder = ProductionMCPContextBuilder(query="pumpe wartung", max_tokens=300, retriever=retriever)
+
+    read = builder.add_pages(title="manual.pdf", source="upload", pages=pages(), patience=5)
+
+    assert read == len(pages_read) < 20
+    assert "Pumpe Wartung" in builder.build()
@@ -0,0 +1,86 @@
+from services.context_builder.production_builder import ProductionMCPContextBuilder
+
+
+FILLER = "lorem ipsum " * 100  # 400 Tokens, füllt das Budget allein
+
+
+def test_global_selection_prefers_later_relevant_document():
+    builder = ProductionMCPContextBuilder(query="brake safety", max_tokens=415, global_selection=True)
+    builder.add_document(title="early", content=FILLER, source="a")
+    builder.add_document(title="relevant", content="brake safety requirements", source="b")
+
+    ctx = builder.build()
+
+    assert "brake safety requirements" in ctx
+    assert "[C2] relevant (b)" in ctx
+    assert "[C1] early (a)" not in ctx
+
+
+def test_per_document_mode_fills_in_arrival_order():
+    builder = ProductionMCPContextBuilder(query="brake safety", max_tokens=415)
+    builder.add_document(title="early", content=FILLER, source="a")
+    builder.add_document(title="relevant", content="brake safety requirements", source="b")
+
+    assert "brake safety requirements" not in builder.build()
+
+
+def test_unmatched_chunks_fill_only_free_space():
+    builder = ProductionMCPContextBuilder(query="brake", max_tokens=1_000, global_selection=True, max_candidates=3)
+    builder.add_document(title="a", content="", source="a", chunks=["brake pads", "style", "naming", "tabs", "spaces"])
+
+    # Treffer zuerst, dann Dokumentreihenfolge, bis der Heap voll ist
+    assert sorted(block.split("\n")[2] for *_, block, _ in builder._candidates) == ["brake pads", "naming", "style"]
+
+    strict = ProductionMCPContextBuilder(query="brake", global_selection=True, fill_unmatched=False)
+    strict.add_document(title="a", content="", source="a", chunks=["brake pads", "style"])
+    assert len(strict._candidates) == 1
+
+
+def test_candidate_heap_is_bounded():
+    builder = ProductionMCPContextBuilder(query="x", global_selection=True, max_candidates=3)
+    for i in range(10):
+        builder.add_document(title=f"d{i}", content=f"x {i}", source=str(i))
+
+    assert len(builder._candidates) == 3
+
+
+class CharCounter:
+    name = "chars"
+
+    def count(self, text):
+        return len(text)
+
+    def count_many(self, texts):
+        return [len(t) for t in texts]
+
+
+def test_precomputed_chunk_tokens_are_used_for_budget():
+    counter = CharCounter()
+    builder = ProductionMCPContextBuilder(query="brake", max_tokens=100, token_counter=counter)
+    overhead = len(builder._block("doc", "[C1]", ""))
+
+    builder.add_document(
+        title="doc", content="", source="a",
+        chunks=["brake pads", "brake fluid"], chunk_tokens=[100 - overhead, 1000],
+    )
+
+    assert builder.budget.used == 100
+    assert "brake pads" in builder.build()
+    assert "brake fluid" not in builder.build()
+
+
+def _prefixed_builder(query: str, upload: str):
+    builder = ProductionMCPContextBuilder(query=query, max_tokens=400, prefix_tokens=200, global_selection=True)
+    builder.add_document(title="ref", content="x", source="r", chunks=["norm A", "norm B", FILLER], stable=True)
+    builder.add_document(title="upload", content=upload, source="upload")
+    return builder.build_prompt()
+
+
+def test_stable_documents_form_identical_prefix():
+    first = _prefixed_builder("brake", "brake pads")
+    second = _prefixed_builder("coding style", "style guide")
+
+    assert first.prefix == second.prefix
+    assert "norm A" in first.prefix and "norm B" in first.prefix
+    assert "brake pads" in first.suffix
+    assert str(first) == first.prefix + first.suffix
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from services.chat_service import ChatService
+from services.response_cache import MemoryResponseCache, SQLiteResponseCache, response_cache_key
+
+
+def test_key_normalizes_message_and_tracks_context():
+    key = response_cache_key("What is  ISO 26262?", "ctx", "m")
+
+    assert key == response_cache_key("what is iso 26262? ", "ctx", "m")
+    assert key != response_cache_key("What is ISO 26262?", "ctx changed", "m")
+    assert key != response_cache_key("What is ISO 26262?", "ctx", "other-model")
+
+
+def test_chat_service_serves_repeated_questions_from_cache(fake_llm, fixed_builder):
+    llm = fake_llm(response="answer {n}", model="test-model")
+    service = ChatService(llm, cache=MemoryResponseCache())
+
+    async def run():
+        first = await service.chat("Hallo", fixed_builder("corpus v1"))
+        second = await service.chat("hallo ", fixed_builder("corpus v1"))
+        changed = await service.chat("Hallo", fixed_builder("corpus v2"))
+        return first, second, changed
+
+    first, second, changed = asyncio.run(run())
+
+    assert second["response"] == first["response"] and second["cached"]
+    assert changed["response"] == "answer 2"
+    assert llm.calls == 2
+
+
+def test_memory_cache_evicts_lru_and_expires():
+    cache = MemoryResponseCache(max_entries=2, ttl=0.05)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get("c") is None
+
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+    cache = SQLiteResponseCache(tmp_path, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.set("c", {"v": 3})
+    cache.close()
+
+    reopened = SQLiteResponseCache(tmp_path, max_entries=2)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == {"v": 3}
+    assert len(reopened) == 2
@@ -0,0 +1,57 @@
+import asyncio
+
+from core.singleflight import SingleFlight
+from services.chat_service import ChatService
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        later = await flight.do("k", work)
+        return results, later
+
+    results, later = asyncio.run(run())
+
+    assert all(r == {"value": 42} for r in results)
+    assert later == {"value": 42}
+    assert len(runs) == 2
+    assert flight.stats() == {"calls": 6, "executions": 2, "deduplicated": 4, "in_flight": 0}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.executions == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_identical_questions_reach_the_llm_once(fake_llm, fixed_builder):
+    llm = fake_llm(response="ok", model="slow", delay=0.05)
+    flight = SingleFlight("llm")
+
+    async def run():
+        service = ChatService(llm, flight=flight)
+        return await asyncio.gather(*(service.chat("Frage", fixed_builder()) for _ in range(4)))
+
+    results = asyncio.run(run())
+
+    assert [r["response"] for r in results] == ["ok"] * 4
+    assert llm.calls == 1
@@ -0,0 +1,30 @@
+from core.token_budget import TokenBudget
+from core.token_counter import HeuristicCounter, get_token_counter, register_token_counter
+
+
+def test_heuristic_charges_punctuation_and_long_words():
+    counter = HeuristicCounter()
+
+    assert counter.count("x[0] + y;") == 7
+    assert counter.count("Bremsanlagenprüfung") == 5
+    assert counter.count("") == 0
+
+
+def test_registered_counter_is_selected_by_model_prefix():
+    class Fixed(HeuristicCounter):
+        name = "fixed"
+
+    register_token_counter("unit-test-model", Fixed)
+
+    assert get_token_counter("unit-test-model:7b").name == "fixed"
+    assert get_token_counter("unknown-model").name == "heuristic"
+    assert get_token_counter("unit-test-model", spec="heuristic").name == "heuristic"
+
+
+def test_budget_uses_integer_counts():
+    budget = TokenBudget(10)
+
+    assert budget.can_add_tokens(10)
+    budget.add_tokens(7)
+    assert not budget.can_add_tokens(4)
+    assert budget.used == 7
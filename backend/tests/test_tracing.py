@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from core import tracing
+from core.tracing import TraceMiddleware
+from main import app
+
+
+@pytest.fixture
+def chat(app_client, fake_llm, chat_payload):
+    """POST the upload-only chat request to ``url`` and return the response."""
+    def post(url: str):
+        async def run():
+            async with app_client(fake_llm(usage=(7, 2))) as client:
+                return await client.post(url, json=chat_payload)
+        return asyncio.run(run())
+    return post
+
+
+@contextmanager
+def _trace_debug():
+    # Die Middleware liest die Einstellung beim Aufbau des Stacks
+    middleware = next(m for m in app.user_middleware if m.cls is TraceMiddleware)
+    previous = middleware.kwargs["debug_enabled"]
+    middleware.kwargs["debug_enabled"] = True
+    app.middleware_stack = None
+    try:
+        yield
+    finally:
+        middleware.kwargs["debug_enabled"] = previous
+        app.middleware_stack = None
+
+
+def test_trace_debug_is_opt_in(chat):
+    response = chat("/chat?debug=trace")
+
+    assert response.json()["trace"] is None
+
+
+def test_chat_returns_stage_breakdown_on_request(chat):
+    with _trace_debug():
+        response = chat("/chat?debug=trace")
+    trace = response.json()["trace"]
+
+    assert response.headers["x-trace-id"] == trace["id"]
+    assert {"context.collect", "chunk", "retrieve", "context.select", "llm"} <= set(trace["stages"])
+    assert trace["counts"]["documents"] == 1
+    assert trace["counts"]["chunks_scored"] >= trace["counts"]["chunks_selected"] >= 1
+    assert trace["counts"]["context_tokens"] > 0
+    assert trace["counts"]["llm_output_tokens"] == 2
+    assert trace["attributes"] == {"model": "fake", "cached": False}
+
+    with _trace_debug():
+        plain = chat("/chat")
+    assert plain.json()["trace"] is None
+    assert "x-trace-id" not in plain.headers
+
+
+def _busy(request):
+    with tracing.span("busy"):
+        end = time.perf_counter() + 0.1
+        while time.perf_counter() < end:
+            pass
+    trace = tracing.current_trace()
+    return JSONResponse(trace.report() if trace.debug else {})
+
+
+def test_profile_and_slow_request_log(tmp_path: Path):
+    log = tmp_path / "logs" / "slow.log"
+    traced = TraceMiddleware(
+        Starlette(routes=[Route("/busy", _busy)]),
+        debug_enabled=True,
+        profile_interval=0.002,
+        slow_threshold=0.05,
+        slow_log=log,
+    )
+
+    async def run():
+        transport = httpx.ASGITransport(app=traced)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/busy", headers={"X-Debug-Trace": "profile"})
+
+    report = asyncio.run(run()).json()
+
+    assert report["stages"]["busy"]["calls"] == 1
+    profile = report["profile"]
+    assert profile["samples"] > 0
+    assert any("_busy" in f["function"] for f in profile["functions"])
+
+    logged = json.loads(log.read_text().splitlines()[0])
+    assert logged["id"] == report["id"]
+    assert logged["status"] == 200
+    assert logged["duration_ms"] >= 50
@@ -0,0 +1,73 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+
+import api.routes_upload as routes_upload
+from core.config import settings
+from main import app
+from services.corpus_index import DirectoryIndex
+from services.document_service import DocumentService
+from services.ingest_jobs import IngestJobManager
+
+
+def _manager(tmp_path: Path) -> IngestJobManager:
+    index = DirectoryIndex(tmp_path, DocumentService(), apply_version_filtering=False)
+    return IngestJobManager(index)
+
+
+async def _upload(manager: IngestJobManager, filename: str, content: bytes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/upload", files={"file": (filename, content)})
+        if response.status_code != 202:
+            return response, None
+        job_id = response.json()["job_id"]
+        await manager.wait(job_id)
+        status = await client.get(f"/upload/jobs/{job_id}")
+    return response, status
+
+
+def test_upload_is_indexed_in_background(tmp_path: Path, monkeypatch):
+    manager = _manager(tmp_path)
+    monkeypatch.setattr(routes_upload, "ingest_jobs", manager)
+
+    response, status = asyncio.run(_upload(manager, "../notes.txt", b"Hallo Welt"))
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    job = status.json()
+    assert job["status"] == "done"
+    assert job["document"]["name"] == "notes.txt"
+    assert job["document"]["chunks"] == 1
+    # Der Client-Pfad wird verworfen
+    assert (tmp_path / job["job_id"] / "notes.txt").read_bytes() == b"Hallo Welt"
+
+    document = manager.document(job["document"]["id"])
+    assert document.content == "Hallo Welt"
+
+
+def test_upload_rejects_oversized_and_unsupported_files(tmp_path: Path, monkeypatch):
+    manager = _manager(tmp_path)
+    monkeypatch.setattr(routes_upload, "ingest_jobs", manager)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 8)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 4)
+
+    response, _ = asyncio.run(_upload(manager, "big.txt", b"x" * 20))
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+    response, _ = asyncio.run(_upload(manager, "old.doc", b"x"))
+    assert response.status_code == 400
+
+
+def test_failed_extraction_marks_job_as_error(tmp_path: Path, monkeypatch):
+    manager = _manager(tmp_path)
+    monkeypatch.setattr(routes_upload, "ingest_jobs", manager)
+
+    _, status = asyncio.run(_upload(manager, "broken.pdf", b"not a pdf"))
+
+    job = status.json()
+    assert job["status"] == "error"
+    assert job["error"]
+    assert manager.document(job["job_id"]) is None
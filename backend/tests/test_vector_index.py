@@ -0,0 +1,57 @@
+import numpy as np
+
+from core.vector_index import VectorIndex
+
+
+def make_data(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dim))
+    return (centers[rng.integers(0, 20, n)] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_exact_search_returns_nearest_first():
+    index = VectorIndex(3)
+    index.add(["x", "y", "xy"], [[1, 0, 0], [0, 1, 0], [1, 1, 0]])
+
+    result = index.search([1, 0.1, 0], k=2)
+
+    assert [key for key, _ in result] == ["x", "xy"]
+    assert result[0][1] > result[1][1]
+
+
+def test_ivf_recall_against_exact():
+    data = make_data()
+    index = VectorIndex(16, nprobe=4, ivf_threshold=1000)
+    index.add([str(i) for i in range(len(data))], data)
+    assert index.is_trained
+
+    hits = 0
+    for q in data[:50]:
+        truth = {k for k, _ in index.search(q, 10, exact=True)}
+        hits += len(truth & {k for k, _ in index.search(q, 10)})
+    assert hits / 500 >= 0.9
+
+
+def test_add_replaces_and_delete_compacts():
+    index = VectorIndex(2)
+    index.add(["a", "b", "c", "d"], [[1, 0], [0, 1], [1, 1], [-1, 0]])
+    index.add(["a"], [[0, -1]])
+    index.delete(["b", "c"])
+
+    assert len(index) == 2
+    assert index.search([0, -1], k=1)[0][0] == "a"
+    assert {k for k, _ in index.search([1, 0], k=10)} == {"a", "d"}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    data = make_data(n=1200)
+    index = VectorIndex(16, ivf_threshold=1000)
+    index.add([str(i) for i in range(len(data))], data)
+    path = tmp_path / "vectors.npz"
+
+    index.save(path)
+    loaded = VectorIndex.load(path)
+
+    assert len(loaded) == len(index)
+    assert loaded.is_trained
+    assert loaded.search(data[7], k=3) == index.search(data[7], k=3)
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from services.corpus_index import DirectoryIndex
+from services.document_service import DocumentService
+from services.version_handler import VersionHandler
+from services.version_index import VersionIndex
+
+
+def test_latest_versions_are_maintained_per_file():
+    index = VersionIndex()
+    index.add("spec_X0.9.pdf")
+    assert index.selected("spec.pdf") == ["spec_X0.9.pdf"]
+
+    index.add("spec_V1.0.pdf")
+    index.add("spec_V1.2.pdf")
+    index.add("spec_X2.0.pdf")
+    assert index.selected("spec.pdf") == ["spec_V1.2.pdf"]
+    assert index.latest("spec.pdf", released=True).path == "spec_V1.2.pdf"
+    assert index.latest("spec.pdf", released=False).path == "spec_X2.0.pdf"
+
+    index.remove("spec_V1.2.pdf")
+    assert index.selected("spec.pdf") == ["spec_V1.0.pdf"]
+    assert [e.path for e in index.history("spec.pdf")] == [
+        "spec_X0.9.pdf", "spec_V1.0.pdf", "spec_X2.0.pdf"
+    ]
+
+    index.remove("spec_V1.0.pdf")
+    assert index.selected("spec.pdf") == ["spec_X2.0.pdf"]
+
+
+def test_unversioned_files_are_all_selected_and_restored_from_dict():
+    index = VersionIndex.build(["a/notes.md", "b/notes.md", "report-v2.0.txt"])
+    assert index.selected("notes.md") == ["a/notes.md", "b/notes.md"]
+
+    restored = VersionIndex.from_dict(index.to_dict())
+    assert sorted(restored.select_all()) == sorted(index.select_all())
+    assert restored.latest("report.txt").v_version == (2, 0, 0)
+
+
+def test_select_latest_versions_keeps_input_order():
+    files = [Path("b_V1.0.txt"), Path("a.txt"), Path("b_V2.0.txt"), Path("c_X0.1.txt")]
+    assert VersionHandler().select_latest_versions(files) == [
+        Path("a.txt"), Path("b_V2.0.txt"), Path("c_X0.1.txt")
+    ]
+
+
+def test_directory_index_exposes_version_history(tmp_path: Path):
+    for name in ("spec_V1.0.txt", "spec_V1.1.txt", "spec_X2.0.txt"):
+        (tmp_path / name).write_text(name)
+    index = DirectoryIndex(tmp_path, DocumentService())
+
+    versions = index.versions("spec_V1.0.txt")
+
+    assert versions["document"] == "spec.txt"
+    assert versions["selected"] == ["spec_V1.1.txt"]
+    assert versions["draft"]["version"] == "2.0.0"
+    assert [v["path"] for v in versions["history"]] == [
+        "spec_V1.0.txt", "spec_V1.1.txt", "spec_X2.0.txt"
+    ]
+    assert index.versions("missing.txt") is None
@@ -6,7 +6,7 @@ import FileUpload from './components/FileUpload';
 import DirectoryPanel from './components/DirectoryPanel';
 import ChatMessage from './components/ChatMessage';
 import ModelSwitcher from './components/ModelSwitcher';
-import { API_BASE_URL, API_ENDPOINTS } from './constants';
+import { API_BASE_URL, API_ENDPOINTS, UPLOAD_POLL_INTERVAL, UPLOAD_POLL_TIMEOUT } from './constants';
 
 const App = () => {
   // State declarations
@@ -88,6 +88,19 @@ const App = () => {
     }
   };
 
+  // Extraktion und Indexierung laufen im Backend als Job
+  const waitForUploadJob = async (jobId) => {
+    const deadline = Date.now() + UPLOAD_POLL_TIMEOUT;
+    while (Date.now() < deadline) {
+      const response = await axios.get(`${API_BASE_URL}${API_ENDPOINTS.UPLOAD_JOB}/${jobId}`);
+      if (response.data.status === 'done' || response.data.status === 'error') {
+        return response.data;
+      }
+      await new Promise(resolve => setTimeout(resolve, UPLOAD_POLL_INTERVAL));
+    }
+    throw new Error('Verarbeitung dauert zu lange, bitte später erneut versuchen');
+  };
+
   const handleFileUpload = async (e) => {
     const uploadedFiles = Array.from(e.target.files);
     if (uploadedFiles.length === 0) return;
@@ -105,12 +118,15 @@ const App = () => {
           },
         });
 
+        const job = await waitForUploadJob(response.data.job_id);
+
         const processedFile = {
           id: Date.now() + Math.random(),
-          name: response.data.filename,
-          content: response.data.content,
-          size: response.data.size,
-          status: response.data.status,
+          name: job.filename,
+          documentId: job.document?.id,
+          size: job.size,
+          status: job.status === 'done' ? 'processed' : 'error',
+          error: job.error,
         };
 
         setFiles(prev => [...prev, processedFile]);
@@ -118,7 +134,6 @@ const App = () => {
         const errorFile = {
           id: Date.now() + Math.random(),
           name: file.name,
-          content: '',
           size: file.size,
           status: 'error',
           error: error.response?.data?.detail || error.message,
@@ -152,16 +167,13 @@ const App = () => {
     setLoading(true);
 
     try {
-      const documents = files
+      const documentIds = files
         .filter(f => f.status === 'processed')
-        .map(f => ({
-          name: f.name,
-          content: f.content,
-        }));
+        .map(f => f.documentId);
 
       const response = await axios.post(`${API_BASE_URL}${API_ENDPOINTS.CHAT}`, {
         message: currentInput,
-        documents: documents,
+        document_ids: documentIds,
         use_local: useLocal,
         include_project: includeProject,
         include_reference: includeReference,
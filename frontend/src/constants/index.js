@@ -5,6 +5,7 @@ export const API_ENDPOINTS = {
   MODELS: '/models',
   CHAT: '/chat',
   UPLOAD: '/upload',
+  UPLOAD_JOB: '/upload/jobs',
   DIRECTORIES_PROJECT: '/directories/project',
   DIRECTORIES_REFERENCE: '/directories/reference',
   DIRECTORIES_REFRESH: '/directories/refresh'
@@ -14,7 +15,10 @@ export const SUPPORTED_FILE_TYPES = [
   '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.pptx', '.txt', '.md'
 ];
 
-export const MAX_FILE_SIZE = 10 * 1024 * 1024; // 10MB
+export const MAX_FILE_SIZE = 50 * 1024 * 1024; // 50MB, wie UPLOAD_MAX_BYTES im Backend
+
+export const UPLOAD_POLL_INTERVAL = 500; // ms
+export const UPLOAD_POLL_TIMEOUT = 10 * 60 * 1000; // ms, danach gilt der Upload als fehlgeschlagen
 
 export const LLM_TYPES = {
   LOCAL: 'local',